@@ -0,0 +1,98 @@
+"""Hot/cold archival of finished tasks, their bids and old read messages.
+
+Rows are moved, in short batches, into *_archive tables that share the
+original ids and columns but carry no foreign keys, so the live task, bid
+and message tables (and their indexes) only hold rows that are still in
+play. Pages that show history read the archive tables when needed.
+"""
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import insert, delete, select, exists, func
+
+import jobs
+from models import db, Task, Bid, Message, SearchMatch, ArchivedTask, ArchivedBid, ArchivedMessage
+
+
+def _move(model, archived_model, where):
+    """Copy the matching rows into the archive table, then delete them"""
+    columns = [c.name for c in model.__table__.columns]
+    source = select(*[model.__table__.c[name] for name in columns]).where(where)
+    db.session.execute(insert(archived_model.__table__).from_select(columns, source))
+    return db.session.execute(delete(model.__table__).where(where)).rowcount
+
+
+def archive_old_rows(older_than_days, batch_size=500):
+    """Archive completed or expired tasks and read messages older than the cutoff.
+
+    Saved-search matches for archived tasks are deleted in the same
+    transaction; they only point at jobs that are no longer open.
+
+    Returns (tasks, bids, messages) moved. The newest row of each table is
+    never moved: SQLite would hand its id out again and collide with the
+    archived copy.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    moved_tasks = moved_bids = moved_messages = 0
+
+    max_task_id = db.session.query(func.max(Task.id)).scalar() or 0
+    max_bid_id = db.session.query(func.max(Bid.id)).scalar() or 0
+    while True:
+        task_ids = [row[0] for row in db.session.execute(
+            select(Task.id)
+            .where(Task.status.in_(('completed', 'expired')),
+                   func.coalesce(Task.completed_at, Task.expires_at, Task.created_at) < cutoff,
+                   Task.id < max_task_id,
+                   ~exists().where(Bid.task_id == Task.id, Bid.id >= max_bid_id))
+            .limit(batch_size)
+        )]
+        if not task_ids:
+            break
+        db.session.execute(delete(SearchMatch.__table__).where(SearchMatch.task_id.in_(task_ids)))
+        moved_bids += _move(Bid, ArchivedBid, Bid.task_id.in_(task_ids))
+        moved_tasks += _move(Task, ArchivedTask, Task.id.in_(task_ids))
+        db.session.commit()
+
+    max_message_id = db.session.query(func.max(Message.id)).scalar() or 0
+    while True:
+        message_ids = [row[0] for row in db.session.execute(
+            select(Message.id)
+            .where(Message.is_read.is_(True), Message.created_at < cutoff, Message.id < max_message_id)
+            .limit(batch_size)
+        )]
+        if not message_ids:
+            break
+        moved_messages += _move(Message, ArchivedMessage, Message.id.in_(message_ids))
+        db.session.commit()
+
+    return moved_tasks, moved_bids, moved_messages
+
+
+@jobs.handler('archive_old_rows', batch_size=1)
+def run_archive_job(payloads):
+    config = current_app.config
+    archive_old_rows(config['ARCHIVE_AFTER_DAYS'], config['ARCHIVE_BATCH_SIZE'])
+    if config['ARCHIVE_INTERVAL']:
+        jobs.enqueue('archive_old_rows', delay=config['ARCHIVE_INTERVAL'])
+
+
+@click.command('archive')
+@click.option('--days', type=int, default=None, help='Archive rows older than this many days.')
+@with_appcontext
+def archive_command(days):
+    """Move old completed tasks, their bids and read messages to the archive tables"""
+    config = current_app.config
+    tasks, bids, messages = archive_old_rows(
+        days if days is not None else config['ARCHIVE_AFTER_DAYS'], config['ARCHIVE_BATCH_SIZE']
+    )
+    print(f"Archived {tasks} tasks, {bids} bids and {messages} messages.")
+
+
+def init_app(app):
+    app.config.setdefault('ARCHIVE_AFTER_DAYS', 90)
+    app.config.setdefault('ARCHIVE_BATCH_SIZE', 500)
+    app.config.setdefault('ARCHIVE_INTERVAL', 24 * 3600)
+    app.cli.add_command(archive_command)
+    jobs.schedule_periodic(app, 'archive_old_rows', 'ARCHIVE_INTERVAL')
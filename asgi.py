@@ -0,0 +1,197 @@
+"""ASGI entry point for the async serving mode:
+
+    uvicorn asgi:application --host 0.0.0.0 --port 8000
+
+A single event loop owns every connection. An idle keep-alive client or
+a slow reader costs a socket and a few kilobytes, not a blocked worker.
+
+The polling endpoints run natively async on an aiosqlite engine and
+never take a thread:
+
+* /messages/unread, the unread counts;
+* /messages/<id>/poll, which long-polls a conversation. It waits up to
+  ?wait= seconds for a new message.
+
+All waiting polls share one MessageWatch. It checks max(message.id) once
+per ASYNC_POLL_INTERVAL and wakes them, so a thousand parked clients cost
+one query per interval.
+
+Every other route is the unchanged Flask app, run on a bounded thread
+pool (ASYNC_WSGI_THREADS). That includes the job list, the messages list
+and the conversation pages. They rely on Flask's request context,
+sessions, templates and fragment cache, and spend their time rendering
+more than waiting on SQLite, so async views would gain them nothing.
+"""
+import asyncio
+import json
+import re
+from urllib.parse import parse_qs
+
+from a2wsgi import WSGIMiddleware
+from itsdangerous import BadSignature
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from werkzeug.http import parse_cookie
+
+import inbox
+from app import app as flask_app
+from models import db, Message
+
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+
+def async_database_url(url):
+    """The async-driver equivalent of a database URL"""
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+class MessageWatch:
+    """Wakes waiting long-polls whenever a message is added, with one query per interval"""
+
+    def __init__(self, engine, interval):
+        self.engine = engine
+        self.interval = interval
+        self.changed = asyncio.Event()
+        self.last_id = None
+        self.task = None
+
+    def event(self):
+        """The event the next new message will set; take it before querying"""
+        if self.task is None:
+            self.task = asyncio.ensure_future(self.run())
+        return self.changed
+
+    async def run(self):
+        while True:
+            async with self.engine.connect() as conn:
+                last_id = (await conn.execute(select(func.max(Message.id)))).scalar() or 0
+            if last_id != self.last_id:
+                self.last_id = last_id
+                changed, self.changed = self.changed, asyncio.Event()
+                changed.set()
+            await asyncio.sleep(self.interval)
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+
+class AsyncApp:
+    def __init__(self, app):
+        app.config.setdefault('ASYNC_WSGI_THREADS', 16)
+        app.config.setdefault('ASYNC_POLL_INTERVAL', 1.0)
+        app.config.setdefault('ASYNC_MAX_WAIT', 30)
+        self.app = app
+        self.wsgi = WSGIMiddleware(app, workers=app.config['ASYNC_WSGI_THREADS'])
+        with app.app_context():
+            url = db.engine.url
+        self.engine = create_async_engine(async_database_url(url))
+        self.watch = MessageWatch(self.engine, app.config['ASYNC_POLL_INTERVAL'])
+        self.sessions = app.session_interface.get_signing_serializer(app)
+        self.routes = [
+            (re.compile(r'/messages/unread'), self.unread),
+            (re.compile(r'/messages/(\d+)/poll'), self.poll),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http' and scope['method'] == 'GET':
+            for pattern, handler in self.routes:
+                match = pattern.fullmatch(scope['path'])
+                if match:
+                    await self.dispatch(handler, match, scope, receive, send)
+                    return
+            await self.wsgi(scope, receive, send)
+        else:
+            await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.watch.stop()
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def user_id(self, scope):
+        """The logged-in user from Flask's signed session cookie, or None"""
+        header = b'; '.join(value for name, value in scope['headers'] if name == b'cookie')
+        cookie = parse_cookie(header.decode('latin-1')).get(self.app.config['SESSION_COOKIE_NAME'])
+        if not cookie:
+            return None
+        try:
+            data = self.sessions.loads(cookie, max_age=int(self.app.permanent_session_lifetime.total_seconds()))
+        except BadSignature:
+            return None
+        return data.get('user_id')
+
+    async def dispatch(self, handler, match, scope, receive, send):
+        user_id = self.user_id(scope)
+        if user_id is None:
+            await send_json(send, 401, {'error': 'login required'})
+            return
+        args = {k: v[-1] for k, v in parse_qs(scope['query_string'].decode('latin-1')).items()}
+        try:
+            body = await handler(receive, user_id, args, *(int(group) for group in match.groups()))
+        except ValueError:
+            await send_json(send, 400, {'error': 'bad request'})
+            return
+        if body is not None:
+            await send_json(send, 200, body)
+
+    async def unread(self, receive, user_id, args):
+        async with self.engine.connect() as conn:
+            rows = (await conn.execute(inbox.unread_counts(user_id))).all()
+        return inbox.unread_json(rows)
+
+    async def poll(self, receive, user_id, args, partner_id):
+        after = int(args.get('after', 0))
+        wait = min(float(args.get('wait', 0)), self.app.config['ASYNC_MAX_WAIT'])
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        disconnected = asyncio.ensure_future(_disconnected(receive))
+        try:
+            while True:
+                changed = self.watch.event()
+                async with self.engine.connect() as conn:
+                    rows = (await conn.execute(inbox.messages_after(user_id, partner_id, after))).all()
+                    if rows:
+                        await conn.execute(inbox.mark_read(user_id, partner_id, rows[-1].id))
+                        await conn.commit()
+                remaining = deadline - loop.time()
+                if rows or remaining <= 0:
+                    return {'messages': [inbox.message_json(row) for row in rows]}
+                woken = asyncio.ensure_future(changed.wait())
+                await asyncio.wait({woken, disconnected}, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                woken.cancel()
+                if disconnected.done():
+                    return None
+        finally:
+            disconnected.cancel()
+
+
+async def _disconnected(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def send_json(send, status, body):
+    payload = json.dumps(body).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(payload)).encode('ascii')),
+            (b'cache-control', b'no-store'),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+application = AsyncApp(flask_app)
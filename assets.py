@@ -0,0 +1,131 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip variants are always built
+    brotli = None
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html')
+IMMUTABLE_MAX_AGE = 31536000
+
+
+def _iter_source_files(static_dir):
+    """Yield static files relative to static_dir, skipping the build output"""
+    for root, dirs, files in os.walk(static_dir):
+        rel_root = os.path.relpath(root, static_dir)
+        if rel_root == DIST_DIR or rel_root.startswith(DIST_DIR + os.sep):
+            dirs[:] = []
+            continue
+        for name in sorted(files):
+            yield os.path.normpath(os.path.join(rel_root, name)).replace(os.sep, '/')
+
+
+def build_assets(static_dir):
+    """Copy static files to content-hashed names and precompress them"""
+    dist_dir = os.path.join(static_dir, DIST_DIR)
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+    os.makedirs(dist_dir)
+
+    manifest = {}
+    for rel_path in _iter_source_files(static_dir):
+        with open(os.path.join(static_dir, rel_path), 'rb') as f:
+            data = f.read()
+
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        stem, ext = os.path.splitext(rel_path)
+        hashed = f'{stem}.{digest}{ext}'
+        target = os.path.join(dist_dir, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+
+        if ext.lower() in COMPRESSIBLE_EXTENSIONS:
+            with open(target + '.gz', 'wb') as f:
+                f.write(gzip.compress(data, compresslevel=9, mtime=0))
+            if brotli is not None:
+                with open(target + '.br', 'wb') as f:
+                    f.write(brotli.compress(data, quality=11))
+
+        manifest[rel_path] = f'{DIST_DIR}/{hashed}'
+
+    with open(os.path.join(dist_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_dir):
+    path = os.path.join(static_dir, DIST_DIR, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _accepted_encodings():
+    accept = request.accept_encodings
+    encodings = []
+    if accept['br']:
+        encodings.append(('br', '.br'))
+    if accept['gzip']:
+        encodings.append(('gzip', '.gz'))
+    return encodings
+
+
+def init_app(app):
+    """Rewrite url_for('static') to hashed names and serve them immutably"""
+    static_dir = app.static_folder
+    app.extensions['asset_manifest'] = load_manifest(static_dir)
+    default_static_view = app.view_functions['static']
+
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        if endpoint != 'static':
+            return
+        filename = values.get('filename')
+        hashed = app.extensions['asset_manifest'].get(filename)
+        if hashed:
+            values['filename'] = hashed
+
+    def static(filename):
+        if not filename.startswith(DIST_DIR + '/'):
+            return default_static_view(filename=filename)
+
+        response = None
+        for encoding, suffix in _accepted_encodings():
+            if os.path.exists(os.path.join(static_dir, filename + suffix)):
+                # The type comes from the uncompressed name, not from .gz/.br
+                mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                response = send_from_directory(static_dir, filename + suffix, mimetype=mimetype,
+                                               max_age=IMMUTABLE_MAX_AGE)
+                response.headers['Content-Encoding'] = encoding
+                break
+        if response is None:
+            response = send_from_directory(static_dir, filename, max_age=IMMUTABLE_MAX_AGE)
+
+        # send_file always names the file; an asset is not a download
+        response.headers.pop('Content-Disposition', None)
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    app.view_functions['static'] = static
+
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Build fingerprinted, precompressed copies of static files"""
+        manifest = build_assets(static_dir)
+        app.extensions['asset_manifest'] = manifest
+        print(f"Built {len(manifest)} assets into static/{DIST_DIR}/.")
+        if brotli is None:
+            print("brotli is not installed, so only .gz variants were built (pip install brotli).")
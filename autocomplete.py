@@ -0,0 +1,160 @@
+"""In-memory typeahead index over job titles, skills and categories.
+
+Every term is stored lower-cased in one sorted list, so the suggestions
+for a prefix are a contiguous slice found with bisect. Titles are also
+filed under each later word ("logo design" is found by "des"). The index
+is built on first use. New tasks are picked up incrementally by id, and
+user skills are re-read by a periodic rebuild, so other processes'
+edits show up as well.
+
+Builds run on a background thread, one at a time. Lookups keep using the
+current index until the new one is swapped in, so no request waits for a
+build. Until the first build finishes there are no suggestions.
+"""
+import bisect
+import logging
+import threading
+import time
+
+from flask import current_app
+
+from models import db, Task, User
+
+log = logging.getLogger(__name__)
+
+KINDS = ('title', 'skill', 'category')
+
+# Candidates ranked per lookup; popular terms win within this window
+MAX_SCAN = 256
+# Most suggestions returned per lookup, whatever the caller asks for
+MAX_SUGGESTIONS = 20
+
+# Full rebuild interval in seconds, which also drops terms of closed tasks
+REBUILD_INTERVAL = 300
+
+
+def _split_skills(text):
+    return [skill.strip() for skill in (text or '').split(',') if skill.strip()]
+
+
+class PrefixIndex:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.rebuilding = False
+        self.clear()
+
+    def clear(self):
+        self.keys = []
+        self.entries = []
+        self.counts = {}
+        self.max_task_id = 0
+        self.built_at = None
+
+    def _add(self, kind, text, presorted=True):
+        text = (text or '').strip()
+        if not text:
+            return
+        term = (kind, text)
+        self.counts[term] = self.counts.get(term, 0) + 1
+        if self.counts[term] > 1:
+            return
+        words = text.lower().split()
+        keys = [' '.join(words[i:]) for i in range(len(words))] if kind == 'title' else [' '.join(words)]
+        for key in keys:
+            if presorted:
+                i = bisect.bisect_right(self.keys, key)
+                self.keys.insert(i, key)
+                self.entries.insert(i, term)
+            else:
+                self.keys.append(key)
+                self.entries.append(term)
+
+    def _sort(self):
+        pairs = sorted(zip(self.keys, self.entries))
+        self.keys = [key for key, _ in pairs]
+        self.entries = [term for _, term in pairs]
+
+    def add_task(self, task, presorted=True):
+        with self.lock:
+            self._add('title', task.title, presorted)
+            self._add('category', task.category, presorted)
+            for skill in _split_skills(task.required_skill):
+                self._add('skill', skill, presorted)
+            self.max_task_id = max(self.max_task_id, task.id or 0)
+
+    def add_skills(self, text, presorted=True):
+        with self.lock:
+            for skill in _split_skills(text):
+                self._add('skill', skill, presorted)
+
+    def suggest(self, prefix, limit=8):
+        """Return [(kind, text)] of the most common terms starting with prefix"""
+        limit = max(1, min(limit, MAX_SUGGESTIONS))
+        prefix = ' '.join(prefix.lower().split())
+        if not prefix:
+            return []
+        with self.lock:
+            start = bisect.bisect_left(self.keys, prefix)
+            end = bisect.bisect_left(self.keys, prefix + '\uffff', start, min(start + MAX_SCAN, len(self.keys)))
+            candidates = set(self.entries[start:end])
+            ranked = sorted(candidates, key=lambda term: (-self.counts[term], len(term[1]), term[1]))
+        suggestions = []
+        seen = set()
+        for kind, text in ranked:
+            if text.lower() not in seen:
+                seen.add(text.lower())
+                suggestions.append((kind, text))
+        return suggestions[:limit]
+
+    def _load_tasks(self, presorted=True):
+        # A rowid range scan; filtering on status in SQL would make SQLite
+        # walk the (status, geohash) index over every open task instead.
+        columns = (Task.id, Task.status, Task.title, Task.category, Task.required_skill)
+        new_tasks = db.session.query(*columns).filter(Task.id > self.max_task_id).order_by(Task.id)
+        for task in new_tasks:
+            if task.status == 'open':
+                self.add_task(task, presorted)
+            self.max_task_id = task.id
+
+    def rebuild(self):
+        """Build a fresh index off to the side, then swap it in"""
+        fresh = PrefixIndex()
+        fresh.built_at = time.monotonic()
+        for (skills,) in db.session.query(User.skills).filter(User.skills.isnot(None)):
+            fresh.add_skills(skills, presorted=False)
+        fresh._load_tasks(presorted=False)
+        fresh._sort()
+        with self.lock:
+            self.keys, self.entries, self.counts = fresh.keys, fresh.entries, fresh.counts
+            self.max_task_id, self.built_at = fresh.max_task_id, fresh.built_at
+
+    def _rebuild_in_background(self, app):
+        try:
+            with app.app_context():
+                self.rebuild()
+        except Exception:
+            log.exception('Autocomplete index rebuild failed')
+        finally:
+            with self.lock:
+                self.rebuilding = False
+
+    def refresh(self):
+        """Load tasks posted since the last refresh; start a background rebuild when stale"""
+        with self.lock:
+            stale = self.built_at is None or time.monotonic() - self.built_at > REBUILD_INTERVAL
+            start = stale and not self.rebuilding
+            self.rebuilding = self.rebuilding or start
+            built = self.built_at is not None
+        if start:
+            threading.Thread(target=self._rebuild_in_background, args=(current_app._get_current_object(),),
+                             name='autocomplete-rebuild', daemon=True).start()
+        if built:
+            with self.lock:
+                self._load_tasks()
+
+index = PrefixIndex()
+
+
+def suggest(prefix, limit=8):
+    index.refresh()
+    return index.suggest(prefix, limit)
@@ -0,0 +1,97 @@
+"""Avatar uploads with thumbnails generated once at upload time.
+
+An upload is decoded once and cropped to square JPEG thumbnails in every
+size in SIZES. The thumbnails are written under the upload's content
+hash, and User.avatar stores only that hash. Pages reference the variant
+they display with avatar_url(user, size) and never the original. Because
+names never change meaning, files are served with immutable cache
+headers. When AVATAR_ACCEL_PREFIX is set, delivery is left to the front
+proxy (X-Accel-Redirect), otherwise to the WSGI server's file wrapper
+(sendfile). Pillow is optional and only imported by the first upload.
+"""
+import hashlib
+import io
+import os
+import re
+
+from flask import abort, send_from_directory, url_for
+
+# Display name -> square edge in pixels (twice the CSS size, for high-DPI screens)
+SIZES = {'sm': 96, 'md': 200}
+JPEG_QUALITY = 85
+MAX_PIXELS = 40_000_000
+IMMUTABLE_MAX_AGE = 31536000
+
+_NAME = re.compile(r'^[0-9a-f]{16}-\d+\.jpg$')
+
+
+class AvatarError(ValueError):
+    pass
+
+
+def _filename(digest, size):
+    return f'{digest}-{SIZES[size]}.jpg'
+
+
+def save_avatar(stream, avatar_dir, max_bytes):
+    """Store thumbnails for an uploaded image; returns the digest for User.avatar"""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:  # Pillow is optional, uploads are disabled without it
+        raise AvatarError('Avatar uploads are not available on this server.')
+    data = stream.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise AvatarError(f'Avatars must be smaller than {max_bytes // (1024 * 1024)} MB.')
+
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    if all(os.path.exists(os.path.join(avatar_dir, _filename(digest, size))) for size in SIZES):
+        return digest
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        if image.width * image.height > MAX_PIXELS:
+            raise AvatarError('That image is too large.')
+        image = ImageOps.exif_transpose(image).convert('RGB')
+    except (OSError, Image.DecompressionBombError):
+        raise AvatarError('Please upload a JPEG, PNG, GIF or WebP image.')
+
+    os.makedirs(avatar_dir, exist_ok=True)
+    for size, edge in SIZES.items():
+        thumbnail = ImageOps.fit(image, (edge, edge), Image.LANCZOS)
+        target = os.path.join(avatar_dir, _filename(digest, size))
+        tmp = f'{target}.{os.getpid()}.tmp'
+        thumbnail.save(tmp, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+        os.replace(tmp, target)
+    return digest
+
+
+def avatar_url(user, size='sm'):
+    """URL of the user's avatar thumbnail, or None when they have not uploaded one"""
+    if not user or not user.avatar:
+        return None
+    return url_for('avatar', name=_filename(user.avatar, size))
+
+
+def init_app(app):
+    """Serve avatar thumbnails and expose avatar_url() to templates"""
+    app.config.setdefault('AVATAR_DIR', os.path.join(app.instance_path, 'avatars'))
+    app.config.setdefault('AVATAR_MAX_BYTES', 5 * 1024 * 1024)
+    # e.g. '/_avatars/' with an nginx "internal" location aliased to AVATAR_DIR
+    app.config.setdefault('AVATAR_ACCEL_PREFIX', None)
+    app.add_template_global(avatar_url)
+
+    def avatar(name):
+        if not _NAME.match(name):
+            abort(404)
+        accel_prefix = app.config['AVATAR_ACCEL_PREFIX']
+        if accel_prefix:
+            response = app.response_class(mimetype='image/jpeg')
+            response.headers['X-Accel-Redirect'] = accel_prefix + name
+        else:
+            response = send_from_directory(app.config['AVATAR_DIR'], name, max_age=IMMUTABLE_MAX_AGE)
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+        return response
+
+    app.add_url_rule('/avatars/<name>', 'avatar', avatar)
@@ -0,0 +1,161 @@
+"""Sync (gunicorn) vs async (uvicorn asgi:application) serving benchmark.
+
+Starts each server on a free local port and drives it with --clients
+concurrent keep-alive clients, each issuing GET --path back to back for
+--duration seconds as a logged-in user. --slow extra connections send
+their request headers a byte at a time to stand in for slow mobile
+clients. Reports throughput and latency percentiles per server:
+
+    flask init-db   # the servers use the default database
+    python benchmarks/asgi.py --clients 500 --slow 20 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, ROOT)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, port, workers):
+    if mode == 'sync':
+        command = [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}',
+                   '--backlog', '4096', '--log-level', 'warning', 'app:app']
+    else:
+        command = [sys.executable, '-m', 'uvicorn', 'asgi:application', '--port', str(port),
+                   '--backlog', '4096', '--no-access-log', '--log-level', 'warning']
+    server = subprocess.Popen(command, cwd=ROOT)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f'{mode} server did not start')
+
+
+async def read_response(reader):
+    """Read one response; returns (status, keep_alive)"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = dict(line.lower().split(': ', 1) for line in lines[1:] if ': ' in line)
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.read()
+        return status, False
+    return status, headers.get('connection') != 'close'
+
+
+async def client(port, request, stop_at, latencies, errors):
+    reader = writer = None
+    while time.perf_counter() < stop_at:
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(request)
+            status, keep_alive = await asyncio.wait_for(read_response(reader), 30)
+            if status != 200:
+                errors.append(status)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as e:
+            errors.append(type(e).__name__)
+            keep_alive = False
+        else:
+            latencies.append(time.perf_counter() - started)
+        if not keep_alive and writer is not None:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def slow_client(port, request, stop_at):
+    """Trickle the request out a byte every 100 ms, then read the answer"""
+    while time.perf_counter() < stop_at:
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            for i in range(len(request)):
+                writer.write(request[i:i + 1])
+                await asyncio.sleep(0.1)
+                if time.perf_counter() >= stop_at:
+                    break
+            else:
+                await asyncio.wait_for(read_response(reader), 30)
+            writer.close()
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+            await asyncio.sleep(0.1)
+
+
+async def load(port, request, clients, slow, duration):
+    latencies, errors = [], []
+    stop_at = time.perf_counter() + duration
+    await asyncio.gather(
+        *(client(port, request, stop_at, latencies, errors) for _ in range(clients)),
+        *(slow_client(port, request, stop_at) for _ in range(slow)),
+    )
+    return latencies, errors
+
+
+def report(mode, latencies, errors, duration):
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100)
+        p50, p99 = cuts[49] * 1000, cuts[98] * 1000
+    else:
+        p50 = p99 = float('nan')
+    print(f"{mode:<6} {len(latencies):>8} {len(latencies) / duration:>8.0f} {p50:>9.1f} {p99:>9.1f} "
+          f"{max(latencies, default=0) * 1000:>9.1f} {len(errors):>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--path', default='/messages/unread')
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--slow', type=int, default=0)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--sync-workers', type=int, default=2 * (os.cpu_count() or 1) + 1)
+    parser.add_argument('--user-id', type=int, default=2)
+    parser.add_argument('--modes', default='sync,async')
+    args = parser.parse_args()
+
+    from app import app
+    cookie = app.session_interface.get_signing_serializer(app).dumps({'user_id': args.user_id})
+    request = (f'GET {args.path} HTTP/1.1\r\nHost: localhost\r\n'
+               f'Cookie: {app.config["SESSION_COOKIE_NAME"]}={cookie}\r\n\r\n').encode('latin-1')
+
+    print(f"{args.clients} clients + {args.slow} slow clients, GET {args.path}, {args.duration:g} s, "
+          f"{args.sync_workers} sync workers")
+    print(f"{'mode':<6} {'requests':>8} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}")
+    for mode in args.modes.split(','):
+        port = free_port()
+        server = start_server(mode, port, args.sync_workers)
+        try:
+            latencies, errors = asyncio.run(load(port, request, args.clients, args.slow, args.duration))
+        finally:
+            server.terminate()
+            server.wait()
+        report(mode, latencies, errors, args.duration)
+
+
+if __name__ == '__main__':
+    main()
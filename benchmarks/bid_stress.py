@@ -0,0 +1,127 @@
+"""Concurrent bidding and acceptance stress test.
+
+Builds the app against a throwaway SQLite database with --tasks open tasks
+and --threads workers. Each worker thread bids on every task through the
+test client, bidding twice on every --duplicate-every-th task. Then
+--threads employer requests race to accept different bids on one task.
+Checks the invariants and reports the bid throughput:
+
+- no (task, worker) pair has more than one bid
+- the raced task has exactly one accepted bid, which task.accepted_bid_id
+  points at, and every other bid on it was rejected
+
+    python benchmarks/bid_stress.py --threads 20 --tasks 40
+
+Exits with status 1 when an invariant is broken.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import func
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, ROOT)
+
+from app import create_app  # noqa: E402
+from models import db, Bid, Task, User  # noqa: E402
+
+
+def client_for(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    return client
+
+
+def run_threads(targets):
+    barrier = threading.Barrier(len(targets))
+    threads = [threading.Thread(target=lambda fn=fn: (barrier.wait(), fn())) for fn in targets]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=40)
+    parser.add_argument('--duplicate-every', type=int, default=3)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='bid-stress-')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        'TEMPLATE_CACHE_DIR': '',
+        'RATELIMIT_DB': os.path.join(tmp, 'ratelimit.db'),
+        'RATELIMITS': {},
+        'JOB_WORKERS': 0,
+    })
+    with app.app_context():
+        db.create_all()
+        employer = User(name='Employer', email='employer@example.com', password_hash='-', role='employer')
+        workers = [User(name=f'Worker {i}', email=f'worker{i}@example.com', password_hash='-', role='worker')
+                   for i in range(args.threads)]
+        db.session.add_all([employer] + workers)
+        db.session.flush()
+        tasks = [Task(title=f'Task {i}', description='Stress test task', budget_azn=50, category='Delivery',
+                      mode='offline', difficulty='beginner', status='open', employer_id=employer.id)
+                 for i in range(args.tasks)]
+        db.session.add_all(tasks)
+        db.session.commit()
+        employer_id = employer.id
+        worker_ids = [worker.id for worker in workers]
+        task_ids = [task.id for task in tasks]
+
+    statuses = []
+
+    def bidder(worker_id):
+        client = client_for(app, worker_id)
+        for i, task_id in enumerate(task_ids):
+            for _ in range(2 if i % args.duplicate_every == 0 else 1):
+                response = client.post(f'/task/{task_id}/bid', data={'amount': '40', 'proposal': 'Stress'})
+                statuses.append(response.status_code)
+
+    elapsed = run_threads([lambda worker_id=worker_id: bidder(worker_id) for worker_id in worker_ids])
+    attempts = len(statuses)
+    print(f"{attempts} bid attempts from {args.threads} threads in {elapsed:.2f} s "
+          f"({attempts / elapsed:.0f} attempts/s)")
+
+    failures = 0
+    raced = task_ids[0]
+    with app.app_context():
+        duplicates = db.session.query(Bid.task_id, Bid.worker_id).group_by(Bid.task_id, Bid.worker_id) \
+            .having(func.count() > 1).count()
+        bids = db.session.query(func.count(Bid.id)).scalar()
+        print(f"{bids} bids stored for {args.tasks * args.threads} (task, worker) pairs, "
+              f"{duplicates} duplicated pairs")
+        failures += duplicates > 0 or bids != args.tasks * args.threads
+        bid_ids = [bid_id for (bid_id,) in db.session.query(Bid.id).filter(Bid.task_id == raced)]
+
+    employer_client = [client_for(app, employer_id) for _ in bid_ids]
+    elapsed = run_threads([
+        lambda client=client, bid_id=bid_id: client.post(f'/task/{raced}/accept_bid/{bid_id}')
+        for client, bid_id in zip(employer_client, bid_ids)
+    ])
+
+    with app.app_context():
+        task = db.session.get(Task, raced)
+        accepted = Bid.query.filter_by(task_id=raced, status='accepted').all()
+        others = {bid.status for bid in Bid.query.filter(Bid.task_id == raced, Bid.status != 'accepted')}
+        print(f"{len(bid_ids)} concurrent acceptances in {elapsed * 1000:.0f} ms: {len(accepted)} accepted, "
+              f"task.accepted_bid_id={task.accepted_bid_id}, other bids {sorted(others)}")
+        failures += (len(accepted) != 1 or task.status != 'assigned' or
+                     task.accepted_bid_id != accepted[0].id or bool(others - {'rejected'}))
+
+    print('ok' if not failures else 'FAILED')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
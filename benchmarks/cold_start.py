@@ -0,0 +1,98 @@
+"""Cold first-hit latency per route, with and without the template bytecode cache.
+
+Seeds a throwaway SQLite database with the demo data, then for every route
+starts a fresh interpreter that builds the app and times its first request
+to that route (logged in as the demo employer where the route needs a
+user). Each route is measured twice: with TEMPLATE_CACHE_DIR unset, so
+every template is compiled on first use, and against a cache warmed the
+way ``flask precompile-templates`` does it. Reports the median over --runs
+processes:
+
+    python benchmarks/cold_start.py --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, ROOT)
+
+ROUTES = ['/', '/courses', '/task/1', '/learn/1', '/profile/1', '/dashboard', '/messages',
+          '/messages/2', '/task/new', '/profile/edit', '/login', '/register']
+ANONYMOUS = {'/login', '/register'}
+
+
+def make_app(tmp, cache_dir):
+    from app import create_app
+    return create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        'TEMPLATE_CACHE_DIR': cache_dir,
+        'RATELIMIT_DB': os.path.join(tmp, 'ratelimit.db'),
+        'JOB_WORKERS': 0,
+    })
+
+
+def first_hit(tmp, cache_dir, path):
+    """Runs in the child: time the first request to path, print 'ms status'"""
+    app = make_app(tmp, cache_dir)
+    client = app.test_client()
+    if path not in ANONYMOUS:
+        with client.session_transaction() as session:
+            session['user_id'] = 1
+    started = time.perf_counter()
+    response = client.get(path)
+    response.get_data()
+    print(f"{(time.perf_counter() - started) * 1000:.3f} {response.status_code}")
+
+
+def measure(tmp, cache_dir, path):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', tmp, cache_dir, path],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    ms, status = result.stdout.split()[-2:]
+    return float(ms), int(status)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--child', nargs=3, metavar=('TMP', 'CACHE_DIR', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        first_hit(*args.child)
+        return 0
+
+    from models import db
+    from seed import seed_demo_data
+
+    tmp = tempfile.mkdtemp(prefix='cold-start-')
+    cache_dir = os.path.join(tmp, 'jinja_cache')
+    app = make_app(tmp, cache_dir)
+    with app.app_context():
+        db.create_all()
+        seed_demo_data()
+        app.jinja_env.bytecode_cache.clear()
+        for name in app.jinja_env.list_templates():
+            app.jinja_env.get_template(name)
+
+    print(f"First request per route in a fresh process, median of {args.runs}")
+    print(f"{'route':<15} {'no cache':>9} {'cached':>9}  status")
+    failures = 0
+    for path in ROUTES:
+        row = []
+        for cache in ('', cache_dir):
+            samples = [measure(tmp, cache, path) for _ in range(args.runs)]
+            row.append(statistics.median(ms for ms, _ in samples))
+            status = samples[-1][1]
+        failures += status >= 400
+        print(f"{path:<15} {row[0]:>7.1f}ms {row[1]:>7.1f}ms  {status}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""Job list latency for proximity searches on offline tasks.
+
+Fills a throwaway SQLite database with --tasks open offline tasks scattered
+around Baku, plus a few online tasks without a location, then times the
+job list for "within X km" filters and the nearest-first sort through the
+test client, on the first page and on --deep-page:
+
+    python benchmarks/nearby.py --tasks 200000
+"""
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app  # noqa: E402
+from models import db, Task, User  # noqa: E402
+import geo  # noqa: E402
+
+BAKU = (40.4093, 49.8671)
+ORIGIN = 'lat=40.4&lon=49.8'
+# Ganja: no task within 250 km
+FAR = 'lat=40.68&lon=46.36'
+
+QUERIES = [
+    ('nearest first', f'/?{ORIGIN}&sort=distance'),
+    ('within 5 km', f'/?{ORIGIN}&radius_km=5'),
+    ('within 5 km, nearest first', f'/?{ORIGIN}&radius_km=5&sort=distance'),
+    ('within 50 km', f'/?{ORIGIN}&radius_km=50'),
+    ('within 50 km, nearest first', f'/?{ORIGIN}&radius_km=50&sort=distance'),
+    ('within 50 km, Delivery, nearest first', f'/?{ORIGIN}&radius_km=50&category=Delivery&sort=distance'),
+    ('300 km away, within 20 km', f'/?{FAR}&radius_km=20'),
+    ('300 km away, nearest first', f'/?{FAR}&sort=distance'),
+]
+
+
+def fill(count):
+    employer = User(name='Bench', email='bench@example.com', password_hash='-', role='employer')
+    db.session.add(employer)
+    db.session.flush()
+    rng = random.Random(1)
+    now = datetime.utcnow()
+    for start in range(0, count, 50000):
+        rows = []
+        for _ in range(start, min(start + 50000, count)):
+            # Denser towards the centre, out to about 80 km
+            distance = 80 * rng.random() ** 2
+            bearing = rng.uniform(0, 2 * math.pi)
+            lat = BAKU[0] + distance / 111.2 * math.cos(bearing)
+            lon = BAKU[1] + distance / (111.2 * math.cos(math.radians(BAKU[0]))) * math.sin(bearing)
+            rows.append({
+                'title': 'Task', 'description': 'Benchmark task', 'excerpt': 'Benchmark task',
+                'budget_azn': round(rng.uniform(5, 500), 1),
+                'category': rng.choice(['Delivery', 'Home & Repair Services', 'Construction & Labor']),
+                'mode': 'offline', 'difficulty': 'beginner', 'status': 'open', 'employer_id': employer.id,
+                'latitude': lat, 'longitude': lon, 'geohash': geo.encode(lat, lon),
+                'created_at': now, 'version': 0,
+            })
+        db.session.execute(insert(Task.__table__), rows)
+    db.session.execute(insert(Task.__table__), [{
+        'title': 'Remote task', 'description': 'Benchmark task', 'excerpt': 'Benchmark task',
+        'budget_azn': 50, 'category': 'IT & Programming', 'mode': 'online', 'difficulty': 'beginner',
+        'status': 'open', 'employer_id': employer.id, 'created_at': now, 'version': 0,
+    } for _ in range(100)])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=200000)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--deep-page', type=int, default=10)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='nearby-')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        'TEMPLATE_CACHE_DIR': '',
+        'RATELIMIT_DB': os.path.join(tmp, 'ratelimit.db'),
+        'JOB_WORKERS': 0,
+        'STREAM_TEMPLATES': False,
+    })
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        fill(args.tasks)
+        print(f"Inserted {args.tasks} offline tasks around Baku in {time.perf_counter() - started:.1f} s")
+
+    client = app.test_client()
+    print(f"{'query':<40} {'page':>4} {'p50':>9} {'p99':>9}  status")
+    failures = 0
+    for label, path in QUERIES:
+        for page in (1, args.deep_page):
+            url = f'{path}&page={page}'
+            samples = []
+            for _ in range(args.runs):
+                started = time.perf_counter()
+                response = client.get(url)
+                samples.append((time.perf_counter() - started) * 1000)
+            cuts = statistics.quantiles(samples, n=100) if args.runs > 1 else samples * 99
+            failures += response.status_code != 200
+            print(f"{label:<40} {page:>4} {statistics.median(samples):>7.1f}ms {cuts[98]:>7.1f}ms  "
+                  f"{response.status_code}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
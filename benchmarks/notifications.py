@@ -0,0 +1,96 @@
+"""Notification digest throughput: outbox writes, digest building and delivery.
+
+Fills a throwaway SQLite database with --users users, records --events
+notifications spread over them in --commit-size transactions, then builds
+the digests and delivers them through a sink. The default sink only counts
+what it gets. --sink smtp sends through a local debugging server, which
+must already be running:
+
+    python -m aiosmtpd -n -l localhost:8025 &
+    python benchmarks/notifications.py --events 100000 --sink smtp
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import insert, select  # noqa: E402
+
+from app import create_app  # noqa: E402
+from models import db, Digest, User  # noqa: E402
+import notifications  # noqa: E402
+
+
+class CountingSink(notifications.LogSink):
+    sent = 0
+
+    def send(self, digest):
+        CountingSink.sent += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--commit-size', type=int, default=100, help='notifications per transaction')
+    parser.add_argument('--sink', default='count', choices=['count', 'smtp'])
+    parser.add_argument('--smtp-port', type=int, default=8025)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='notify-')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        'TEMPLATE_CACHE_DIR': '',
+        'RATELIMIT_DB': os.path.join(tmp, 'ratelimit.db'),
+        'JOB_WORKERS': 0,
+        'NOTIFY_SINK': CountingSink if args.sink == 'count' else 'smtp',
+        'NOTIFY_SMTP_PORT': args.smtp_port,
+    })
+    with app.app_context():
+        db.create_all()
+        db.session.execute(insert(User), [
+            {'name': f'User {i}', 'email': f'user{i}@example.com', 'password_hash': '-', 'role': 'worker'}
+            for i in range(args.users)
+        ])
+        db.session.commit()
+        user_ids = db.session.execute(select(User.id)).scalars().all()
+
+        rng = random.Random(1)
+        started = time.perf_counter()
+        for i in range(args.events):
+            recipient, actor = rng.sample(user_ids, 2)
+            if rng.random() < 0.5:
+                notifications.record(recipient, 'message', actor_id=actor, actor=f'User {actor}',
+                                     excerpt='Hello, is this still available?')
+            else:
+                notifications.record(recipient, 'bid', actor_id=actor, task_id=rng.randint(1, 5000),
+                                     actor=f'User {actor}', task='Benchmark task', amount=25.0)
+            if (i + 1) % args.commit_size == 0:
+                db.session.commit()
+        db.session.commit()
+        elapsed = time.perf_counter() - started
+        print(f"Recorded {args.events} notifications in {elapsed:.1f} s "
+              f"({args.events / elapsed:.0f}/s, {args.commit_size} per transaction)")
+
+        started = time.perf_counter()
+        digests, events = notifications.build_digests(app.config['NOTIFY_BATCH_SIZE'])
+        elapsed = time.perf_counter() - started
+        print(f"Built {digests} digests from {events} notifications in {elapsed:.2f} s ({events / elapsed:.0f}/s)")
+
+        pending = db.session.execute(select(Digest.id).order_by(Digest.id)).scalars().all()
+        started = time.perf_counter()
+        for start in range(0, len(pending), notifications.DELIVERY_BATCH):
+            notifications.deliver(pending[start:start + notifications.DELIVERY_BATCH],
+                                  notifications.make_sink(app.config))
+        elapsed = time.perf_counter() - started
+        print(f"Delivered {len(pending)} digests through the {args.sink} sink in {elapsed:.2f} s "
+              f"({len(pending) / elapsed:.0f} digests/s, {events / elapsed:.0f} notifications/s)")
+
+
+if __name__ == '__main__':
+    main()
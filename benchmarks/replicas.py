@@ -0,0 +1,101 @@
+"""Read/write splitting check with a primary and a replica SQLite file.
+
+Builds the app against two throwaway databases, snapshots the primary into
+the replica and walks through the routing rules, counting the statements
+each engine executed per request:
+
+    python benchmarks/replicas.py
+
+Exits with status 1 when a request was routed to the wrong database.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import event
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, ROOT)
+
+from app import create_app  # noqa: E402
+from models import db, Task, User  # noqa: E402
+import jobs  # noqa: E402
+import replicas  # noqa: E402
+from seed import seed_demo_data  # noqa: E402
+
+
+def main():
+    tmp = tempfile.mkdtemp(prefix='replicas-')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'primary.db')}",
+        'READ_REPLICAS': [f"sqlite:///{os.path.join(tmp, 'replica.db')}"],
+        'REPLICA_SNAPSHOT_INTERVAL': 0,
+        'TEMPLATE_CACHE_DIR': '',
+        'RATELIMIT_DB': os.path.join(tmp, 'ratelimit.db'),
+        'JOB_WORKERS': 0,
+        'STREAM_TEMPLATES': False,
+    })
+    counts = {}
+
+    def counter(name):
+        def count(conn, cursor, statement, *args):
+            if not statement.startswith('PRAGMA'):  # replica freshness checks
+                counts[name] = counts.get(name, 0) + 1
+        return count
+
+    with app.app_context():
+        db.create_all()
+        seed_demo_data()
+        worker = User.query.filter_by(role='worker').first()
+        task = Task.query.first()
+        replicas.snapshot_replicas()
+        # What a job runner does on start; it must not pin clients to the primary
+        jobs.ensure_periodic(app)
+        for name, engine in (('primary', db.engines[None]), ('replica', db.engines['replica_0'])):
+            event.listen(engine, 'before_cursor_execute', counter(name))
+
+    client = app.test_client()
+    failures = 0
+
+    def check(label, method, url, expect, data=None):
+        nonlocal failures
+        counts.clear()
+        started = time.perf_counter()
+        response = client.open(url, method=method, data=data)
+        elapsed = (time.perf_counter() - started) * 1000
+        routed = 'replica' if counts.get('replica') and not counts.get('primary') else 'primary'
+        ok = routed == expect
+        failures += not ok
+        print(f"{'ok ' if ok else 'BAD'} {label:<44} {method:<4} {url:<22} {response.status_code} "
+              f"primary={counts.get('primary', 0):<3} replica={counts.get('replica', 0):<3} {elapsed:6.1f} ms")
+        return response
+
+    check('job list, fresh snapshot', 'GET', '/', 'replica')
+    check('task page', 'GET', f'/task/{task.id}', 'replica')
+    check('log in (no database write)', 'POST', '/login', 'primary',
+          {'email': worker.email, 'password': '123'})
+    check('courses as a worker', 'GET', '/courses', 'replica')
+    check('task page as a worker', 'GET', f'/task/{task.id}', 'replica')
+    check('place a bid', 'POST', f'/task/{task.id}/bid', 'primary', {'amount': '42', 'proposal': 'Hi'})
+    page = check('task page right after bidding', 'GET', f'/task/{task.id}', 'primary')
+    if b'42' not in page.data:
+        print('BAD the new bid is missing from the task page')
+        failures += 1
+
+    time.sleep(1.1)
+    with app.app_context():
+        replicas.snapshot_replicas()
+        app.extensions['replicas'].as_of.clear()
+    check('task page after the next snapshot', 'GET', f'/task/{task.id}', 'replica')
+
+    app.extensions['replicas'].staleness = 0
+    app.extensions['replicas'].as_of.clear()
+    time.sleep(1.1)
+    check('job list, snapshot older than the window', 'GET', '/', 'primary')
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Import-time/startup benchmark for the app module.
+
+Runs ``from app import app`` under ``python -X importtime`` in fresh
+interpreters and reports the median time to import the module and build
+the default app (create_app() runs on first access of app.app). Exits
+with status 1 when it exceeds --max-ms, so it can be used as a
+regression check in CI:
+
+    python benchmarks/startup.py --runs 7 --max-ms 600
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+# Default --max-ms: the default app, every subsystem enabled, starts in about 600 ms
+MAX_MS = 1000
+
+
+def import_times(module, attr):
+    """Return (total ms, {module name: cumulative microseconds}) for one cold start"""
+    target = f'from {module} import {attr}' if attr else f'import {module}'
+    code = f'import time\nstarted = time.perf_counter()\n{target}\nprint((time.perf_counter() - started) * 1000)'
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        parts = [p.strip() for p in line[len('import time:'):].split('|')]
+        if not parts[1].isdigit():
+            continue
+        times[parts[2].strip()] = int(parts[1])
+    return float(result.stdout), times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--attr', default='app',
+                        help="attribute to load from the module after importing it ('' for none)")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=MAX_MS,
+                        help='fail when the median startup time exceeds this (0 disables the check)')
+    parser.add_argument('--top', type=int, default=10,
+                        help='show the slowest imported modules of the last run')
+    args = parser.parse_args()
+
+    samples = []
+    for _ in range(args.runs):
+        total_ms, times = import_times(args.module, args.attr)
+        samples.append(total_ms)
+
+    median = statistics.median(samples)
+    target = f"from {args.module} import {args.attr}" if args.attr else f"import {args.module}"
+    print(f"{target}: median {median:.1f} ms over {args.runs} runs "
+          f"(min {min(samples):.1f}, max {max(samples):.1f})")
+    for name, us in sorted(times.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    if args.max_ms and median > args.max_ms:
+        print(f"FAIL: {median:.1f} ms exceeds the {args.max_ms:.1f} ms threshold")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Time to first byte of a large job list page, streamed vs buffered.
+
+Fills a throwaway SQLite database with --tasks open tasks, then requests
+the job list with --per-page cards through the test client, once with
+STREAM_TEMPLATES off (the whole page is rendered before the first byte)
+and once with it on (everything up to </head> goes out first). Both apps
+gzip the response, as they would for a browser. Reports the median and p99
+time to first byte and to the last byte, and the number of chunks sent:
+
+    python benchmarks/streaming.py --tasks 5000 --per-page 2000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app  # noqa: E402
+from models import db, Task, User  # noqa: E402
+
+CATEGORIES = ['IT & Programming', 'Graphic & Design', 'Writing & Translation', 'Delivery',
+              'Home & Repair Services', 'Transportation']
+
+
+def fill(count):
+    employer = User(name='Bench', email='bench@example.com', password_hash='-', role='employer')
+    db.session.add(employer)
+    db.session.flush()
+    rng = random.Random(1)
+    now = datetime.utcnow()
+    db.session.execute(insert(Task.__table__), [{
+        'title': f'Benchmark task {i}', 'description': 'Benchmark task ' * 20, 'excerpt': 'Benchmark task',
+        'budget_azn': round(rng.uniform(5, 500), 1), 'category': rng.choice(CATEGORIES),
+        'mode': rng.choice(['online', 'offline']), 'difficulty': 'beginner', 'status': 'open',
+        'employer_id': employer.id, 'created_at': now, 'version': 0,
+    } for i in range(count)])
+    db.session.commit()
+
+
+def fetch(client, path):
+    """Return (ms to first byte, ms to last byte, chunks, bytes) for one GET"""
+    started = time.perf_counter()
+    response = client.get(path, headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    chunks = iter(response.response)
+    first = next(chunks, b'')
+    first_byte = time.perf_counter() - started
+    count, size = 1, len(first)
+    for chunk in chunks:
+        count += 1
+        size += len(chunk)
+    response.close()
+    return first_byte * 1000, (time.perf_counter() - started) * 1000, count, size
+
+
+def percentiles(samples):
+    cuts = statistics.quantiles(samples, n=100) if len(samples) > 1 else samples * 99
+    return statistics.median(samples), cuts[98]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=5000)
+    parser.add_argument('--per-page', type=int, default=2000)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='streaming-')
+    config = {
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        'TEMPLATE_CACHE_DIR': '',
+        'RATELIMIT_DB': os.path.join(tmp, 'ratelimit.db'),
+        'JOB_WORKERS': 0,
+        'TASKS_PER_PAGE': args.per_page,
+    }
+    setup = create_app(config)
+    with setup.app_context():
+        db.create_all()
+        fill(args.tasks)
+
+    print(f"GET / with {args.per_page} of {args.tasks} open tasks, gzip, {args.runs} runs")
+    print(f"{'mode':<9} {'ttfb p50':>9} {'ttfb p99':>9} {'total p50':>10} {'total p99':>10} {'chunks':>7} {'bytes':>8}")
+    for label, stream in (('buffered', False), ('streamed', True)):
+        app = create_app(dict(config, STREAM_TEMPLATES=stream))
+        client = app.test_client()
+        fetch(client, '/')
+        results = [fetch(client, '/') for _ in range(args.runs)]
+        ttfb_p50, ttfb_p99 = percentiles([r[0] for r in results])
+        total_p50, total_p99 = percentiles([r[1] for r in results])
+        print(f"{label:<9} {ttfb_p50:>7.1f}ms {ttfb_p99:>7.1f}ms {total_p50:>8.1f}ms {total_p99:>8.1f}ms "
+              f"{results[-1][2]:>7} {results[-1][3]:>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
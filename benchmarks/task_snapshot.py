@@ -0,0 +1,147 @@
+"""Job list benchmark: a page of task cards from SQL vs from the open-task snapshot.
+
+Fills a throwaway SQLite database with --tasks open tasks, loads the
+snapshot once, then times the two ways index() can build a page of the job
+list for the same filters. The SQL side is the card query with
+LIMIT/OFFSET. The snapshot side is matching_ids() followed by load_tasks()
+on that page's ids. Both sides return card rows, and each filter is timed
+on the first page and on --deep-page. Reports the median and p99, and
+which side index() picks for that page:
+
+    python benchmarks/task_snapshot.py --tasks 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.orm import load_only, undefer  # noqa: E402
+
+from app import create_app  # noqa: E402
+from models import db, Task, User, TASK_CARD_COLUMNS, open_now  # noqa: E402
+import task_snapshot  # noqa: E402
+
+CATEGORIES = ['IT & Programming', 'Graphic & Design', 'Writing & Translation', 'Marketing & SMM',
+              'Education & Tutoring', 'Virtual Assistant', 'Data / AI Tasks', 'Delivery',
+              'Home & Repair Services', 'Event & Photography', 'Construction & Labor', 'Agriculture',
+              'Transportation']
+DIFFICULTIES = ['beginner', 'intermediate', 'advanced']
+
+FILTERS = [
+    ('all open tasks', {}),
+    ('mode', {'mode': 'offline'}),
+    ('category', {'category': 'Delivery'}),
+    ('budget range', {'min_budget': 40, 'max_budget': 60}),
+    ('category + difficulty + budget', {'category': 'Delivery', 'difficulty': 'advanced',
+                                        'min_budget': 40, 'max_budget': 60}),
+]
+
+CARD_OPTIONS = (load_only(*TASK_CARD_COLUMNS), undefer(Task.bid_count))
+
+
+def sql_page(offset, limit, mode=None, category=None, difficulty=None, min_budget=None, max_budget=None):
+    query = Task.query.filter(Task.status == 'open', open_now())
+    if mode:
+        query = query.filter(Task.mode == mode)
+    if category:
+        query = query.filter(Task.category == category)
+    if min_budget:
+        query = query.filter(Task.budget_azn >= min_budget)
+    if max_budget:
+        query = query.filter(Task.budget_azn <= max_budget)
+    if difficulty:
+        query = query.filter(Task.difficulty == difficulty)
+    return query.options(*CARD_OPTIONS).order_by(Task.id.desc()).limit(limit).offset(offset).all()
+
+
+def snapshot_page(offset, limit, **filters):
+    ids = task_snapshot.get().matching_ids(**filters)
+    return task_snapshot.load_tasks(ids[offset:offset + limit], *CARD_OPTIONS)
+
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    cuts = statistics.quantiles(samples, n=100) if runs > 1 else samples * 99
+    return result, statistics.median(samples), cuts[98]
+
+
+def fill(count):
+    employer = User(name='Bench', email='bench@example.com', password_hash='-', role='employer')
+    db.session.add(employer)
+    db.session.flush()
+    rng = random.Random(1)
+    now = datetime.utcnow()
+    for start in range(0, count, 50000):
+        rows = []
+        for _ in range(start, min(start + 50000, count)):
+            category = rng.choice(CATEGORIES)
+            rows.append({
+                'title': 'Task', 'description': 'Benchmark task', 'excerpt': 'Benchmark task',
+                'budget_azn': round(rng.uniform(5, 500), 1),
+                'category': category, 'mode': 'online' if CATEGORIES.index(category) < 7 else 'offline',
+                'difficulty': rng.choice(DIFFICULTIES), 'status': 'open', 'employer_id': employer.id,
+                'created_at': now, 'version': 0,
+            })
+        db.session.execute(insert(Task.__table__), rows)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=1000000)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--deep-page', type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='snapshot-')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        'TEMPLATE_CACHE_DIR': '',
+        'RATELIMIT_DB': os.path.join(tmp, 'ratelimit.db'),
+        'JOB_WORKERS': 0,
+    })
+    per_page = app.config['TASKS_PER_PAGE']
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        fill(args.tasks)
+        print(f"Inserted {args.tasks} open tasks in {time.perf_counter() - started:.1f} s")
+
+        started = time.perf_counter()
+        snapshot = task_snapshot.get()
+        print(f"Loaded the snapshot in {time.perf_counter() - started:.2f} s "
+              f"({sum(getattr(snapshot, name).nbytes for name in snapshot._arrays()) / 2 ** 20:.0f} MiB of arrays)")
+        _, sync_ms, _ = timed(snapshot.sync, args.runs)
+        print(f"Per-request sync check (no changes): {sync_ms * 1000:.0f} us median")
+
+        print(f"{per_page + 1} card rows per page (one extra to detect a next page)")
+        print(f"{'filter':<32} {'page':>4} {'sql p50':>9} {'sql p99':>9} {'snap p50':>9} {'snap p99':>9}  index()")
+        for label, filters in FILTERS:
+            for page in (1, args.deep_page):
+                offset = (page - 1) * per_page
+                expected, sql_p50, sql_p99 = timed(lambda: sql_page(offset, per_page + 1, **filters), args.runs)
+                tasks, snap_p50, snap_p99 = timed(lambda: snapshot_page(offset, per_page + 1, **filters), args.runs)
+                if [t.id for t in tasks] != [t.id for t in expected]:
+                    print(f"{label}: snapshot and SQL disagree")
+                    return 1
+                chosen = filters and task_snapshot.page_ids(offset, per_page + 1, **filters) is not None
+                print(f"{label:<32} {page:>4} {sql_p50:>7.1f}ms {sql_p99:>7.1f}ms "
+                      f"{snap_p50:>7.2f}ms {snap_p99:>7.2f}ms  {'snapshot' if chosen else 'sql'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""Professional courses listed on /courses"""
+
+COURSES = [
+    {
+        'id': 1,
+        'title': 'Meta Front-End Developer Professional Certificate',
+        'description': 'Build job-ready skills in front-end development. Learn HTML, CSS, JavaScript, React, and UI/UX design principles.',
+        'category': 'IT & Programming',
+        'duration': '7 months',
+        'level': 'Beginner',
+        'topics': ['HTML/CSS', 'JavaScript', 'React', 'UI/UX Design'],
+        'provider': 'Meta (Coursera)',
+        'certification': True,
+        'url': 'https://www.coursera.org/professional-certificates/meta-front-end-developer'
+    },
+    {
+        'id': 2,
+        'title': 'Google IT Support Professional Certificate',
+        'description': 'Job-ready IT support training. Learn troubleshooting, networking, system administration, and security. No degree required.',
+        'category': 'IT & Programming',
+        'duration': '6 months',
+        'level': 'Beginner',
+        'topics': ['Troubleshooting', 'Networking', 'Operating Systems', 'Security'],
+        'provider': 'Google (Coursera)',
+        'certification': True,
+        'url': 'https://www.coursera.org/professional-certificates/google-it-support'
+    },
+    {
+        'id': 3,
+        'title': 'AWS Certified Cloud Practitioner',
+        'description': 'Amazon Web Services cloud fundamentals. Learn cloud concepts, AWS services, security, and architecture. Industry-leading certification.',
+        'category': 'IT & Programming',
+        'duration': '2-3 months',
+        'level': 'Beginner',
+        'topics': ['Cloud Concepts', 'AWS Services', 'Security', 'Architecture'],
+        'provider': 'Amazon Web Services',
+        'certification': True,
+        'url': 'https://aws.amazon.com/training/learn-about/cloud-practitioner/'
+    },
+    {
+        'id': 4,
+        'title': 'Google UX Design Professional Certificate',
+        'description': 'Learn user experience design from Google. Master design thinking, prototyping, user research, and portfolio building.',
+        'category': 'Graphic & Design',
+        'duration': '6 months',
+        'level': 'Beginner',
+        'topics': ['Design Thinking', 'Prototyping', 'User Research', 'Figma'],
+        'provider': 'Google (Coursera)',
+        'certification': True,
+        'url': 'https://www.coursera.org/professional-certificates/google-ux-design'
+    },
+    {
+        'id': 5,
+        'title': 'Adobe Certified Professional in Graphic Design',
+        'description': 'Master Adobe Creative Suite for graphic design. Learn Photoshop, Illustrator, and InDesign. Industry-recognized certification.',
+        'category': 'Graphic & Design',
+        'duration': '3-4 months',
+        'level': 'Intermediate',
+        'topics': ['Photoshop', 'Illustrator', 'InDesign', 'Design Principles'],
+        'provider': 'Adobe',
+        'certification': True,
+        'url': 'https://www.adobe.com/education/certification.html'
+    },
+    {
+        'id': 6,
+        'title': 'LinkedIn Learning: Professional Writing',
+        'description': 'Improve your professional writing skills. Learn business writing, email etiquette, and document creation. Certificate of completion.',
+        'category': 'Writing & Translation',
+        'duration': '8-10 hours',
+        'level': 'Beginner',
+        'topics': ['Business Writing', 'Email Communication', 'Documentation', 'Grammar & Style'],
+        'provider': 'LinkedIn Learning',
+        'certification': True,
+        'url': 'https://www.linkedin.com/learning/paths/improve-your-writing-skills'
+    },
+    {
+        'id': 7,
+        'title': 'Content Marketing Certification',
+        'description': 'HubSpot\'s comprehensive content marketing course. Learn content strategy, SEO, blogging, and content promotion. Free certification.',
+        'category': 'Writing & Translation',
+        'duration': '5-6 hours',
+        'level': 'Intermediate',
+        'topics': ['Content Strategy', 'SEO Writing', 'Blogging', 'Content Promotion'],
+        'provider': 'HubSpot Academy',
+        'certification': True,
+        'url': 'https://academy.hubspot.com/courses/content-marketing'
+    },
+    {
+        'id': 8,
+        'title': 'Meta Social Media Marketing Professional Certificate',
+        'description': 'Job-ready certification program from Meta. Learn to create engaging content, run ad campaigns, and analyze performance metrics. Industry-recognized certificate.',
+        'category': 'Marketing & SMM',
+        'duration': '6 months',
+        'level': 'Beginner',
+        'topics': ['Facebook & Instagram Marketing', 'Content Strategy', 'Ad Campaigns', 'Analytics & Insights'],
+        'provider': 'Meta (Coursera)',
+        'certification': True,
+        'url': 'https://www.coursera.org/professional-certificates/meta-social-media-marketing'
+    },
+    {
+        'id': 9,
+        'title': 'Google Digital Marketing & E-commerce Certificate',
+        'description': 'Professional certificate from Google. Master digital marketing fundamentals, e-commerce strategies, and analytics. No experience required.',
+        'category': 'Marketing & SMM',
+        'duration': '6 months',
+        'level': 'Beginner',
+        'topics': ['SEO & SEM', 'Email Marketing', 'E-commerce', 'Google Analytics'],
+        'provider': 'Google (Coursera)',
+        'certification': True,
+        'url': 'https://www.coursera.org/professional-certificates/google-digital-marketing-ecommerce'
+    },
+    {
+        'id': 10,
+        'title': 'Inbound Marketing Certification',
+        'description': 'Master inbound marketing methodology. Learn to attract, engage, and delight customers. Industry-recognized free certification.',
+        'category': 'Marketing & SMM',
+        'duration': '4-5 hours',
+        'level': 'Beginner',
+        'topics': ['Inbound Methodology', 'Content Creation', 'Lead Generation', 'Marketing Automation'],
+        'provider': 'HubSpot Academy',
+        'certification': True,
+        'url': 'https://academy.hubspot.com/courses/inbound-marketing'
+    },
+    {
+        'id': 11,
+        'title': 'Google Analytics Individual Qualification (GAIQ)',
+        'description': 'Learn Google Analytics from the ground up. Master data collection, analysis, and reporting. Earn Google certification.',
+        'category': 'Marketing & SMM',
+        'duration': '4-6 hours',
+        'level': 'Intermediate',
+        'topics': ['Data Collection', 'Analysis', 'Reporting', 'E-commerce Tracking'],
+        'provider': 'Google Analytics Academy',
+        'certification': True,
+        'url': 'https://analytics.google.com/analytics/academy/'
+    },
+    {
+        'id': 12,
+        'title': 'Teaching English as a Foreign Language (TEFL)',
+        'description': 'Learn how to teach English effectively to non-native speakers. Includes lesson planning, classroom management, and assessment strategies.',
+        'category': 'Education & Tutoring',
+        'duration': '120 hours',
+        'level': 'Beginner',
+        'topics': ['Teaching Methods', 'Lesson Planning', 'Classroom Management', 'Student Assessment'],
+        'provider': 'International TEFL Academy',
+        'certification': True,
+        'url': 'https://www.internationalteflacademy.com/'
+    },
+    {
+        'id': 13,
+        'title': 'Online Tutoring Best Practices',
+        'description': 'Master the art of online tutoring. Learn platform tools, engagement strategies, and effective communication techniques.',
+        'category': 'Education & Tutoring',
+        'duration': '20 hours',
+        'level': 'Beginner',
+        'topics': ['Online Platforms', 'Student Engagement', 'Communication', 'Technology Tools'],
+        'provider': 'Coursera',
+        'certification': True,
+        'url': 'https://www.coursera.org/learn/online-tutoring'
+    },
+    {
+        'id': 14,
+        'title': 'Microsoft Excel Skills for Business Specialization',
+        'description': 'Master Excel for business analytics. Learn advanced formulas, pivot tables, data analysis, and automation. Earn a specialization certificate.',
+        'category': 'Virtual Assistant',
+        'duration': '4 months',
+        'level': 'Beginner',
+        'topics': ['Excel Formulas', 'Pivot Tables', 'Data Analysis', 'Automation'],
+        'provider': 'Macquarie University (Coursera)',
+        'certification': True,
+        'url': 'https://www.coursera.org/specializations/excel'
+    },
+    {
+        'id': 15,
+        'title': 'Virtual Assistant Training Program',
+        'description': 'Comprehensive training for virtual assistants. Learn email management, calendar scheduling, data entry, and client communication.',
+        'category': 'Virtual Assistant',
+        'duration': '6 weeks',
+        'level': 'Beginner',
+        'topics': ['Email Management', 'Calendar Scheduling', 'Data Entry', 'Client Communication'],
+        'provider': 'Udemy',
+        'certification': True,
+        'url': 'https://www.udemy.com/courses/search/?q=virtual+assistant'
+    },
+    {
+        'id': 16,
+        'title': 'IBM Data Science Professional Certificate',
+        'description': 'Comprehensive data science program covering Python, SQL, machine learning, and data visualization. Includes hands-on projects.',
+        'category': 'Data / AI Tasks',
+        'duration': '3-6 months',
+        'level': 'Beginner',
+        'topics': ['Python Programming', 'SQL', 'Machine Learning', 'Data Visualization'],
+        'provider': 'IBM (Coursera)',
+        'certification': True,
+        'url': 'https://www.coursera.org/professional-certificates/ibm-data-science'
+    },
+    {
+        'id': 17,
+        'title': 'Introduction to Artificial Intelligence',
+        'description': 'Learn the fundamentals of AI and machine learning. Understand algorithms, neural networks, and practical applications.',
+        'category': 'Data / AI Tasks',
+        'duration': '2-3 months',
+        'level': 'Intermediate',
+        'topics': ['AI Fundamentals', 'Machine Learning', 'Neural Networks', 'Practical Applications'],
+        'provider': 'Stanford (Coursera)',
+        'certification': True,
+        'url': 'https://www.coursera.org/learn/machine-learning'
+    },
+]
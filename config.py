@@ -0,0 +1,37 @@
+import os
+
+basedir = os.path.abspath(os.path.dirname(__file__))
+
+
+class Config:
+    SECRET_KEY = 'change-this-secret-key'
+    SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(basedir, 'instance', 'microjob.db')}"
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Read-only database URIs (e.g. 'sqlite:///replica.db', a snapshot kept
+    # fresh by `flask snapshot-replicas`); see replicas.py.
+    READ_REPLICAS = ()
+
+    # Compiled templates are shared by all workers through this directory; set
+    # it to an empty string to disable the bytecode cache.
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR', os.path.join(basedir, 'instance', 'jinja_cache'))
+
+    # Per-process budget for rendered {% cache %} fragments; 0 disables caching.
+    FRAGMENT_CACHE_BYTES = 16 * 1024 * 1024
+
+    # Optional subsystems, imported and initialised by create_app() in order.
+    # Each is a module exposing init_app(app). ratelimit comes first so that
+    # throttled requests are rejected before other hooks touch the database.
+    SUBSYSTEMS = (
+        'ratelimit', 'assets', 'avatars', 'responses', 'jobs', 'expiry', 'archive', 'replicas',
+        'task_snapshot', 'notifications',
+    )
+
+    # Background job threads started in each web process (0 disables them;
+    # run `flask run-jobs` as a separate process instead).
+    JOB_WORKERS = 2
+
+    # Reviews shown per page on profile pages
+    REVIEWS_PER_PAGE = 10
+    # Jobs shown per page on the job list
+    TASKS_PER_PAGE = 50
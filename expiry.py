@@ -0,0 +1,104 @@
+"""Task deadlines: closes open tasks whose expires_at has passed.
+
+The sweep works in small batches. Each batch is one short transaction
+that marks the tasks 'expired' and rejects their pending bids. Between
+batches the write lock is released and the sweeper pauses briefly, so
+live requests queue behind at most one batch. Every run logs how many
+rows it touched and how long it held the write lock.
+"""
+import logging
+import time
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select, update
+
+import jobs
+from models import db, Task, Bid
+
+log = logging.getLogger(__name__)
+
+
+def sweep_expired(batch_size=200, pause=0.05, now=None):
+    """Expire overdue open tasks and reject their pending bids, batch by batch
+
+    Returns a report: tasks, bids, batches, and the longest and total time
+    the write lock was held, in milliseconds.
+    """
+    now = now or datetime.utcnow()
+    report = {'tasks': 0, 'bids': 0, 'batches': 0, 'max_lock_ms': 0.0, 'total_lock_ms': 0.0}
+    while True:
+        task_ids = [row[0] for row in db.session.execute(
+            select(Task.id)
+            .where(Task.status == 'open', Task.expires_at <= now)
+            .limit(batch_size)
+        )]
+        if not task_ids:
+            db.session.rollback()
+            break
+
+        # SQLite takes the write lock at the first UPDATE and releases it on commit
+        started = time.perf_counter()
+        expired = db.session.execute(
+            update(Task)
+            .where(Task.id.in_(task_ids), Task.status == 'open')
+            .values(status='expired', version=Task.version + 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        rejected = db.session.execute(
+            update(Bid)
+            .where(Bid.task_id.in_(task_ids), Bid.status == 'pending')
+            .values(status='rejected')
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if expired and 'task_snapshot' in current_app.config['SUBSYSTEMS']:
+            import task_snapshot
+            task_snapshot.record(*task_ids)
+        db.session.commit()
+        held_ms = (time.perf_counter() - started) * 1000
+
+        report['tasks'] += expired
+        report['bids'] += rejected
+        report['batches'] += 1
+        report['max_lock_ms'] = max(report['max_lock_ms'], held_ms)
+        report['total_lock_ms'] += held_ms
+        if len(task_ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    if report['batches']:
+        log.info('Expired %(tasks)d tasks and rejected %(bids)d bids in %(batches)d batches '
+                 '(write lock held %(total_lock_ms).1f ms in total, %(max_lock_ms).1f ms at most)', report)
+    return report
+
+
+def _sweep(config):
+    return sweep_expired(config['EXPIRY_BATCH_SIZE'], config['EXPIRY_PAUSE'])
+
+
+@jobs.handler('expire_tasks', batch_size=1)
+def run_expiry_job(payloads):
+    config = current_app.config
+    _sweep(config)
+    if config['EXPIRY_INTERVAL']:
+        jobs.enqueue('expire_tasks', delay=config['EXPIRY_INTERVAL'])
+
+
+@click.command('expire-tasks')
+@with_appcontext
+def expire_command():
+    """Close open tasks whose deadline has passed and reject their pending bids"""
+    report = _sweep(current_app.config)
+    print(f"Expired {report['tasks']} tasks and rejected {report['bids']} bids in {report['batches']} batches; "
+          f"write lock held {report['total_lock_ms']:.1f} ms in total, {report['max_lock_ms']:.1f} ms at most.")
+
+
+def init_app(app):
+    app.config.setdefault('EXPIRY_INTERVAL', 300)
+    app.config.setdefault('EXPIRY_BATCH_SIZE', 200)
+    app.config.setdefault('EXPIRY_PAUSE', 0.05)
+    app.cli.add_command(expire_command)
+    jobs.schedule_periodic(app, 'expire_tasks', 'EXPIRY_INTERVAL')
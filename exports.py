@@ -0,0 +1,100 @@
+"""Streaming CSV/JSON exports of a user's tasks, bids and reviews.
+
+Rows are read from a server-side cursor in batches (yield_per) and
+written out batch by batch from a generator. Memory stays flat no matter
+how long the history is. Archived tasks and bids are included.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+
+from sqlalchemy import select, union_all
+
+from models import db, Task, Bid, Review, ArchivedTask, ArchivedBid
+
+KINDS = ('tasks', 'bids', 'reviews')
+FORMATS = ('csv', 'json')
+BATCH_SIZE = 500
+
+
+def _task_query(model, user):
+    owner = model.employer_id if user.role == 'employer' else model.worker_id
+    return select(
+        model.id, model.title, model.category, model.difficulty, model.mode, model.status,
+        model.budget_azn, model.employer_id, model.worker_id, model.created_at, model.completed_at,
+    ).where(owner == user.id)
+
+
+def _bid_query(task_model, bid_model, user):
+    query = select(
+        bid_model.id.label('id'), bid_model.task_id, task_model.title.label('task_title'), bid_model.worker_id,
+        bid_model.amount, bid_model.status, bid_model.created_at,
+    ).join(task_model, task_model.id == bid_model.task_id)
+    if user.role == 'employer':
+        return query.where(task_model.employer_id == user.id)
+    return query.where(bid_model.worker_id == user.id)
+
+
+def export_query(kind, user):
+    """The SELECT for one export; live and archived rows are combined with UNION ALL"""
+    if kind == 'tasks':
+        query = union_all(_task_query(Task, user), _task_query(ArchivedTask, user))
+    elif kind == 'bids':
+        query = union_all(_bid_query(Task, Bid, user), _bid_query(ArchivedTask, ArchivedBid, user))
+    else:
+        query = select(
+            Review.id, Review.task_id, Review.reviewer_id, Review.reviewee_id,
+            Review.rating, Review.comment, Review.created_at,
+        ).where((Review.reviewer_id == user.id) | (Review.reviewee_id == user.id))
+    return query.order_by('id')
+
+
+def _plain(value):
+    return value.isoformat(sep=' ') if isinstance(value, datetime) else value
+
+
+def _iter_csv(columns, partitions):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for rows in partitions:
+        writer.writerows([[_plain(v) for v in row] for row in rows])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def _iter_json(columns, partitions):
+    yield '['
+    first = True
+    for rows in partitions:
+        parts = []
+        for row in rows:
+            parts.append(('\n' if first else ',\n') + json.dumps({c: _plain(v) for c, v in zip(columns, row)}))
+            first = False
+        yield ''.join(parts)
+    yield '\n]\n'
+
+
+def iter_export(kind, fmt, user, batch_size=BATCH_SIZE):
+    """Yield the export as text chunks, one per batch of rows"""
+    result = db.session.execute(export_query(kind, user), execution_options={'yield_per': batch_size})
+    columns = list(result.keys())
+    partitions = result.partitions()
+    if fmt == 'csv':
+        return _iter_csv(columns, partitions)
+    return _iter_json(columns, partitions)
+
+
+def gzip_stream(chunks, level=6):
+    """Gzip text chunks on the fly, for .gz downloads"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
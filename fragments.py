@@ -0,0 +1,84 @@
+"""{% cache %} template tag backed by an in-process, size-bounded LRU.
+
+    {% cache 'task-card', t.id, t.version %} ... {% endcache %}
+
+The key parts identify a fragment and everything it shows. Rows carry a
+version column that the write routes bump, so a changed row simply gets
+a new key; stale entries are never invalidated, they age out of the LRU.
+Because the version travels with the row, every worker process sees
+changes made in any other without shared cache state.
+"""
+import threading
+from collections import OrderedDict
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+
+class LRUFragmentCache:
+    """Rendered fragments, evicting the least recently used past max_bytes"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self.entries[key] = value
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+class FragmentCacheExtension(Extension):
+    """Adds {% cache key, ... %}...{% endcache %}; a no-op while environment.fragment_cache is None"""
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_cache', [nodes.List(parts)]), [], [], body).set_lineno(lineno)
+
+    def _cache(self, parts, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        key = tuple(parts)
+        value = cache.get(key)
+        if value is None:
+            value = caller()
+            cache.set(key, value)
+        return value
@@ -0,0 +1,245 @@
+"""Geohash encoding and proximity helpers for location-bound (offline) tasks.
+
+Tasks store a geohash next to their coordinates. A "within X km" query
+covers the circle's bounding box with a handful of geohash cells and scans
+the (status, geohash) index once per cell prefix. Exact distances are then computed
+only for the rows those ranges return.
+
+Listings are paged without loading every match. nearest() searches a
+circle that starts small and grows until it holds a page's worth of tasks.
+newest_within() walks the newest open tasks a window of ids at a time,
+keeping those inside the circle, and falls back to reading the circle's
+cells when it is too sparse for that to fill a page quickly. Both only
+read (id, latitude, longitude) rows, through rows_in_cells(), whose
+UNION ALL of index ranges can stop at a LIMIT.
+"""
+import math
+
+from sqlalchemy import false, select, union_all
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+PRECISION = 9
+EARTH_RADIUS_KM = 6371.0088
+
+# Upper bound on the index range scans issued for one proximity query
+MAX_CELLS = 24
+# Half the Earth's circumference: a circle this wide covers everything
+MAX_RADIUS_KM = math.pi * EARTH_RADIUS_KM
+# First circle tried by nearest(), its largest growth per step, and the
+# most candidates it ranks per circle (more means the circle is shrunk)
+START_KM = 0.5
+MAX_GROWTH = 16
+MIN_CANDIDATES = 2000
+# Ids per step of newest_within()'s walk, and how far it walks before
+# reading the circle's cells instead
+WINDOW = 4096
+WALK_BUDGET = 32768
+
+
+def valid_point(lat, lon):
+    """True for finite coordinates inside [-90, 90] x [-180, 180]"""
+    return (lat is not None and lon is not None and math.isfinite(lat) and math.isfinite(lon)
+            and -90 <= lat <= 90 and -180 <= lon <= 180)
+
+
+def valid_radius(radius_km):
+    """True for a finite radius above zero"""
+    return radius_km is not None and math.isfinite(radius_km) and radius_km > 0
+
+
+def encode(lat, lon, precision=PRECISION):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    ch = 0
+    even = True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        ch <<= 1
+        if value >= mid:
+            ch |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[ch])
+            bits = 0
+            ch = 0
+    return ''.join(chars)
+
+
+def decode_bbox(geohash):
+    """Return (lat_min, lat_max, lon_min, lon_max) of a geohash cell"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for c in geohash:
+        value = BASE32.index(c)
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if value >> shift & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+
+def bounding_box(lat, lon, radius_km):
+    """(south, north, west, east) around the search circle; west/east may pass ±180"""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    shrink = max(math.cos(math.radians(lat)), 0.01)
+    dlon = min(dlat / shrink, 180.0)
+    return max(lat - dlat, -90.0), min(lat + dlat, 90.0), lon - dlon, lon + dlon
+
+
+def covering_cells(lat, lon, radius_km, max_cells=MAX_CELLS):
+    """Geohash prefixes covering the bounding box of the search circle
+
+    Uses the finest precision that needs at most max_cells cells, so the
+    index ranges hug the circle without turning into hundreds of scans.
+    """
+    south, north, west, east = bounding_box(lat, lon, radius_km)
+
+    for precision in range(PRECISION, 0, -1):
+        lat_min, lat_max, lon_min, lon_max = decode_bbox(encode(lat, lon, precision))
+        cell_h = lat_max - lat_min
+        cell_w = lon_max - lon_min
+        rows = int((north - south) / cell_h) + 2
+        cols = int((east - west) / cell_w) + 2
+        if rows * cols <= max_cells or precision == 1:
+            break
+
+    cells = set()
+    for i in range(rows + 1):
+        cell_lat = min(south + i * cell_h, north)
+        for j in range(cols + 1):
+            cell_lon = (min(west + j * cell_w, east) + 180) % 360 - 180
+            cells.add(encode(cell_lat, cell_lon, precision))
+    return sorted(cells)
+
+
+def prefix_filter(id_column, geohash_column, prefixes, *where):
+    """SQL condition matching rows whose geohash starts with any of the prefixes
+
+    Built as id IN (one SELECT per prefix, UNION ALL) rather than an OR of
+    ranges, because SQLite only turns each SELECT into an index range scan.
+    '~' sorts after every geohash character, so each prefix is one range.
+    """
+    if not prefixes:
+        return false()
+    ranges = [
+        select(id_column).where(*where, geohash_column >= p, geohash_column < p + '~')
+        for p in prefixes
+    ]
+    return id_column.in_(union_all(*ranges))
+
+
+def box_filter(lat_column, lon_column, box):
+    """SQL conditions for rows inside a bounding_box(); a box across ±180 only bounds latitude"""
+    south, north, west, east = box
+    conditions = [lat_column.between(south, north)]
+    if west >= -180 and east <= 180:
+        conditions.append(lon_column.between(west, east))
+    return conditions
+
+
+def rows_in_cells(query, geohash_column, prefixes, limit=None):
+    """query's rows whose geohash starts with any of the prefixes
+
+    One SELECT per prefix joined by UNION ALL. Unlike prefix_filter(), the
+    rows stream out of the index ranges, so a LIMIT stops the scan early.
+    """
+    if not prefixes:
+        return query.where(false())
+    union = union_all(*[
+        query.where(geohash_column >= p, geohash_column < p + '~') for p in prefixes
+    ])
+    return union.limit(limit) if limit is not None else union
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Great-circle (haversine) distance"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def nearest(rows_in, lat, lon, count, radius_km=None):
+    """Up to count (distance, id) pairs nearest to (lat, lon), nearest first
+
+    rows_in(cells, box, limit) returns up to limit (id, latitude, longitude)
+    rows in those geohash cells and inside the bounding box. Only rows
+    inside the current circle are ranked: the cells cover every task closer
+    than the radius, so those come out in exact order. The circle grows, by
+    how dense the last one was, until it holds count tasks or reaches
+    radius_km. A circle with more candidates than the cap is halved back
+    towards the last smaller one, so reaching a dense area from far away
+    does not read all of it.
+    """
+    limit = min(radius_km or MAX_RADIUS_KM, MAX_RADIUS_KM)
+    cap = max(4 * count, MIN_CANDIDATES)
+    # The search radius stays between the largest circle with too few tasks
+    # and the smallest one with too many candidates
+    smaller, larger = 0.0, None
+    radius = min(START_KM, limit)
+    while True:
+        cells, box = covering_cells(lat, lon, radius), bounding_box(lat, lon, radius)
+        rows = rows_in(cells, box, cap + 1 if cap else None)
+        if cap and len(rows) > cap:
+            if radius - smaller > 0.05 * radius:
+                larger = radius
+                radius = (smaller + radius) / 2
+                continue
+            # The candidates are mostly outside the circle; rank them all from here on
+            cap = larger = None
+            rows = rows_in(cells, box, None)
+        found = []
+        for task_id, task_lat, task_lon in rows:
+            distance = distance_km(lat, lon, task_lat, task_lon)
+            if distance <= radius:
+                found.append((distance, task_id))
+        if len(found) >= count or radius >= limit:
+            found.sort()
+            return found[:count]
+        smaller = radius
+        growth = 1.2 * math.sqrt(count / len(found)) if found else MAX_GROWTH
+        radius = min(radius * min(max(growth, 1.5), MAX_GROWTH), limit)
+        if larger is not None:
+            radius = min(radius, (smaller + larger) / 2)
+
+
+def newest_within(rows_in, rows_between, lat, lon, radius_km, count, top_id):
+    """Ids of up to count tasks within radius_km of (lat, lon), newest first
+
+    rows_in(cells, box, limit) is as for nearest(). rows_between(box, low_id, high_id) returns the (id, latitude, longitude)
+    rows inside the bounding box with low_id < id <= high_id, highest id
+    first; top_id is the highest task id. Walking those windows down from
+    top_id fills a page after a few steps when the circle holds many tasks.
+    If WALK_BUDGET ids go by first, the circle is sparse, so its cells are
+    read whole through rows_in(cells) instead.
+    """
+    box = bounding_box(lat, lon, radius_km)
+    ids = []
+    high = top_id or 0
+    while high > 0 and (top_id - high) < WALK_BUDGET:
+        low = max(high - WINDOW, 0)
+        ids.extend(task_id for task_id, task_lat, task_lon in rows_between(box, low, high)
+                   if distance_km(lat, lon, task_lat, task_lon) <= radius_km)
+        if len(ids) >= count:
+            return ids[:count]
+        high = low
+    if high <= 0:
+        return ids
+    inside = [task_id for task_id, task_lat, task_lon in rows_in(covering_cells(lat, lon, radius_km), box, None)
+              if distance_km(lat, lon, task_lat, task_lon) <= radius_km]
+    inside.sort(reverse=True)
+    return inside[:count]
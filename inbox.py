@@ -0,0 +1,55 @@
+"""Message queries shared by the Flask views and the async endpoints in asgi.py.
+
+They are plain SELECT/UPDATE statements, so they run unchanged on the
+request's Flask-SQLAlchemy session or on an async connection.
+"""
+from sqlalchemy import func, select, update
+
+from models import Message
+
+
+def unread_counts(user_id):
+    """(sender_id, unread count) for every sender with unread messages to user_id"""
+    return (
+        select(Message.sender_id, func.count())
+        .where(Message.receiver_id == user_id, Message.is_read.is_(False))
+        .group_by(Message.sender_id)
+    )
+
+
+def messages_after(user_id, partner_id, after_id):
+    """Messages between the two users with an id above after_id, oldest first"""
+    return (
+        select(Message.id, Message.sender_id, Message.content, Message.created_at)
+        .where(
+            ((Message.sender_id == user_id) & (Message.receiver_id == partner_id)) |
+            ((Message.sender_id == partner_id) & (Message.receiver_id == user_id)),
+            Message.id > after_id,
+        )
+        .order_by(Message.id)
+    )
+
+
+def mark_read(user_id, partner_id, up_to_id):
+    """Mark partner_id's messages to user_id read, up to and including up_to_id"""
+    return (
+        update(Message)
+        .where(Message.sender_id == partner_id, Message.receiver_id == user_id,
+               Message.is_read.is_(False), Message.id <= up_to_id)
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def unread_json(rows):
+    by_partner = {str(sender_id): count for sender_id, count in rows}
+    return {'total': sum(by_partner.values()), 'by_partner': by_partner}
+
+
+def message_json(row):
+    return {
+        'id': row.id,
+        'sender_id': row.sender_id,
+        'content': row.content,
+        'created_at': row.created_at.strftime('%b %d, %Y %I:%M %p') if row.created_at else 'Recently',
+    }
@@ -0,0 +1,264 @@
+"""In-process background job queue backed by the job table.
+
+Request handlers call enqueue() before their own commit, so a job is
+persisted in the same transaction as the change that caused it. Worker
+threads look for due jobs with a SELECT and claim them with a single
+UPDATE ... RETURNING, group them by kind and hand each batch to the
+registered handler. Failed batches are retried with
+exponential backoff until JOB_MAX_ATTEMPTS is reached.
+
+Periodic jobs reschedule themselves from their handler. Modules register
+them with schedule_periodic(), and the runner makes sure one of each is
+queued when it starts and every JOB_PERIODIC_CHECK seconds after that.
+The check runs on worker threads, never inside a user request.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import exists, insert, literal, select, update
+
+from models import db, Job
+
+log = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def handler(kind, batch_size=50):
+    """Register fn(payloads) as the handler for jobs of this kind"""
+    def decorator(fn):
+        _handlers[kind] = (fn, batch_size)
+        return fn
+    return decorator
+
+
+def enqueue(kind, delay=0, **payload):
+    """Add a job to the current session; it is saved by the caller's commit"""
+    job = Job(kind=kind, payload=json.dumps(payload),
+              run_at=datetime.utcnow() + timedelta(seconds=delay))
+    db.session.add(job)
+    return job
+
+
+def ensure_pending(kind, delay=0):
+    """Enqueue and commit a job of this kind unless one is already queued or running
+
+    Used to keep self-rescheduling periodic jobs alive. The usual case is a
+    plain SELECT that takes no write lock. The insert is a single
+    INSERT ... SELECT ... WHERE NOT EXISTS, so concurrent callers cannot
+    both add a job. Returns True if one was added.
+    """
+    live = select(Job.id).where(Job.kind == kind, Job.status.in_(('pending', 'running')))
+    if db.session.execute(live.limit(1)).first() is not None:
+        return False
+    now = datetime.utcnow()
+    row = select(
+        literal(kind), literal('{}'), literal('pending'), literal(0),
+        literal(now + timedelta(seconds=delay)), literal(now),
+    ).where(~exists(live))
+    result = db.session.execute(
+        insert(Job).from_select(['kind', 'payload', 'status', 'attempts', 'run_at', 'created_at'], row)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def schedule_periodic(app, kind, interval_key, delay=None):
+    """Keep one job of this self-rescheduling kind queued while app.config[interval_key] is set
+
+    The first run is due delay seconds after it is queued (default: the
+    interval). A chain whose job ended up failed is restarted by the next
+    check.
+    """
+    app.extensions.setdefault('periodic_jobs', {})[kind] = (interval_key, delay)
+
+
+def ensure_periodic(app):
+    """Queue the registered periodic jobs that have nothing pending or running"""
+    for kind, (interval_key, delay) in app.extensions.get('periodic_jobs', {}).items():
+        interval = app.config[interval_key]
+        if interval:
+            ensure_pending(kind, delay=interval if delay is None else delay)
+
+
+def claim_jobs(limit, stale_after):
+    """Atomically mark up to limit due jobs as running and return them
+
+    An idle queue costs one indexed SELECT per poll; the UPDATE, and the
+    write lock it takes, only happens when some jobs are due. The UPDATE
+    repeats the due condition, so a job another runner claimed between the
+    two statements is skipped.
+    """
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    is_due = (
+        ((Job.status == 'pending') & (Job.run_at <= now)) |
+        ((Job.status == 'running') & (Job.claimed_at < now - timedelta(seconds=stale_after)))
+    )
+    ids = db.session.execute(
+        select(Job.id).where(is_due).order_by(Job.run_at, Job.id).limit(limit)
+    ).scalars().all()
+    if not ids:
+        db.session.commit()
+        return []
+    jobs = db.session.scalars(
+        update(Job)
+        .where(Job.id.in_(ids), is_due)
+        .values(status='running', claimed_by=token, claimed_at=now, attempts=Job.attempts + 1)
+        .returning(Job)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    ).all()
+    db.session.commit()
+    return sorted(jobs, key=lambda job: job.id)
+
+
+def _finish(jobs, error=None, max_attempts=5, backoff=2.0):
+    ids = [job.id for job in jobs]
+    if error is None:
+        values = {'status': 'done', 'last_error': None}
+        db.session.execute(update(Job).where(Job.id.in_(ids)).values(**values)
+                           .execution_options(synchronize_session=False))
+    else:
+        now = datetime.utcnow()
+        for job in jobs:
+            if job.attempts >= max_attempts:
+                job.status = 'failed'
+            else:
+                job.status = 'pending'
+                job.run_at = now + timedelta(seconds=backoff * 2 ** (job.attempts - 1))
+            job.last_error = error
+    db.session.commit()
+
+
+def run_pending(app, limit=None):
+    """Claim and run one round of due jobs. Returns the number of jobs processed."""
+    config = app.config
+    jobs = claim_jobs(limit or config['JOB_CLAIM_LIMIT'], config['JOB_STALE_AFTER'])
+    batches = {}
+    for job in jobs:
+        batches.setdefault(job.kind, []).append(job)
+
+    for kind, kind_jobs in batches.items():
+        if kind not in _handlers:
+            _finish(kind_jobs, f'No handler registered for {kind!r}', max_attempts=0)
+            continue
+        fn, batch_size = _handlers[kind]
+        for start in range(0, len(kind_jobs), batch_size):
+            batch = kind_jobs[start:start + batch_size]
+            try:
+                fn([json.loads(job.payload) for job in batch])
+            except Exception as exc:
+                db.session.rollback()
+                log.exception('Job batch %s failed', kind)
+                _finish(batch, repr(exc), config['JOB_MAX_ATTEMPTS'], config['JOB_BACKOFF'])
+            else:
+                _finish(batch)
+    return len(jobs)
+
+
+class JobRunner:
+    """A small pool of daemon threads polling the job table"""
+
+    def __init__(self, app):
+        self.app = app
+        self.pid = None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.next_check = 0
+
+    def start(self):
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.stop_event.clear()
+            self.next_check = 0
+            self.threads = [
+                threading.Thread(target=self._loop, name=f'job-worker-{i}', daemon=True)
+                for i in range(self.app.config['JOB_WORKERS'])
+            ]
+            for thread in self.threads:
+                thread.start()
+
+    def stop(self, timeout=5):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def _check_periodic(self):
+        now = time.monotonic()
+        with self.lock:
+            if now < self.next_check:
+                return
+            self.next_check = now + self.app.config['JOB_PERIODIC_CHECK']
+        ensure_periodic(self.app)
+
+    def _loop(self):
+        poll = self.app.config['JOB_POLL_INTERVAL']
+        while not self.stop_event.is_set():
+            processed = 0
+            with self.app.app_context():
+                try:
+                    self._check_periodic()
+                    processed = run_pending(self.app)
+                except Exception:
+                    db.session.rollback()
+                    log.exception('Job worker round failed')
+            if not processed:
+                self.stop_event.wait(poll)
+
+
+@click.command('run-jobs')
+@click.option('--once', is_flag=True, help='Process the currently due jobs and exit.')
+@with_appcontext
+def run_jobs_command(once):
+    """Run background jobs in this process instead of inside the web workers"""
+    app = current_app._get_current_object()
+    if once:
+        ensure_periodic(app)
+        total = 0
+        while True:
+            processed = run_pending(app)
+            if not processed:
+                break
+            total += processed
+        print(f"Processed {total} jobs.")
+        return
+    runner = JobRunner(app)
+    runner.start()
+    try:
+        for thread in runner.threads:
+            thread.join()
+    except KeyboardInterrupt:
+        runner.stop()
+
+
+def init_app(app):
+    app.config.setdefault('JOB_WORKERS', 2)
+    app.config.setdefault('JOB_POLL_INTERVAL', 1.0)
+    app.config.setdefault('JOB_CLAIM_LIMIT', 200)
+    app.config.setdefault('JOB_MAX_ATTEMPTS', 5)
+    app.config.setdefault('JOB_BACKOFF', 2.0)
+    app.config.setdefault('JOB_STALE_AFTER', 300)
+    # Seconds between checks that every periodic job is still queued
+    app.config.setdefault('JOB_PERIODIC_CHECK', 60)
+    app.cli.add_command(run_jobs_command)
+
+    runner = JobRunner(app)
+    app.extensions['job_runner'] = runner
+
+    @app.before_request
+    def start_job_runner():
+        # Started lazily in each serving process, so threads are not lost when
+        # gunicorn forks workers from a preloaded app.
+        if app.config['JOB_WORKERS'] and runner.pid != os.getpid():
+            runner.start()
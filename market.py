@@ -0,0 +1,144 @@
+"""Market price statistics for budget suggestions.
+
+Each accepted bid is folded into a PriceStat row for its task's
+(category, difficulty), plus one for the category as a whole. Amounts are
+kept as a histogram of log-spaced buckets, 5% wide. Quartiles come out of
+that histogram to within about 2.5%, and updating it never needs the old
+bids. Suggestions only read a PriceStat row.
+"""
+import math
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, select, union_all
+
+from models import db, Task, Bid, ArchivedTask, ArchivedBid, PriceStat
+
+ANY = ''
+BUCKET_RATIO = 1.05
+
+# Bid counts above this are grouped into one bucket
+MAX_BID_COUNT = 10
+
+# A difficulty-specific row needs this many samples before it is suggested
+MIN_SAMPLES = 5
+
+
+def amount_bucket(amount):
+    return round(math.log(amount) / math.log(BUCKET_RATIO))
+
+
+def bucket_amount(bucket):
+    return round(BUCKET_RATIO ** bucket, 1)
+
+
+def _quantile(histogram, total, q):
+    seen = 0
+    for bucket in sorted(histogram, key=int):
+        seen += histogram[bucket]
+        if seen >= q * total:
+            return bucket_amount(int(bucket))
+    return None
+
+
+def _add_sample(stat, amount, bid_count):
+    amounts = dict(stat.amount_histogram or {})
+    key = str(amount_bucket(amount))
+    amounts[key] = amounts.get(key, 0) + 1
+    bid_counts = dict(stat.bid_count_histogram or {})
+    key = str(min(bid_count, MAX_BID_COUNT))
+    bid_counts[key] = bid_counts.get(key, 0) + 1
+
+    stat.amount_histogram = amounts
+    stat.bid_count_histogram = bid_counts
+    stat.sample_count = (stat.sample_count or 0) + 1
+    stat.amount_sum = (stat.amount_sum or 0.0) + amount
+    stat.p25 = _quantile(amounts, stat.sample_count, 0.25)
+    stat.median = _quantile(amounts, stat.sample_count, 0.5)
+    stat.p75 = _quantile(amounts, stat.sample_count, 0.75)
+    stat.updated_at = datetime.utcnow()
+
+
+def _keys(category, difficulty):
+    keys = [(category, ANY)]
+    if difficulty:
+        keys.append((category, difficulty))
+    return keys
+
+
+def record_acceptance(category, difficulty, amount, bid_count):
+    """Fold one accepted bid into the statistics, in the caller's transaction
+
+    Call it after the transaction has written something (accept_bid's
+    compare-and-set): SQLite then already holds the write lock, so two
+    acceptances cannot both read the same row and lose an update.
+    """
+    if not category or not amount or amount <= 0:
+        return
+    for key in _keys(category, difficulty):
+        stat = PriceStat.query.with_for_update().get(key) or PriceStat(category=key[0], difficulty=key[1])
+        _add_sample(stat, amount, bid_count)
+        db.session.add(stat)
+
+
+def suggest(category, difficulty=None):
+    """Suggested budget range for a new task, or None without enough history"""
+    stat = None
+    if difficulty:
+        stat = PriceStat.query.get((category, difficulty))
+        if stat is not None and stat.sample_count < MIN_SAMPLES:
+            stat = None
+    if stat is None:
+        stat = PriceStat.query.get((category, ANY))
+    if stat is None or not stat.sample_count:
+        return None
+    return {
+        'category': stat.category,
+        'difficulty': stat.difficulty or None,
+        'samples': stat.sample_count,
+        'low': stat.p25,
+        'median': stat.median,
+        'high': stat.p75,
+        'average': round(stat.amount_sum / stat.sample_count, 1),
+        'bid_counts': {int(k): v for k, v in stat.bid_count_histogram.items()},
+    }
+
+
+def recompute():
+    """Rebuild every PriceStat row from the accepted bids, archived ones included"""
+    samples = []
+    for task_model, bid_model in ((Task, Bid), (ArchivedTask, ArchivedBid)):
+        bid_counts = (
+            select(bid_model.task_id, func.count().label('bid_count'))
+            .group_by(bid_model.task_id)
+            .subquery()
+        )
+        samples.append(
+            select(task_model.category, task_model.difficulty, bid_model.amount, bid_counts.c.bid_count)
+            .join(task_model, task_model.id == bid_model.task_id)
+            .join(bid_counts, bid_counts.c.task_id == bid_model.task_id)
+            .where(bid_model.status == 'accepted')
+        )
+
+    stats = {}
+    for category, difficulty, amount, bid_count in db.session.execute(union_all(*samples)):
+        if not category or not amount or amount <= 0:
+            continue
+        for key in _keys(category, difficulty):
+            if key not in stats:
+                stats[key] = PriceStat(category=key[0], difficulty=key[1])
+            _add_sample(stats[key], amount, bid_count)
+
+    PriceStat.query.delete()
+    db.session.add_all(stats.values())
+    db.session.commit()
+    return len(stats)
+
+
+@click.command('recompute-market-stats')
+@with_appcontext
+def recompute_command():
+    """Rebuild the budget suggestion statistics from all accepted bids"""
+    count = recompute()
+    print(f"Recomputed price statistics for {count} category/difficulty pairs.")
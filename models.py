@@ -0,0 +1,394 @@
+from datetime import datetime
+import sqlite3
+
+from flask import current_app, has_app_context
+from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, select, func, inspect as sa_inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import validates
+
+import geo
+
+
+class RoutingSession(Session):
+    """Session that lets the app's replica router (replicas.py) choose the engine"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            router = current_app.extensions.get('replicas')
+            if router is not None:
+                engine = router.engine_for(self, clause)
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+# Streamed pages are rendered after the request's session has been torn down,
+# so loaded objects must stay readable once detached.
+db = SQLAlchemy(session_options={'expire_on_commit': False, 'class_': RoutingSession})
+
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers proceed while a write transaction holds the lock"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA busy_timeout=5000')
+        cursor.close()
+
+
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password_hash = db.Column(db.String(200), nullable=False)
+    role = db.Column(db.String(20), nullable=False)
+    skills = db.Column(db.String(200))
+    bio = db.Column(db.Text)
+    avatar = db.Column(db.String(200))
+    location = db.Column(db.String(100))
+    # Optional coordinates, used as "me" for proximity search
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped whenever something shown in cached fragments changes (see fragments.py)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    tasks_posted = db.relationship('Task', backref='employer', foreign_keys='Task.employer_id')
+    tasks_taken  = db.relationship('Task', backref='worker', foreign_keys='Task.worker_id')
+    bids = db.relationship('Bid', backref='worker', lazy=True)
+    reviews_received = db.relationship('Review', backref='reviewee', foreign_keys='Review.reviewee_id')
+    reviews_given = db.relationship('Review', backref='reviewer', foreign_keys='Review.reviewer_id')
+    sent_messages = db.relationship('Message', backref='sender', foreign_keys='Message.sender_id')
+    received_messages = db.relationship('Message', backref='receiver', foreign_keys='Message.receiver_id')
+
+    def average_rating(self):
+        """Calculate average rating for workers"""
+        if self.role != 'worker' or not self.reviews_received:
+            return 0.0
+        ratings = [r.rating for r in self.reviews_received if r.rating]
+        return sum(ratings) / len(ratings) if ratings else 0.0
+
+    def total_reviews(self):
+        """Get total number of reviews"""
+        return len(self.reviews_received) if self.reviews_received else 0
+
+
+# Listings show at most this many characters of a task description.
+EXCERPT_LENGTH = 150
+
+
+class Task(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.deferred(db.Column(db.Text, nullable=False))
+    # One character longer than shown, so templates can tell when to add "..."
+    excerpt = db.Column(db.String(EXCERPT_LENGTH + 1))
+    budget_azn = db.Column(db.Float, nullable=False)
+    category = db.Column(db.String(120))
+    mode = db.Column(db.String(20))
+    status = db.Column(db.String(20), default='open')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+    # Optional; open tasks past it are closed as 'expired' by expiry.py
+    expires_at = db.Column(db.DateTime)
+    # Bumped with every change that cached task cards show (see fragments.py)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    required_skill = db.Column(db.String(120))
+    difficulty = db.Column(db.String(20))
+
+    # Offline tasks may have a location; geohash is derived from it on save.
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.String(geo.PRECISION))
+
+    employer_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    worker_id   = db.Column(db.Integer, db.ForeignKey('user.id'))
+    accepted_bid_id = db.Column(db.Integer, db.ForeignKey('bid.id'), nullable=True)
+
+    bids = db.relationship('Bid', primaryjoin='Task.id == Bid.task_id', backref='task', lazy=True, cascade='all, delete-orphan')
+    accepted_bid = db.relationship('Bid', foreign_keys=[accepted_bid_id], uselist=False, post_update=True)
+    reviews = db.relationship('Review', backref='task', lazy=True)
+
+    __table_args__ = (
+        db.Index('ix_task_status_geohash', 'status', 'geohash'),
+        db.Index('ix_task_status_expires', 'status', 'expires_at'),
+        # Newest-first job list pages without sorting every open task
+        db.Index('ix_task_status_id', 'status', 'id'),
+        db.Index('ix_task_worker', 'worker_id'),
+        db.Index('ix_task_employer', 'employer_id'),
+    )
+
+    @validates('description')
+    def update_excerpt(self, key, value):
+        self.excerpt = (value or '')[:EXCERPT_LENGTH + 1]
+        return value
+
+
+@event.listens_for(Task, 'before_insert')
+@event.listens_for(Task, 'before_update')
+def update_geohash(mapper, connection, task):
+    if task.latitude is not None and task.longitude is not None:
+        task.geohash = geo.encode(task.latitude, task.longitude)
+    else:
+        task.geohash = None
+
+
+def open_now(now=None):
+    """SQL condition for tasks that have not passed their deadline (see expiry.py)"""
+    now = now or datetime.utcnow()
+    return Task.expires_at.is_(None) | (Task.expires_at > now)
+
+
+class Bid(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False)
+    worker_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+    proposal = db.deferred(db.Column(db.Text))
+    status = db.Column(db.String(20), default='pending')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('uq_bid_task_worker', 'task_id', 'worker_id', unique=True),
+    )
+
+
+Task.bid_count = db.column_property(
+    select(func.count(Bid.id)).where(Bid.task_id == Task.id).correlate_except(Bid).scalar_subquery(),
+    deferred=True
+)
+
+# Columns needed to render a task card; everything else stays in SQLite.
+TASK_CARD_COLUMNS = (Task.id, Task.title, Task.excerpt, Task.budget_azn, Task.category, Task.mode,
+                     Task.difficulty, Task.status, Task.employer_id, Task.created_at,
+                     Task.latitude, Task.longitude, Task.version)
+
+
+class Review(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False)
+    reviewer_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    reviewee_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    rating = db.Column(db.Integer, nullable=False)
+    comment = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class Reputation(db.Model):
+    """Precomputed review and job aggregates for a user, maintained by reputation.py"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    stars_1 = db.Column(db.Integer, nullable=False, default=0)
+    stars_2 = db.Column(db.Integer, nullable=False, default=0)
+    stars_3 = db.Column(db.Integer, nullable=False, default=0)
+    stars_4 = db.Column(db.Integer, nullable=False, default=0)
+    stars_5 = db.Column(db.Integer, nullable=False, default=0)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @property
+    def average(self):
+        return self.rating_sum / self.review_count if self.review_count else 0.0
+
+    def histogram(self):
+        """[(stars, count)] from 5 stars down to 1"""
+        return [(stars, getattr(self, f'stars_{stars}')) for stars in range(5, 0, -1)]
+
+
+class PriceStat(db.Model):
+    """Accepted-bid price statistics per (category, difficulty), maintained by market.py
+
+    difficulty is '' for the row that covers every difficulty of a category.
+    The histograms map a bucket to a count; see market.py for the bucketing.
+    """
+    category = db.Column(db.String(120), primary_key=True)
+    difficulty = db.Column(db.String(20), primary_key=True)
+    sample_count = db.Column(db.Integer, nullable=False, default=0)
+    amount_sum = db.Column(db.Float, nullable=False, default=0.0)
+    p25 = db.Column(db.Float)
+    median = db.Column(db.Float)
+    p75 = db.Column(db.Float)
+    amount_histogram = db.Column(db.JSON, nullable=False, default=dict)
+    bid_count_histogram = db.Column(db.JSON, nullable=False, default=dict)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class Message(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    receiver_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=True)
+    content = db.Column(db.Text, nullable=False)
+    is_read = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+def _archive_table(table, *indexes):
+    """A copy of table's columns without foreign keys, for rows moved out by archive.py"""
+    columns = [db.Column(c.name, c.type, primary_key=c.primary_key) for c in table.columns]
+    return db.Table(f'{table.name}_archive', db.metadata, *columns, *indexes)
+
+
+class ArchivedTask(db.Model):
+    """Completed tasks moved out of the task table; read-only"""
+    __table__ = _archive_table(
+        Task.__table__,
+        db.Index('ix_task_archive_employer', 'employer_id'),
+        db.Index('ix_task_archive_worker', 'worker_id'),
+    )
+
+    employer = db.relationship('User', primaryjoin='foreign(ArchivedTask.employer_id) == User.id', viewonly=True)
+    worker = db.relationship('User', primaryjoin='foreign(ArchivedTask.worker_id) == User.id', viewonly=True)
+    reviews = db.relationship('Review', primaryjoin='ArchivedTask.id == foreign(Review.task_id)', viewonly=True)
+
+
+class ArchivedBid(db.Model):
+    __table__ = _archive_table(Bid.__table__, db.Index('ix_bid_archive_task', 'task_id'))
+
+    worker = db.relationship('User', primaryjoin='foreign(ArchivedBid.worker_id) == User.id', viewonly=True)
+
+
+class ArchivedMessage(db.Model):
+    __table__ = _archive_table(
+        Message.__table__,
+        db.Index('ix_message_archive_pair', 'sender_id', 'receiver_id', 'created_at'),
+        db.Index('ix_message_archive_receiver', 'receiver_id'),
+    )
+
+    sender = db.relationship('User', primaryjoin='foreign(ArchivedMessage.sender_id) == User.id', viewonly=True)
+
+
+class SavedSearch(db.Model):
+    """A worker's saved listing filters; None means "any\""""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    keyword = db.Column(db.String(200))
+    category = db.Column(db.String(120))
+    mode = db.Column(db.String(20))
+    difficulty = db.Column(db.String(20))
+    min_budget = db.Column(db.Float)
+    max_budget = db.Column(db.Float)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    user = db.relationship('User', backref=db.backref('saved_searches', lazy=True))
+
+
+class SearchMatch(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    saved_search_id = db.Column(db.Integer, db.ForeignKey('saved_search.id', ondelete='CASCADE'), nullable=False)
+    task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False)
+    is_seen = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    task = db.relationship('Task')
+
+    __table_args__ = (
+        db.Index('ix_search_match_user', 'user_id', 'is_seen', 'created_at'),
+        db.Index('uq_search_match_user_task', 'user_id', 'task_id', unique=True),
+    )
+
+
+class Job(db.Model):
+    """A deferred side effect, run by the background workers in jobs.py"""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_by = db.Column(db.String(64))
+    claimed_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+    )
+
+
+class TaskChange(db.Model):
+    """Change feed: a task whose listing fields changed (see task_snapshot.py)
+
+    AUTOINCREMENT keeps ids from being reused after pruning, so max(id)
+    doubles as a version counter for the open-task snapshot.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = {'sqlite_autoincrement': True}
+
+
+class SavedSearchChange(db.Model):
+    """Change feed: a saved search that was created or deleted (see saved_searches.py)
+
+    AUTOINCREMENT keeps ids from being reused after pruning, so max(id)
+    doubles as a version counter for each process's search index.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    search_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = {'sqlite_autoincrement': True}
+
+
+class Notification(db.Model):
+    """Outbox event for one user, saved in the action's transaction (see notifications.py)"""
+    id = db.Column(db.Integer, primary_key=True)
+    recipient_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    actor_id = db.Column(db.Integer)
+    task_id = db.Column(db.Integer)
+    # Names and amounts as they were at the time, so digests need no joins
+    payload = db.Column(db.Text, nullable=False, default='{}')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Set when the event is folded into a digest
+    digest_id = db.Column(db.Integer, db.ForeignKey('digest.id'))
+
+    __table_args__ = (
+        db.Index('ix_notification_digest_id', 'digest_id', 'id'),
+    )
+
+
+class Digest(db.Model):
+    """A batch of one user's notifications, delivered as a single email or webhook call"""
+    id = db.Column(db.Integer, primary_key=True)
+    recipient_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    event_count = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Last time a deliver_digests job was queued for it
+    queued_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    recipient = db.relationship('User')
+    events = db.relationship('Notification', order_by='Notification.id', lazy=True)
+
+
+def upgrade_db():
+    """Create missing tables, columns and indexes without touching existing data"""
+    db.create_all()
+    inspector = sa_inspect(db.engine)
+    with db.engine.begin() as conn:
+        for table in db.metadata.tables.values():
+            existing = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+        conn.execute(text(
+            f'UPDATE task SET excerpt = substr(description, 1, {EXCERPT_LENGTH + 1}) WHERE excerpt IS NULL'
+        ))
+        for table in ('task', 'task_archive', 'user'):
+            conn.execute(text(f'UPDATE "{table}" SET version = 0 WHERE version IS NULL'))
+
@@ -0,0 +1,383 @@
+"""Notification outbox and batched digests for bids, acceptances, completions and messages.
+
+record() adds a Notification row in the caller's transaction, so an event
+exists exactly when the action it describes was committed. Every
+NOTIFY_INTERVAL seconds the build_digests job folds the undelivered
+events into one Digest per recipient. In the same transaction it
+enqueues deliver_digests jobs for them.
+
+Delivery goes through a pluggable sink: SMTP, a webhook, or the log. A
+digest is marked sent only after its sink call returns. An error or a
+crash leaves it pending, and the job queue retries it with backoff. A
+digest still pending NOTIFY_REDELIVER_AFTER seconds after it was last
+queued, for example because its job ran out of attempts, is queued again
+by the next build_digests run. Delivery is therefore at least once. Receivers can drop duplicates by digest id:
+it is sent as the email's Message-ID and as the webhook's
+Idempotency-Key.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import smtplib
+import time
+import urllib.request
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from urllib.parse import urlsplit
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import joinedload, selectinload
+
+import jobs
+from models import db, Digest, Notification
+
+log = logging.getLogger(__name__)
+
+# Digests handed to one deliver_digests job
+DELIVERY_BATCH = 50
+
+# Events of a kind that share this key are summarised on one line
+_GROUP_BY = {
+    'bid': ('task_id',),
+    'accepted': ('task_id',),
+    'completed': ('task_id',),
+    'message': ('actor_id',),
+}
+
+
+def record(recipient_id, kind, actor_id=None, task_id=None, **payload):
+    """Queue a notification in the caller's transaction; payload is shown in the digest"""
+    if recipient_id is None or recipient_id == actor_id:
+        return
+    db.session.add(Notification(recipient_id=recipient_id, kind=kind, actor_id=actor_id, task_id=task_id,
+                                payload=json.dumps(payload)))
+
+
+def _line(kind, events):
+    first = events[0]
+    count = len(events)
+    if kind == 'bid':
+        if count == 1:
+            return f"{first['actor']} bid {first['amount']:g} AZN on “{first['task']}”"
+        return f"{count} new bids on “{first['task']}”"
+    if kind == 'accepted':
+        return f"Your bid on “{first['task']}” was accepted"
+    if kind == 'completed':
+        return f"“{first['task']}” was marked completed"
+    if count == 1:
+        return f"{first['actor']} sent you a message: {first['excerpt']}"
+    return f"{first['actor']} sent you {count} messages"
+
+
+class _Links:
+    """External URLs for digests, built without a request context"""
+
+    def __init__(self, app):
+        base = urlsplit(app.config['NOTIFY_BASE_URL'])
+        self.adapter = app.url_map.bind(base.netloc, script_name=base.path or '/', url_scheme=base.scheme)
+
+    def __call__(self, kind, event):
+        if kind == 'message':
+            return self.adapter.build('conversation', {'partner_id': event['actor_id']}, force_external=True)
+        return self.adapter.build('task_detail', {'task_id': event['task_id']}, force_external=True)
+
+
+def render(digest, links):
+    """The digest as a JSON-ready dict, with a plain-text summary"""
+    events = []
+    for event in digest.events:
+        events.append(dict(
+            json.loads(event.payload), kind=event.kind, actor_id=event.actor_id, task_id=event.task_id,
+            created_at=event.created_at.isoformat() if event.created_at else None,
+        ))
+    groups = {}
+    for event in events:
+        key = (event['kind'],) + tuple(event[field] for field in _GROUP_BY[event['kind']])
+        groups.setdefault(key, []).append(event)
+
+    user = digest.recipient
+    lines = [f"- {_line(key[0], group)}\n  {links(key[0], group[0])}" for key, group in groups.items()]
+    plural = 's' if len(events) != 1 else ''
+    text = (f"Hi {user.name},\n\nHere is what happened on Micro Job:\n\n" + '\n'.join(lines) +
+            "\n\nYou get at most one of these digests every "
+            f"{max(1, current_app.config['NOTIFY_INTERVAL'] // 60)} minutes.\n")
+    return {
+        'id': digest.id,
+        'recipient': {'id': user.id, 'name': user.name, 'email': user.email},
+        'subject': f"{len(events)} update{plural} on Micro Job",
+        'text': text,
+        'events': events,
+    }
+
+
+class LogSink:
+    """Writes digests to the log; the default, for development"""
+
+    def __init__(self, config):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def send(self, digest):
+        log.info('Digest %d for %s: %s\n%s', digest['id'], digest['recipient']['email'],
+                 digest['subject'], digest['text'])
+
+
+class SMTPSink(LogSink):
+    """Emails each digest, over one SMTP connection per delivery batch
+
+    For local testing, run a debugging server that prints what it receives
+    and point NOTIFY_SMTP_PORT at it:
+
+        python -m aiosmtpd -n -l localhost:8025
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.smtp = None
+
+    def __enter__(self):
+        config = self.config
+        self.smtp = smtplib.SMTP(config['NOTIFY_SMTP_HOST'], config['NOTIFY_SMTP_PORT'],
+                                 timeout=config['NOTIFY_TIMEOUT'])
+        if config['NOTIFY_SMTP_STARTTLS']:
+            self.smtp.starttls()
+        if config['NOTIFY_SMTP_USERNAME']:
+            self.smtp.login(config['NOTIFY_SMTP_USERNAME'], config['NOTIFY_SMTP_PASSWORD'])
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            self.smtp.quit()
+        except smtplib.SMTPException:
+            pass
+
+    def send(self, digest):
+        message = EmailMessage()
+        message['From'] = self.config['NOTIFY_FROM']
+        message['To'] = digest['recipient']['email']
+        message['Subject'] = digest['subject']
+        message['Message-ID'] = f"<digest-{digest['id']}@{urlsplit(self.config['NOTIFY_BASE_URL']).hostname}>"
+        message.set_content(digest['text'])
+        self.smtp.send_message(message)
+
+
+class WebhookSink(LogSink):
+    """POSTs each digest as JSON, signed with NOTIFY_WEBHOOK_SECRET when one is set"""
+
+    def __init__(self, config):
+        self.config = config
+
+    def send(self, digest):
+        body = json.dumps(digest).encode('utf-8')
+        headers = {'Content-Type': 'application/json', 'Idempotency-Key': f"digest-{digest['id']}"}
+        secret = self.config['NOTIFY_WEBHOOK_SECRET']
+        if secret:
+            signature = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+            headers['X-Signature'] = f'sha256={signature}'
+        request = urllib.request.Request(self.config['NOTIFY_WEBHOOK_URL'], data=body, headers=headers, method='POST')
+        # Anything but a 2xx raises, and the digest is retried
+        with urllib.request.urlopen(request, timeout=self.config['NOTIFY_TIMEOUT']):
+            pass
+
+
+SINKS = {'log': LogSink, 'smtp': SMTPSink, 'webhook': WebhookSink}
+
+
+def make_sink(config):
+    """NOTIFY_SINK is the name of a built-in sink, or a class taking config with the same interface"""
+    sink = config['NOTIFY_SINK']
+    return SINKS[sink](config) if isinstance(sink, str) else sink(config)
+
+
+def requeue_stale_digests(after):
+    """Queue delivery again for digests still pending `after` seconds after they were last queued
+
+    Returns the number of digests queued.
+    """
+    now = datetime.utcnow()
+    stale = db.session.execute(
+        select(Digest.id)
+        .where(Digest.status == 'pending', Digest.queued_at < now - timedelta(seconds=after))
+        .order_by(Digest.id)
+    ).scalars().all()
+    if not stale:
+        db.session.rollback()
+        return 0
+    for start in range(0, len(stale), DELIVERY_BATCH):
+        batch = stale[start:start + DELIVERY_BATCH]
+        db.session.execute(
+            update(Digest).where(Digest.id.in_(batch)).values(queued_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        jobs.enqueue('deliver_digests', digest_ids=batch)
+    db.session.commit()
+    log.warning('Queued %d undelivered digests again', len(stale))
+    return len(stale)
+
+
+def build_digests(batch_size=500):
+    """Fold undelivered events into one digest per recipient and queue their delivery
+
+    Works through the recipients batch_size at a time, one transaction per
+    batch. Events recorded after the run starts wait for the next one.
+    Returns (digests, events).
+    """
+    pending = (Notification.digest_id.is_(None),)
+    high = db.session.execute(select(func.max(Notification.id)).where(*pending)).scalar()
+    if high is None:
+        db.session.rollback()
+        return 0, 0
+    pending += (Notification.id <= high,)
+    recipients = db.session.execute(
+        select(Notification.recipient_id).where(*pending).distinct().order_by(Notification.recipient_id)
+    ).scalars().all()
+
+    total_digests = total_events = 0
+    for start in range(0, len(recipients), batch_size):
+        digests = {recipient_id: Digest(recipient_id=recipient_id)
+                   for recipient_id in recipients[start:start + batch_size]}
+        db.session.add_all(digests.values())
+        db.session.flush()
+        db.session.execute(
+            update(Notification)
+            .where(*pending, Notification.recipient_id.in_(digests))
+            .values(digest_id=case({recipient_id: digest.id for recipient_id, digest in digests.items()},
+                                   value=Notification.recipient_id))
+            .execution_options(synchronize_session=False)
+        )
+        counts = dict(db.session.execute(
+            select(Notification.digest_id, func.count())
+            .where(Notification.digest_id.in_([digest.id for digest in digests.values()]))
+            .group_by(Notification.digest_id)
+        ).all())
+        queued = []
+        for digest in digests.values():
+            # A concurrent run may have taken this recipient's events already
+            digest.event_count = counts.get(digest.id, 0)
+            if digest.event_count:
+                queued.append(digest.id)
+                total_events += digest.event_count
+            else:
+                db.session.delete(digest)
+        for i in range(0, len(queued), DELIVERY_BATCH):
+            jobs.enqueue('deliver_digests', digest_ids=queued[i:i + DELIVERY_BATCH])
+        db.session.commit()
+        total_digests += len(queued)
+    return total_digests, total_events
+
+
+def deliver(digest_ids, sink):
+    """Send the given digests that are still pending; returns (digests, events) sent
+
+    Digests are marked sent together after the batch, or up to the first
+    failure, so a crash mid-batch resends at most that batch.
+    """
+    digests = (
+        Digest.query.options(joinedload(Digest.recipient), selectinload(Digest.events))
+        .filter(Digest.id.in_(digest_ids), Digest.status == 'pending')
+        .order_by(Digest.id)
+        .all()
+    )
+    if not digests:
+        db.session.rollback()
+        return 0, 0
+    links = _Links(current_app)
+    sent = []
+    try:
+        with sink:
+            for digest in digests:
+                sink.send(render(digest, links))
+                sent.append(digest)
+    finally:
+        if sent:
+            db.session.execute(
+                update(Digest).where(Digest.id.in_([digest.id for digest in sent]))
+                .values(status='sent', sent_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+    return len(sent), sum(digest.event_count for digest in sent)
+
+
+def _pending_digest_ids():
+    return db.session.execute(select(Digest.id).where(Digest.status == 'pending').order_by(Digest.id)).scalars().all()
+
+
+@jobs.handler('build_digests', batch_size=1)
+def run_build_job(payloads):
+    config = current_app.config
+    started = time.perf_counter()
+    requeue_stale_digests(config['NOTIFY_REDELIVER_AFTER'])
+    digests, events = build_digests(config['NOTIFY_BATCH_SIZE'])
+    if digests:
+        log.info('Built %d digests from %d notifications in %.1f ms',
+                 digests, events, (time.perf_counter() - started) * 1000)
+    if config['NOTIFY_INTERVAL']:
+        jobs.enqueue('build_digests', delay=config['NOTIFY_INTERVAL'])
+
+
+@jobs.handler('deliver_digests', batch_size=1)
+def run_deliver_job(payloads):
+    for payload in payloads:
+        started = time.perf_counter()
+        sent, events = deliver(payload['digest_ids'], make_sink(current_app.config))
+        elapsed = time.perf_counter() - started
+        if sent:
+            log.info('Delivered %d digests (%d notifications) in %.1f ms, %.0f digests/s',
+                     sent, events, elapsed * 1000, sent / elapsed)
+
+
+@click.command('send-digests')
+@with_appcontext
+def send_digests_command():
+    """Build digests from all undelivered notifications and send every pending digest now"""
+    config = current_app.config
+    started = time.perf_counter()
+    digests, events = build_digests(config['NOTIFY_BATCH_SIZE'])
+    built = time.perf_counter()
+    pending = _pending_digest_ids()
+    sent = sent_events = 0
+    for start in range(0, len(pending), DELIVERY_BATCH):
+        batch_sent, batch_events = deliver(pending[start:start + DELIVERY_BATCH], make_sink(config))
+        sent += batch_sent
+        sent_events += batch_events
+    done = time.perf_counter()
+    backlog = db.session.execute(
+        select(func.count()).select_from(Notification).where(Notification.digest_id.is_(None))
+    ).scalar()
+    print(f"Built {digests} digests from {events} notifications in {(built - started) * 1000:.1f} ms "
+          f"({events / max(built - started, 1e-9):.0f} notifications/s).")
+    print(f"Sent {sent} digests ({sent_events} notifications) through the {config['NOTIFY_SINK']} sink "
+          f"in {(done - built) * 1000:.1f} ms ({sent / max(done - built, 1e-9):.0f} digests/s); "
+          f"{backlog} notifications waiting.")
+
+
+def init_app(app):
+    # Seconds between digests; each user gets at most one digest per interval
+    app.config.setdefault('NOTIFY_INTERVAL', 900)
+    # Recipients whose digests are built per transaction
+    app.config.setdefault('NOTIFY_BATCH_SIZE', 500)
+    # Pending digests queued longer ago than this are queued again; well past the job retries
+    app.config.setdefault('NOTIFY_REDELIVER_AFTER', 3600)
+    app.config.setdefault('NOTIFY_SINK', 'log')
+    app.config.setdefault('NOTIFY_BASE_URL', 'http://localhost:5000')
+    app.config.setdefault('NOTIFY_FROM', 'Micro Job <noreply@localhost>')
+    app.config.setdefault('NOTIFY_TIMEOUT', 10)
+    app.config.setdefault('NOTIFY_SMTP_HOST', 'localhost')
+    app.config.setdefault('NOTIFY_SMTP_PORT', 25)
+    app.config.setdefault('NOTIFY_SMTP_STARTTLS', False)
+    app.config.setdefault('NOTIFY_SMTP_USERNAME', None)
+    app.config.setdefault('NOTIFY_SMTP_PASSWORD', None)
+    app.config.setdefault('NOTIFY_WEBHOOK_URL', None)
+    app.config.setdefault('NOTIFY_WEBHOOK_SECRET', None)
+    app.cli.add_command(send_digests_command)
+    jobs.schedule_periodic(app, 'build_digests', 'NOTIFY_INTERVAL')
@@ -0,0 +1,114 @@
+"""Token-bucket rate limiting for write endpoints.
+
+Buckets live in a small SQLite file of their own (RATELIMIT_DB), shared by
+every worker process and separate from the application database, so
+throttling spam never competes for the main database's write lock. A hit
+is a single UPSERT that refills the bucket and takes a token only if one
+is available. The check runs before any other request hook and answers
+throttled requests with a bare 429, before the app touches the database.
+"""
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from flask import request, session
+
+log = logging.getLogger(__name__)
+
+# Rows untouched for this long are full buckets again and can be dropped
+PRUNE_AFTER = 24 * 3600
+PRUNE_INTERVAL = 600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bucket (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+# Refill by elapsed time, capped at capacity, and take one token, but only
+# when at least one is available; otherwise the row is left untouched.
+_HIT = """
+INSERT INTO bucket (key, tokens, updated) VALUES (:key, :capacity - 1, :now)
+ON CONFLICT (key) DO UPDATE SET
+    tokens = min(:capacity, tokens + (:now - updated) * :rate) - 1,
+    updated = :now
+WHERE min(:capacity, tokens + (:now - updated) * :rate) >= 1
+"""
+
+
+class TokenBucketLimiter:
+    def __init__(self, path, busy_timeout=0.1):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.local = threading.local()
+        self.last_prune = 0.0
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # Losing the last few hits in a power cut is harmless
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute(_SCHEMA)
+            self.local.conn = conn
+        return conn
+
+    def hit(self, key, capacity, period):
+        """Take a token from key's bucket; returns (allowed, retry_after_seconds)"""
+        conn = self._connection()
+        now = time.time()
+        rate = capacity / period
+        cursor = conn.execute(_HIT, {'key': key, 'capacity': capacity, 'rate': rate, 'now': now})
+        if now - self.last_prune > PRUNE_INTERVAL:
+            self.last_prune = now
+            conn.execute('DELETE FROM bucket WHERE updated < ?', (now - PRUNE_AFTER,))
+        if cursor.rowcount == 1:
+            return True, 0
+        tokens, updated = conn.execute('SELECT tokens, updated FROM bucket WHERE key = ?', (key,)).fetchone()
+        available = min(capacity, tokens + (now - updated) * rate)
+        return False, max(1, math.ceil((1 - available) / rate))
+
+
+def _client_key():
+    user_id = session.get('user_id')
+    return f'user:{user_id}' if user_id else f'ip:{request.remote_addr}'
+
+
+def init_app(app):
+    """Throttle POSTs to the endpoints listed in RATELIMITS"""
+    app.config.setdefault('RATELIMIT_DB', os.path.join(app.instance_path, 'ratelimit.db'))
+    # endpoint -> (burst, period in seconds): burst requests, refilled evenly over period
+    app.config.setdefault('RATELIMITS', {
+        'place_bid': (10, 60),
+        'conversation': (20, 60),
+        'register': (5, 3600),
+    })
+    os.makedirs(os.path.dirname(app.config['RATELIMIT_DB']), exist_ok=True)
+    limiter = TokenBucketLimiter(app.config['RATELIMIT_DB'])
+    app.extensions['ratelimit'] = limiter
+
+    @app.before_request
+    def check_rate_limit():
+        if request.method != 'POST':
+            return None
+        limit = app.config['RATELIMITS'].get(request.endpoint)
+        if limit is None:
+            return None
+        try:
+            allowed, retry_after = limiter.hit(f'{request.endpoint}:{_client_key()}', *limit)
+        except sqlite3.Error:
+            # Fail open: a busy or broken limiter must not take writes down
+            log.exception('Rate limiter unavailable')
+            return None
+        if allowed:
+            return None
+        return app.response_class(
+            'Too many requests, please slow down.\n', status=429, mimetype='text/plain',
+            headers={'Retry-After': str(retry_after)},
+        )
@@ -0,0 +1,174 @@
+"""Read/write splitting: read-only views may be served from replica databases.
+
+Each URI in READ_REPLICAS becomes a bind ('replica_0', ...). Views marked
+with @read_only send their SELECTs to a replica, chosen once per request.
+Everything else goes to the primary: other views, flushes, INSERT/UPDATE/
+DELETE statements, and every statement after the request's first write.
+
+Each replica reports an "as of" time: it has every write the primary made
+before then. A replica is used only while it is no older than
+REPLICA_STALENESS seconds. It must also be newer than the client's last
+write, which is remembered in the session cookie. A user who has just bid
+or sent a message therefore reads from the primary until a replica has
+caught up with them.
+
+SQLite replicas are snapshots of the primary taken with SQLite's online
+backup API, by a periodic job or `flask snapshot-replicas`. Each snapshot
+stores its time in the replica's user_version header field. PostgreSQL
+streaming replicas report their replay lag instead.
+"""
+import functools
+import logging
+import random
+import time
+
+import click
+from flask import current_app, g, has_request_context, session
+from flask.cli import with_appcontext
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.dml import UpdateBase
+
+import jobs
+from models import db
+
+log = logging.getLogger(__name__)
+
+_PG_LAG = """
+SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END
+"""
+
+
+def read_only(view):
+    """Mark a view as safe to serve from a replica"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def replica_as_of(engine):
+    """Unix time up to which the replica has the primary's writes (0 if unknown)"""
+    with engine.connect() as conn:
+        if engine.dialect.name == 'sqlite':
+            return conn.exec_driver_sql('PRAGMA user_version').scalar()
+        if engine.dialect.name == 'postgresql':
+            lag = conn.exec_driver_sql(_PG_LAG).scalar()
+            return time.time() - float(lag) if lag is not None else 0
+    return 0
+
+
+class ReplicaRouter:
+    def __init__(self, bind_keys, staleness, check_interval):
+        self.bind_keys = bind_keys
+        self.staleness = staleness
+        self.check_interval = check_interval
+        # bind key -> (checked at, as of); a cached "as of" only ever understates
+        self.as_of = {}
+
+    def _replica_as_of(self, key, now):
+        checked_at, as_of = self.as_of.get(key, (0, 0))
+        if now - checked_at > self.check_interval:
+            try:
+                as_of = replica_as_of(db.engines[key])
+            except SQLAlchemyError:
+                log.warning('Replica %s is unavailable', key, exc_info=True)
+                as_of = 0
+            self.as_of[key] = (now, as_of)
+        return as_of
+
+    def _pick(self):
+        now = time.time()
+        not_before = max(now - self.staleness, session.get('last_write', 0))
+        fresh = [key for key in self.bind_keys if self._replica_as_of(key, now) >= not_before]
+        return db.engines[random.choice(fresh)] if fresh else None
+
+    def engine_for(self, db_session, clause):
+        """The replica engine for this statement, or None for the primary"""
+        if not has_request_context():
+            return None
+        if db_session._flushing or isinstance(clause, UpdateBase):
+            g.db_wrote = True
+            return None
+        if not g.get('read_only') or g.get('db_wrote'):
+            return None
+        if 'db_replica' not in g:
+            g.db_replica = self._pick()
+        return g.db_replica
+
+
+def snapshot(primary, replica):
+    """Copy the primary SQLite database into a replica and stamp it"""
+    taken_at = int(time.time())
+    source = primary.raw_connection()
+    target = replica.raw_connection()
+    try:
+        # One step: readers of the replica see the old copy until it commits
+        source.driver_connection.backup(target.driver_connection)
+        target.driver_connection.execute(f'PRAGMA user_version = {taken_at}')
+    finally:
+        target.close()
+        source.close()
+    return taken_at
+
+
+def snapshot_replicas():
+    """Refresh every SQLite replica from the primary; returns how many were copied"""
+    router = current_app.extensions.get('replicas')
+    primary = db.engines[None]
+    if router is None or primary.dialect.name != 'sqlite':
+        return 0
+    copied = 0
+    for key in router.bind_keys:
+        replica = db.engines[key]
+        if replica.dialect.name == 'sqlite':
+            snapshot(primary, replica)
+            copied += 1
+    return copied
+
+
+@jobs.handler('snapshot_replicas', batch_size=1)
+def run_snapshot_job(payloads):
+    started = time.perf_counter()
+    copied = snapshot_replicas()
+    log.info('Snapshotted %d replicas in %.1f ms', copied, (time.perf_counter() - started) * 1000)
+    interval = current_app.config['REPLICA_SNAPSHOT_INTERVAL']
+    if interval:
+        jobs.enqueue('snapshot_replicas', delay=interval)
+
+
+@click.command('snapshot-replicas')
+@with_appcontext
+def snapshot_command():
+    """Copy the primary database into every SQLite replica"""
+    started = time.perf_counter()
+    copied = snapshot_replicas()
+    print(f"Snapshotted {copied} replicas in {(time.perf_counter() - started) * 1000:.1f} ms.")
+
+
+def init_app(app):
+    """Route @read_only views to the READ_REPLICAS, if any are configured"""
+    # Replicas further behind the primary than this are not read from
+    app.config.setdefault('REPLICA_STALENESS', 60)
+    app.config.setdefault('REPLICA_CHECK_INTERVAL', 1)
+    # Seconds between snapshots of SQLite replicas (0: only `flask snapshot-replicas`)
+    app.config.setdefault('REPLICA_SNAPSHOT_INTERVAL', 30)
+    app.cli.add_command(snapshot_command)
+
+    bind_keys = [f'replica_{i}' for i in range(len(app.config['READ_REPLICAS']))]
+    if not bind_keys:
+        return
+    app.extensions['replicas'] = ReplicaRouter(
+        bind_keys, app.config['REPLICA_STALENESS'], app.config['REPLICA_CHECK_INTERVAL'],
+    )
+
+    @app.after_request
+    def remember_write(response):
+        # Read-your-writes: later requests skip replicas older than this
+        if g.get('db_wrote'):
+            session['last_write'] = time.time()
+        return response
+
+    if any(uri.startswith('sqlite') for uri in app.config['READ_REPLICAS']):
+        jobs.schedule_periodic(app, 'snapshot_replicas', 'REPLICA_SNAPSHOT_INTERVAL', delay=0)
@@ -0,0 +1,106 @@
+"""Precomputed reputation summaries for profile pages.
+
+Profiles used to load a user's whole review collection to compute the
+average and count. The aggregates are kept in one Reputation row per user
+instead. Adding a review or completing a task bumps the counters of the
+existing row in place; the full aggregate only runs for users without a
+row yet, and for everyone in `flask recompute-reputation`.
+"""
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, case, insert, select, union_all, update
+
+from models import db, Review, Reputation, Task, ArchivedTask, User
+
+
+def compute(user_id):
+    """Aggregate a user's reviews and completed jobs into Reputation column values"""
+    row = db.session.query(
+        func.count(Review.id),
+        func.coalesce(func.sum(Review.rating), 0),
+        *[func.coalesce(func.sum(case((Review.rating == stars, 1), else_=0)), 0) for stars in range(1, 6)],
+    ).filter(Review.reviewee_id == user_id).one()
+
+    completed = union_all(*[
+        select(model.id).where(model.status == 'completed',
+                               (model.worker_id == user_id) | (model.employer_id == user_id))
+        for model in (Task, ArchivedTask)
+    ]).subquery()
+    completed_count = db.session.query(func.count()).select_from(completed).scalar()
+
+    values = {'user_id': user_id, 'review_count': row[0], 'rating_sum': row[1],
+              'completed_count': completed_count, 'updated_at': datetime.utcnow()}
+    for stars in range(1, 6):
+        values[f'stars_{stars}'] = row[1 + stars]
+    return values
+
+
+def refresh(*user_ids):
+    """Recompute the summaries of the given users in the current transaction"""
+    for user_id in set(filter(None, user_ids)):
+        db.session.execute(insert(Reputation).prefix_with('OR REPLACE', dialect='sqlite'), [compute(user_id)])
+
+
+def _bump(user_id, **increments):
+    """Add to a user's counters in the current transaction; compute the row if there is none yet"""
+    values = {name: getattr(Reputation, name) + amount for name, amount in increments.items()}
+    result = db.session.execute(
+        update(Reputation).where(Reputation.user_id == user_id)
+        .values(updated_at=datetime.utcnow(), **values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        # compute() already counts what the caller just wrote
+        refresh(user_id)
+
+
+def record_completion(*user_ids):
+    """Count a completed task for its employer and worker"""
+    for user_id in set(filter(None, user_ids)):
+        _bump(user_id, completed_count=1)
+
+
+def record_review(user_id, rating):
+    """Count a new review of the user; call after flushing it"""
+    _bump(user_id, review_count=1, rating_sum=rating, **{f'stars_{rating}': 1})
+
+
+def get(user_id):
+    """The user's summary, computed and stored on first use"""
+    reputation = Reputation.query.get(user_id)
+    if reputation is None:
+        refresh(user_id)
+        db.session.commit()
+        reputation = Reputation.query.get(user_id)
+    return reputation
+
+
+def summaries(user_ids):
+    """{user_id: Reputation} for several users in one query
+
+    Users without a stored row get an unsaved one computed on the spot, so
+    this is safe on read-only connections.
+    """
+    user_ids = set(filter(None, user_ids))
+    found = {r.user_id: r for r in Reputation.query.filter(Reputation.user_id.in_(user_ids))} if user_ids else {}
+    for user_id in user_ids - found.keys():
+        found[user_id] = Reputation(**compute(user_id))
+    return found
+
+
+def recompute():
+    """Rebuild every user's summary from their reviews and tasks"""
+    user_ids = db.session.execute(select(User.id)).scalars().all()
+    refresh(*user_ids)
+    db.session.commit()
+    return len(user_ids)
+
+
+@click.command('recompute-reputation')
+@with_appcontext
+def recompute_command():
+    """Rebuild the reputation summaries from all reviews and completed tasks"""
+    count = recompute()
+    print(f"Recomputed reputation for {count} users.")
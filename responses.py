@@ -0,0 +1,120 @@
+import gzip
+import zlib
+
+from flask import current_app, request, stream_template, render_template, get_flashed_messages
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is used when it is missing
+    brotli = None
+
+HEAD_END = '</head>'
+
+
+def _flush_head_then_buffer(stream, buffer_size):
+    """Send everything up to </head> at once, then group the body into chunks"""
+    buf = []
+    size = 0
+    head_sent = False
+    for chunk in stream:
+        buf.append(chunk)
+        size += len(chunk)
+        if not head_sent and HEAD_END in chunk:
+            head_sent = True
+        elif not head_sent or size < buffer_size:
+            continue
+        yield ''.join(buf)
+        buf = []
+        size = 0
+    if buf:
+        yield ''.join(buf)
+
+
+def render_page(template_name, **context):
+    """Render a template, streaming it when STREAM_TEMPLATES is enabled
+
+    Large listing pages start sending the page head before the body has been
+    rendered, instead of building the whole document in memory first.
+    """
+    if not current_app.config.get('STREAM_TEMPLATES'):
+        return render_template(template_name, **context)
+    # Pop flashed messages now: the session cookie is written before the body
+    # is streamed, so popping them mid-stream would never be persisted.
+    get_flashed_messages(with_categories=True)
+    stream = stream_template(template_name, **context)
+    body = _flush_head_then_buffer(stream, current_app.config.get('STREAM_BUFFER_SIZE', 8192))
+    return current_app.response_class(body, mimetype='text/html')
+
+
+def _choose_encoding():
+    accept = request.accept_encodings
+    if brotli is not None and accept['br']:
+        return 'br'
+    if accept['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress_stream(chunks, encoding, level):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=min(level, 11))
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+
+def _should_compress(response):
+    config = current_app.config
+    if not config.get('COMPRESS_RESPONSES'):
+        return False
+    if response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return False
+    if response.status_code < 200 or response.status_code in (204, 304):
+        return False
+    if response.mimetype not in config['COMPRESS_MIMETYPES']:
+        return False
+    return True
+
+
+def init_app(app):
+    """Compress HTML/JSON responses on the fly, including streamed pages"""
+    app.config.setdefault('STREAM_TEMPLATES', True)
+    app.config.setdefault('STREAM_BUFFER_SIZE', 8192)
+    app.config.setdefault('COMPRESS_RESPONSES', True)
+    app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+    app.config.setdefault('COMPRESS_LEVEL', 6)
+    app.config.setdefault('COMPRESS_MIMETYPES', ['text/html', 'text/plain', 'text/csv', 'application/json'])
+
+    @app.after_request
+    def compress_response(response):
+        if not _should_compress(response):
+            return response
+        encoding = _choose_encoding()
+        if encoding is None:
+            return response
+
+        level = app.config['COMPRESS_LEVEL']
+        if response.is_streamed:
+            response.response = _compress_stream(response.iter_encoded(), encoding, level)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < app.config['COMPRESS_MIN_SIZE']:
+                return response
+            if encoding == 'br':
+                response.set_data(brotli.compress(data, quality=min(level, 11)))
+            else:
+                response.set_data(gzip.compress(data, compresslevel=level))
+
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
@@ -0,0 +1,248 @@
+"""Saved searches and incremental matching of newly posted tasks.
+
+Instead of re-running every saved query when a task is posted, saved
+searches live in an in-memory inverted index. Searches are grouped by
+keyword, and keywords are filed under their first three characters, so a
+task only substring-tests the keywords whose prefix occurs in its text.
+Each keyword group is then keyed on (category, mode, difficulty) with None standing for "any", so a
+new task only looks at the 8 buckets its own values (or "any") could
+match. Within a bucket the searches are sorted by min_budget, and a bisect
+cuts off every search whose budget floor is above the task's budget.
+
+Each process keeps its own index and brings it up to date with
+refresh() before matching. Saving or deleting a search adds its id to the
+SavedSearchChange feed in the same transaction. refresh() compares
+max(SavedSearchChange.id) with the version the index has applied and
+re-reads only the searches changed since then. It goes through Core, so
+no ORM objects are built. The whole table is only read on first use, or
+after the changes a process missed were pruned.
+"""
+import bisect
+import logging
+import math
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+
+import jobs
+from models import db, SavedSearch, SavedSearchChange, SearchMatch, Task
+
+log = logging.getLogger(__name__)
+
+ANY = None
+PREFIX = 3
+# Ids per IN (...) when loading changed searches
+ID_BATCH = 500
+# What the index stores of a search
+INDEXED_COLUMNS = (SavedSearch.id, SavedSearch.user_id, SavedSearch.keyword, SavedSearch.category,
+                   SavedSearch.mode, SavedSearch.difficulty, SavedSearch.min_budget, SavedSearch.max_budget)
+
+
+def record(*search_ids):
+    """Add saved searches to the change feed, in the caller's transaction"""
+    if search_ids:
+        db.session.execute(insert(SavedSearchChange), [{'search_id': search_id} for search_id in search_ids])
+
+
+def _bucket_keys(category, mode, difficulty):
+    for c in (category, ANY):
+        for m in (mode, ANY):
+            for d in (difficulty, ANY):
+                yield c, m, d
+
+
+class SearchIndex:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.keywords = {}
+        self.prefixes = {}
+        self.short_keywords = []
+        # search id -> (keyword, bucket key), to find an entry again on removal
+        self.ids = {}
+        # The last SavedSearchChange id applied; None until the first load
+        self.version = None
+
+    def clear(self):
+        with self.lock:
+            self._clear()
+
+    def _clear(self):
+        self.keywords = {}
+        self.prefixes = {}
+        self.short_keywords = []
+        self.ids = {}
+        self.version = None
+
+    def add(self, search):
+        with self.lock:
+            self._add(search)
+
+    def _add(self, search):
+        if search.id in self.ids:
+            return
+        keyword = (search.keyword or '').lower() or None
+        if keyword is not None and keyword not in self.keywords:
+            if len(keyword) < PREFIX:
+                self.short_keywords.append(keyword)
+            else:
+                self.prefixes.setdefault(keyword[:PREFIX], []).append(keyword)
+        key = (search.category or ANY, search.mode or ANY, search.difficulty or ANY)
+        mins, entries = self.keywords.setdefault(keyword, {}).setdefault(key, ([], []))
+        low = search.min_budget if search.min_budget is not None else -math.inf
+        high = search.max_budget if search.max_budget is not None else math.inf
+        i = bisect.bisect_right(mins, low)
+        mins.insert(i, low)
+        entries.insert(i, (high, search.id, search.user_id))
+        self.ids[search.id] = (keyword, key)
+
+    def remove(self, search_id):
+        with self.lock:
+            self._remove(search_id)
+
+    def _remove(self, search_id):
+        location = self.ids.pop(search_id, None)
+        if location is None:
+            return
+        keyword, key = location
+        buckets = self.keywords[keyword]
+        mins, entries = buckets[key]
+        i = next(i for i, entry in enumerate(entries) if entry[1] == search_id)
+        del mins[i]
+        del entries[i]
+        if entries:
+            return
+        del buckets[key]
+        if buckets:
+            return
+        del self.keywords[keyword]
+        if keyword is None:
+            return
+        if len(keyword) < PREFIX:
+            self.short_keywords.remove(keyword)
+        else:
+            group = self.prefixes[keyword[:PREFIX]]
+            group.remove(keyword)
+            if not group:
+                del self.prefixes[keyword[:PREFIX]]
+
+    def match(self, category, mode, difficulty, budget, text=''):
+        """Return [(search_id, user_id)] of saved searches matching a task"""
+        with self.lock:
+            return self._match(category, mode, difficulty, budget, text.lower())
+
+    def _match(self, category, mode, difficulty, budget, text):
+        keys = list(_bucket_keys(category, mode, difficulty))
+        grams = {text[i:i + PREFIX] for i in range(len(text) - PREFIX + 1)}
+        matched = [None]
+        matched.extend(keyword for keyword in self.short_keywords if keyword in text)
+        for gram in grams.intersection(self.prefixes):
+            matched.extend(keyword for keyword in self.prefixes[gram] if keyword in text)
+
+        hits = []
+        for keyword in matched:
+            buckets = self.keywords.get(keyword)
+            if buckets is None:
+                continue
+            for key in keys:
+                bucket = buckets.get(key)
+                if bucket is None:
+                    continue
+                mins, entries = bucket
+                for high, search_id, user_id in entries[:bisect.bisect_right(mins, budget)]:
+                    if high >= budget:
+                        hits.append((search_id, user_id))
+        return hits
+
+    def refresh(self, session=None):
+        """Catch up with the change feed; a full load on first use or after a gap"""
+        session = session or db.session
+        latest = session.execute(select(func.max(SavedSearchChange.id))).scalar() or 0
+        if self.version is not None and latest <= self.version:
+            return
+        with self.lock:
+            if self.version is not None and latest <= self.version:
+                return
+            changes = []
+            if self.version is not None:
+                changes = session.execute(
+                    select(SavedSearchChange.id, SavedSearchChange.search_id)
+                    .where(SavedSearchChange.id > self.version, SavedSearchChange.id <= latest)
+                    .order_by(SavedSearchChange.id)
+                ).all()
+            if self.version is None or not changes or changes[0].id != self.version + 1:
+                # First use, or the changes we missed have been pruned
+                self._load(session)
+            else:
+                self._apply(session, {search_id for _, search_id in changes})
+            self.version = latest
+
+    def _load(self, session):
+        self._clear()
+        for search in session.execute(select(*INDEXED_COLUMNS)):
+            self._add(search)
+
+    def _apply(self, session, search_ids):
+        """Re-read the changed searches: deleted ones drop out, new ones are added"""
+        search_ids = sorted(search_ids)
+        for search_id in search_ids:
+            self._remove(search_id)
+        for i in range(0, len(search_ids), ID_BATCH):
+            batch = search_ids[i:i + ID_BATCH]
+            for search in session.execute(select(*INDEXED_COLUMNS).where(SavedSearch.id.in_(batch))):
+                self._add(search)
+
+
+index = SearchIndex()
+
+
+def match_task(task):
+    """Record a SearchMatch for every saved search the task satisfies"""
+    text = ' '.join(filter(None, (task.title, task.description, task.category)))
+    hits = index.match(task.category, task.mode, task.difficulty, task.budget_azn, text)
+    rows = {}
+    for search_id, user_id in hits:
+        if user_id != task.employer_id:
+            rows.setdefault(user_id, search_id)
+    if rows:
+        now = datetime.utcnow()
+        db.session.execute(
+            insert(SearchMatch).prefix_with('OR IGNORE', dialect='sqlite'),
+            [{'user_id': user_id, 'saved_search_id': search_id, 'task_id': task.id,
+              'is_seen': False, 'created_at': now}
+             for user_id, search_id in rows.items()]
+        )
+    return len(rows)
+
+
+@jobs.handler('match_saved_searches', batch_size=100)
+def match_new_tasks(payloads):
+    index.refresh()
+    task_ids = [payload['task_id'] for payload in payloads]
+    for task in Task.query.filter(Task.id.in_(task_ids), Task.status == 'open'):
+        match_task(task)
+    db.session.commit()
+
+
+@jobs.handler('prune_saved_search_changes', batch_size=1)
+def run_prune_job(payloads):
+    config = current_app.config
+    cutoff = datetime.utcnow() - timedelta(seconds=config['SEARCH_CHANGE_RETENTION'])
+    deleted = db.session.execute(
+        delete(SavedSearchChange).where(SavedSearchChange.created_at < cutoff)
+    ).rowcount
+    if config['SEARCH_CHANGE_PRUNE_INTERVAL']:
+        jobs.enqueue('prune_saved_search_changes', delay=config['SEARCH_CHANGE_PRUNE_INTERVAL'])
+    if deleted:
+        log.info('Pruned %d saved search changes', deleted)
+
+
+def init_app(app):
+    """Prune the saved search change feed in the background"""
+    # A new app may point at another database; load its searches afresh
+    index.clear()
+    # Processes idle for longer than this reload their index instead of replaying the feed
+    app.config.setdefault('SEARCH_CHANGE_RETENTION', 24 * 3600)
+    app.config.setdefault('SEARCH_CHANGE_PRUNE_INTERVAL', 3600)
+    jobs.schedule_periodic(app, 'prune_saved_search_changes', 'SEARCH_CHANGE_PRUNE_INTERVAL')
@@ -0,0 +1,293 @@
+from werkzeug.security import generate_password_hash
+
+from models import db, User, Task
+
+
+def seed_demo_data():
+    """Add the demo employer, worker and sample jobs. Returns the jobs created."""
+
+    employer = User(
+        name='Demo Employer',
+        email='employer@example.com',
+        password_hash=generate_password_hash('123'),
+        role='employer',
+        skills='project management'
+    )
+    worker = User(
+        name='Demo Worker',
+        email='worker@example.com',
+        password_hash=generate_password_hash('123'),
+        role='worker',
+        skills='social media, design'
+    )
+
+    db.session.add(employer)
+    db.session.add(worker)
+    db.session.commit()
+
+    tasks = [
+        Task(
+            title='Fix WordPress website bug',
+            description='Need to fix a responsive design issue on our WordPress site. The mobile menu is not working properly.',
+            budget_azn=50,
+            category='IT & Programming',
+            mode='online',
+            required_skill='WordPress, CSS, HTML, PHP',
+            difficulty='intermediate',
+            employer_id=employer.id
+        ),
+        Task(
+            title='Build simple landing page',
+            description='Create a one-page landing page for our new product launch. Need modern design with contact form.',
+            budget_azn=80,
+            category='IT & Programming',
+            mode='online',
+            required_skill='HTML, CSS, JavaScript',
+            difficulty='beginner',
+            employer_id=employer.id
+        ),
+        Task(
+            title='Design logo for startup company',
+            description='Need a professional logo design for our tech startup. Should be modern and memorable.',
+            budget_azn=120,
+            category='Graphic & Design',
+            mode='online',
+            required_skill='Logo design, Adobe Illustrator, branding',
+            difficulty='intermediate',
+            employer_id=employer.id
+        ),
+        Task(
+            title='Create 5 social media graphics',
+            description='Need 5 Instagram post designs for our café. Should match our brand colors and style.',
+            budget_azn=40,
+            category='Graphic & Design',
+            mode='online',
+            required_skill='Canva, Photoshop, social media design',
+            difficulty='beginner',
+            employer_id=employer.id
+        ),
+        Task(
+            title='Translate website content (EN → AZ)',
+            description='Translate our company website from English to Azerbaijani. About 10 pages of content.',
+            budget_azn=150,
+            category='Writing & Translation',
+            mode='online',
+            required_skill='Translation, English, Azerbaijani, SEO',
+            difficulty='intermediate',
+            employer_id=employer.id
+        ),
+        Task(
+            title='Write 3 blog posts about technology',
+            description='Need 3 engaging blog posts about latest tech trends. Each post should be 800-1000 words.',
+            budget_azn=90,
+            category='Writing & Translation',
+            mode='online',
+            required_skill='Content writing, SEO, technology knowledge',
+            difficulty='intermediate',
+            employer_id=employer.id
+        ),
+        Task(
+            title='Manage Instagram account for 1 month',
+            description='Need someone to create content, post daily, and engage with followers for our fashion brand.',
+            budget_azn=200,
+            category='Marketing & SMM',
+            mode='online',
+            required_skill='Social media management, Instagram, content creation',
+            difficulty='intermediate',
+            employer_id=employer.id
+        ),
+        Task(
+            title='Create Facebook ad campaign',
+            description='Design and set up a Facebook advertising campaign for our local restaurant. Need creative ads.',
+            budget_azn=100,
+            category='Marketing & SMM',
+            mode='online',
+            required_skill='Facebook Ads, marketing, graphic design',
+            difficulty='intermediate',
+            employer_id=employer.id
+        ),
+        Task(
+            title='Online English tutoring for kids',
+            description='Need an English tutor for my 8-year-old child. 2 hours per week, online sessions.',
+            budget_azn=60,
+            category='Education & Tutoring',
+            mode='online',
+            required_skill='English teaching, kids education, online tutoring',
+            difficulty='beginner',
+            employer_id=employer.id
+        ),
+        Task(
+            title='Math tutoring for high school student',
+            description='Need help with algebra and geometry. Online sessions, flexible schedule.',
+            budget_azn=80,
+            category='Education & Tutoring',
+            mode='online',
+            required_skill='Mathematics, teaching, high school curriculum',
+            difficulty='intermediate',
+            employer_id=employer.id
+        ),
+        Task(
+            title='Data entry and email management',
+            description='Need help organizing customer data in Excel and managing daily emails. 10 hours per week.',
+            budget_azn=150,
+            category='Virtual Assistant',
+            mode='online',
+            required_skill='Excel, email management, data entry',
+            difficulty='beginner',
+            employer_id=employer.id
+        ),
+        Task(
+            title='Schedule appointments and manage calendar',
+            description='Help manage my business calendar, schedule meetings, and send reminders to clients.',
+            budget_azn=120,
+            category='Virtual Assistant',
+            mode='online',
+            required_skill='Calendar management, communication, organization',
+            difficulty='beginner',
+            employer_id=employer.id
+        ),
+        Task(
+            title='Data analysis for sales report',
+            description='Analyze our monthly sales data and create visualizations. Need insights and recommendations.',
+            budget_azn=180,
+            category='Data / AI Tasks',
+            mode='online',
+            required_skill='Excel, data analysis, visualization, statistics',
+            difficulty='advanced',
+            employer_id=employer.id
+        ),
+        Task(
+            title='Organize customer database',
+            description='Clean and organize our customer database. Remove duplicates and update contact information.',
+            budget_azn=70,
+            category='Data / AI Tasks',
+            mode='online',
+            required_skill='Data entry, Excel, database management',
+            difficulty='beginner',
+            employer_id=employer.id
+        ),
+        Task(
+            title='Food delivery in Baku city center',
+            description='Need reliable person for food delivery service. Must have own transportation. Flexible hours.',
+            budget_azn=200,
+            category='Delivery',
+            mode='offline',
+            required_skill='Delivery, driving, customer service',
+            difficulty='beginner',
+            latitude=40.3777,
+            longitude=49.892,
+            employer_id=employer.id
+        ),
+        Task(
+            title='Fix leaking faucet in kitchen',
+            description='Kitchen faucet is leaking. Need someone to repair or replace it. Must bring own tools.',
+            budget_azn=40,
+            category='Home & Repair Services',
+            mode='offline',
+            required_skill='Plumbing, home repair',
+            difficulty='intermediate',
+            latitude=40.4093,
+            longitude=49.8671,
+            employer_id=employer.id
+        ),
+        Task(
+            title='Paint living room walls',
+            description='Need to paint 2 walls in living room. Room is 25 square meters. Paint provided.',
+            budget_azn=80,
+            category='Home & Repair Services',
+            mode='offline',
+            required_skill='Painting, home improvement',
+            difficulty='beginner',
+            latitude=40.3953,
+            longitude=49.8822,
+            employer_id=employer.id
+        ),
+        Task(
+            title='Photographer for wedding event',
+            description='Need professional photographer for wedding ceremony. 6 hours coverage, 200+ photos.',
+            budget_azn=500,
+            category='Event & Photography',
+            mode='offline',
+            required_skill='Photography, wedding photography, photo editing',
+            difficulty='advanced',
+            latitude=40.426,
+            longitude=49.935,
+            employer_id=employer.id
+        ),
+        Task(
+            title='Event assistant for corporate meeting',
+            description='Help with setup, registration, and coordination at corporate event. 4 hours.',
+            budget_azn=60,
+            category='Event & Photography',
+            mode='offline',
+            required_skill='Event management, communication, organization',
+            difficulty='beginner',
+            latitude=40.372,
+            longitude=49.835,
+            employer_id=employer.id
+        ),
+        Task(
+            title='Help with furniture assembly',
+            description='Need help assembling IKEA furniture. 3 pieces: bed, wardrobe, and desk.',
+            budget_azn=50,
+            category='Construction & Labor',
+            mode='offline',
+            required_skill='Furniture assembly, tools',
+            difficulty='beginner',
+            latitude=40.45,
+            longitude=49.79,
+            employer_id=employer.id
+        ),
+        Task(
+            title='Garden cleanup and landscaping',
+            description='Clean up garden, trim bushes, and plant new flowers. Garden is 100 square meters.',
+            budget_azn=120,
+            category='Construction & Labor',
+            mode='offline',
+            required_skill='Gardening, landscaping, physical work',
+            difficulty='beginner',
+            latitude=40.58,
+            longitude=49.67,
+            employer_id=employer.id
+        ),
+        Task(
+            title='Harvest vegetables from garden',
+            description='Need help harvesting tomatoes, cucumbers, and peppers. 4 hours work.',
+            budget_azn=40,
+            category='Agriculture',
+            mode='offline',
+            required_skill='Farming, physical work',
+            difficulty='beginner',
+            latitude=40.63,
+            longitude=48.64,
+            employer_id=employer.id
+        ),
+        Task(
+            title='Drive to airport and back',
+            description='Need driver to pick up from airport and drop off at hotel. 2 trips, same day.',
+            budget_azn=60,
+            category='Transportation',
+            mode='offline',
+            required_skill='Driving, valid license, reliable car',
+            difficulty='beginner',
+            latitude=40.4675,
+            longitude=50.0467,
+            employer_id=employer.id
+        ),
+        Task(
+            title='Moving help - furniture transport',
+            description='Need help moving furniture from old apartment to new one. Need truck and 2 helpers.',
+            budget_azn=150,
+            category='Transportation',
+            mode='offline',
+            required_skill='Moving, transportation, physical work',
+            difficulty='intermediate',
+            latitude=40.385,
+            longitude=49.85,
+            employer_id=employer.id
+        ),
+    ]
+
+    db.session.add_all(tasks)
+    db.session.commit()
+    return tasks
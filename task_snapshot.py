@@ -0,0 +1,344 @@
+"""Columnar in-memory snapshot of open tasks for the job list's filters.
+
+Each process keeps the open tasks' filterable fields in parallel NumPy
+arrays, ordered by id. Category, mode and difficulty are stored as small
+integer codes next to the budget and deadline. A filter is a handful of
+vectorised comparisons ANDed into one boolean mask. The ids it selects
+are then loaded from the database.
+
+Writes that change what the job list filters on (new_task, accept_bid,
+complete_task and the expiry sweep) add the task's id to the TaskChange
+feed in the same transaction. Before each lookup a process compares
+max(TaskChange.id) with the version it has applied, and re-reads only the
+tasks changed since then. Every gunicorn worker therefore converges on
+the database without shared memory. Removed rows are only flagged dead;
+they are compacted away once they make up half of the arrays.
+
+NumPy and the snapshot are loaded by the first filtered job list request,
+not at import time, so other processes and CLI commands don't pay for them.
+"""
+import logging
+import math
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+
+import jobs
+from models import db, Task, TaskChange
+
+# Imported by get() on first use; NumPy is optional, the job list filters in SQL without it
+np = None
+
+log = logging.getLogger(__name__)
+
+# Rows per batch for the initial load, and ids per IN (...) when reading rows back
+LOAD_BATCH = 10000
+ID_BATCH = 500
+# Rows sampled to estimate how selective a filter is
+SAMPLE_SIZE = 1024
+
+CODED = ('category', 'mode', 'difficulty')
+_COLUMNS = (Task.id, Task.category, Task.mode, Task.difficulty, Task.budget_azn, Task.expires_at)
+_EPOCH = datetime(1970, 1, 1)
+_create_lock = threading.Lock()
+
+
+def _timestamp(value):
+    return (value - _EPOCH).total_seconds() if value is not None else math.inf
+
+
+def record(*task_ids):
+    """Add tasks to the change feed, in the caller's transaction"""
+    if task_ids:
+        db.session.execute(insert(TaskChange), [{'task_id': task_id} for task_id in task_ids])
+
+
+class OpenTaskSnapshot:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.codes = {field: {} for field in CODED}
+        self._allocate(0)
+
+    def _changed(self):
+        # (field, code) -> positions holding it, and the open-rows mask with its expiry
+        self.postings = {}
+        self.open_rows = None
+        self.open_until = -math.inf
+
+    def _allocate(self, capacity):
+        self.size = 0
+        self.dead = 0
+        self.ids = np.zeros(capacity, np.int64)
+        self.category = np.zeros(capacity, np.int16)
+        self.mode = np.zeros(capacity, np.int16)
+        self.difficulty = np.zeros(capacity, np.int16)
+        self.budget = np.zeros(capacity, np.float64)
+        self.expires = np.zeros(capacity, np.float64)
+        self.alive = np.zeros(capacity, np.bool_)
+        self._changed()
+
+    def _arrays(self):
+        return ('ids', 'category', 'mode', 'difficulty', 'budget', 'expires', 'alive')
+
+    def _code(self, field, value):
+        codes = self.codes[field]
+        if value not in codes:
+            codes[value] = len(codes)
+        return codes[value]
+
+    def _columns(self, rows):
+        return {
+            'ids': [row[0] for row in rows],
+            'category': [self._code('category', row[1]) for row in rows],
+            'mode': [self._code('mode', row[2]) for row in rows],
+            'difficulty': [self._code('difficulty', row[3]) for row in rows],
+            'budget': [row[4] if row[4] is not None else math.nan for row in rows],
+            'expires': [_timestamp(row[5]) for row in rows],
+            'alive': [True] * len(rows),
+        }
+
+    def _append(self, rows):
+        """Append rows, which must all have ids above the current last one"""
+        end = self.size + len(rows)
+        if end > len(self.ids):
+            capacity = max(end, 2 * len(self.ids), 1024)
+            for name in self._arrays():
+                grown = np.zeros(capacity, getattr(self, name).dtype)
+                grown[:self.size] = getattr(self, name)[:self.size]
+                setattr(self, name, grown)
+        for name, values in self._columns(rows).items():
+            getattr(self, name)[self.size:end] = values
+        self.size = end
+        self._changed()
+
+    def _position(self, task_id):
+        pos = int(np.searchsorted(self.ids[:self.size], task_id))
+        return pos if pos < self.size and self.ids[pos] == task_id else None
+
+    def _compact(self):
+        keep = self.alive[:self.size]
+        for name in self._arrays():
+            setattr(self, name, getattr(self, name)[:self.size][keep].copy())
+        self.size = len(self.ids)
+        self.dead = 0
+        self._changed()
+
+    def _load(self, session):
+        self._allocate(0)
+        # Core execution: ORM row handling would double the load time
+        result = session.connection().execute(
+            select(*_COLUMNS).where(Task.status == 'open').order_by(Task.id),
+            execution_options={'yield_per': LOAD_BATCH},
+        )
+        for rows in result.partitions():
+            self._append(rows)
+
+    def _apply(self, session, task_ids):
+        rows = {}
+        for i in range(0, len(task_ids), ID_BATCH):
+            chunk = task_ids[i:i + ID_BATCH]
+            for row in session.execute(select(*_COLUMNS).where(Task.id.in_(chunk), Task.status == 'open')):
+                rows[row[0]] = row
+        last_id = self.ids[self.size - 1] if self.size else 0
+        appended = []
+        for task_id in sorted(set(task_ids)):
+            pos = self._position(task_id)
+            row = rows.get(task_id)
+            if pos is not None:
+                if self.alive[pos] and row is None:
+                    self.alive[pos] = False
+                    self.dead += 1
+                elif row is not None:
+                    if not self.alive[pos]:
+                        self.dead -= 1
+                    for name, values in self._columns([row]).items():
+                        getattr(self, name)[pos] = values[0]
+            elif row is not None:
+                if task_id > last_id:
+                    appended.append(row)
+                else:
+                    # Cannot happen with the current write paths: fall back to a reload
+                    self._load(session)
+                    return
+        self._append(appended)
+        if self.dead > self.size // 2:
+            self._compact()
+
+    def sync(self, session=None):
+        """Catch up with the change feed; a full load on first use or after a gap"""
+        session = session or db.session
+        latest = session.execute(select(func.max(TaskChange.id))).scalar() or 0
+        if self.version is not None and latest <= self.version:
+            return
+        with self.lock:
+            if self.version is not None and latest <= self.version:
+                return
+            changes = []
+            if self.version is not None:
+                changes = session.execute(
+                    select(TaskChange.id, TaskChange.task_id)
+                    .where(TaskChange.id > self.version, TaskChange.id <= latest)
+                    .order_by(TaskChange.id)
+                ).all()
+            if self.version is None or not changes or changes[0].id != self.version + 1:
+                # First use, or the changes we missed have been pruned
+                self._load(session)
+            else:
+                self._apply(session, [task_id for _, task_id in changes])
+            self.version = latest
+
+    def _positions(self, field, code):
+        key = (field, code)
+        if key not in self.postings:
+            self.postings[key] = np.flatnonzero(getattr(self, field)[:self.size] == code)
+        return self.postings[key]
+
+    def _open(self, now):
+        """Mask of rows that are alive and not past their deadline, cached until the next deadline"""
+        if self.open_rows is None or now >= self.open_until:
+            n = self.size
+            self.open_rows = self.alive[:n] & (self.expires[:n] > now)
+            upcoming = self.expires[:n][self.open_rows]
+            self.open_until = upcoming.min() if len(upcoming) else math.inf
+        return self.open_rows
+
+    def density(self, mode=None, category=None, difficulty=None, min_budget=None, max_budget=None, now=None):
+        """Estimated fraction of the open tasks passing the filters, from an evenly spaced sample"""
+        now = _timestamp(now or datetime.utcnow())
+        with self.lock:
+            if not self.size:
+                return 0.0
+            positions = np.linspace(0, self.size - 1, min(self.size, SAMPLE_SIZE)).astype(np.int64)
+            open_rows = self.alive[positions] & (self.expires[positions] > now)
+            keep = open_rows.copy()
+            for field, value in (('mode', mode), ('category', category), ('difficulty', difficulty)):
+                if value is not None:
+                    keep &= getattr(self, field)[positions] == self.codes[field].get(value, -1)
+            if min_budget:
+                keep &= self.budget[positions] >= min_budget
+            if max_budget:
+                keep &= self.budget[positions] <= max_budget
+            return np.count_nonzero(keep) / max(np.count_nonzero(open_rows), 1)
+
+    def matching_ids(self, mode=None, category=None, difficulty=None, min_budget=None, max_budget=None, now=None):
+        """Ids of open, unexpired tasks passing the job list filters, newest first
+
+        A selective coded filter starts from its cached list of positions,
+        and the remaining conditions are checked on that subset only.
+        """
+        now = _timestamp(now or datetime.utcnow())
+        with self.lock:
+            open_rows = self._open(now)
+            lists = []
+            for field, value in (('mode', mode), ('category', category), ('difficulty', difficulty)):
+                if value is None:
+                    continue
+                code = self.codes[field].get(value)
+                if code is None:
+                    return np.zeros(0, np.int64)
+                lists.append((field, code, self._positions(field, code)))
+            lists.sort(key=lambda item: len(item[2]))
+            n = self.size
+            if not lists or len(lists[0][2]) * 8 > n:
+                # Nothing selective: one pass over the full columns is cheaper
+                mask = open_rows.copy()
+                for field, code, _ in lists:
+                    mask &= getattr(self, field)[:n] == code
+                if min_budget:
+                    mask &= self.budget[:n] >= min_budget
+                if max_budget:
+                    mask &= self.budget[:n] <= max_budget
+                ids = self.ids[:n]
+                if lists or min_budget or max_budget:
+                    # Boolean indexing stalls on mixed masks, np.compress does not
+                    return np.compress(mask, ids)[::-1]
+                return ids[mask][::-1]
+            positions = lists[0][2]
+            keep = open_rows[positions]
+            for field, code, _ in lists[1:]:
+                keep &= getattr(self, field)[positions] == code
+            if min_budget:
+                keep &= self.budget[positions] >= min_budget
+            if max_budget:
+                keep &= self.budget[positions] <= max_budget
+            return self.ids[np.compress(keep, positions)[::-1]]
+
+
+def page_ids(offset, limit, **filters):
+    """Ids for one page of the filtered job list, or None when SQL is expected to be faster
+
+    SQL walks the open tasks newest first and stops after offset + limit
+    matches, which is cheap for common filters on early pages. The snapshot
+    is used once SQL would have to read more than TASK_SNAPSHOT_MIN_SCAN
+    rows, estimated from a sample of the arrays.
+    """
+    snapshot = get()
+    if snapshot is None:
+        return None
+    density = max(snapshot.density(**filters), 1 / SAMPLE_SIZE)
+    if (offset + limit) / density < current_app.config['TASK_SNAPSHOT_MIN_SCAN']:
+        return None
+    return snapshot.matching_ids(**filters)[offset:offset + limit]
+
+
+def load_tasks(ids, *options):
+    """The open tasks with these ids (an array from matching_ids()), in that order"""
+    by_id = {}
+    for i in range(0, len(ids), ID_BATCH):
+        chunk = [int(task_id) for task_id in ids[i:i + ID_BATCH]]
+        # Status is checked here: in the WHERE clause SQLite may pick the status index over the primary key
+        for task in Task.query.options(*options).filter(Task.id.in_(chunk)):
+            if task.status == 'open':
+                by_id[task.id] = task
+    return [by_id[task_id] for task_id in ids.tolist() if task_id in by_id]
+
+
+def _create(app):
+    global np
+    if not app.config['TASK_SNAPSHOT']:
+        return None
+    try:
+        import numpy
+    except ImportError:
+        log.info('NumPy is not installed; the job list filters in SQL')
+        return None
+    np = numpy
+    return OpenTaskSnapshot()
+
+
+def get():
+    """This process's snapshot, synced with the change feed; None when disabled"""
+    extensions = current_app.extensions
+    if 'task_snapshot' not in extensions:
+        with _create_lock:
+            if 'task_snapshot' not in extensions:
+                extensions['task_snapshot'] = _create(current_app)
+    snapshot = extensions['task_snapshot']
+    if snapshot is not None:
+        snapshot.sync()
+    return snapshot
+
+
+@jobs.handler('prune_task_changes', batch_size=1)
+def run_prune_job(payloads):
+    config = current_app.config
+    cutoff = datetime.utcnow() - timedelta(seconds=config['TASK_CHANGE_RETENTION'])
+    deleted = db.session.execute(delete(TaskChange).where(TaskChange.created_at < cutoff)).rowcount
+    if config['TASK_CHANGE_PRUNE_INTERVAL']:
+        jobs.enqueue('prune_task_changes', delay=config['TASK_CHANGE_PRUNE_INTERVAL'])
+    if deleted:
+        log.info('Pruned %d task changes', deleted)
+
+
+def init_app(app):
+    """Serve the job list's filters from an in-memory snapshot when NumPy is available"""
+    app.config.setdefault('TASK_SNAPSHOT', True)
+    # Estimated rows an SQL page would read before the snapshot is used instead
+    app.config.setdefault('TASK_SNAPSHOT_MIN_SCAN', 5000)
+    # Processes idle for longer than this reload the snapshot instead of replaying the feed
+    app.config.setdefault('TASK_CHANGE_RETENTION', 24 * 3600)
+    app.config.setdefault('TASK_CHANGE_PRUNE_INTERVAL', 3600)
+    jobs.schedule_periodic(app, 'prune_task_changes', 'TASK_CHANGE_PRUNE_INTERVAL')
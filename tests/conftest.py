@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, ROOT)
+
+from app import create_app  # noqa: E402
+from models import db  # noqa: E402
+from seed import seed_demo_data  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    """An app on a throwaway database with the demo data; jobs only run when a test runs them"""
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'RATELIMIT_DB': str(tmp_path / 'ratelimit.db'),
+        'TEMPLATE_CACHE_DIR': '',
+        'JOB_WORKERS': 0,
+    })
+    with app.app_context():
+        db.create_all()
+        seed_demo_data()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, user):
+    with client.session_transaction() as session:
+        session['user_id'] = user.id
@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+from conftest import login
+from models import db, ArchivedTask, SavedSearch, SearchMatch, Task, User
+import archive
+
+
+def test_matches_page_survives_archived_task(app, client):
+    worker = User.query.filter_by(role='worker').first()
+    old, current = Task.query.order_by(Task.id).limit(2).all()
+    old.status = 'completed'
+    old.completed_at = datetime.utcnow() - timedelta(days=200)
+    search = SavedSearch(user_id=worker.id)
+    db.session.add(search)
+    db.session.flush()
+    for task in (old, current):
+        db.session.add(SearchMatch(user_id=worker.id, saved_search_id=search.id, task_id=task.id))
+    db.session.commit()
+
+    tasks, _, _ = archive.archive_old_rows(older_than_days=90)
+    assert tasks == 1
+    assert db.session.get(ArchivedTask, old.id) is not None
+    assert [m.task_id for m in SearchMatch.query.all()] == [current.id]
+
+    # A match left behind by an earlier archive run must not break the page either
+    db.session.add(SearchMatch(user_id=worker.id, saved_search_id=search.id, task_id=old.id))
+    db.session.commit()
+
+    login(client, worker)
+    response = client.get('/matches')
+    assert response.status_code == 200
+    assert current.title in response.get_data(as_text=True)
@@ -0,0 +1,56 @@
+import threading
+import time
+
+from models import db, Task
+from autocomplete import PrefixIndex, MAX_SUGGESTIONS, REBUILD_INTERVAL
+import autocomplete
+
+
+def test_stale_index_rebuilds_once_in_background(app):
+    index = PrefixIndex()
+    index.rebuild()
+    before = index.suggest('wordpress')
+    assert before
+
+    release = threading.Event()
+    calls = []
+    rebuild = index.rebuild
+
+    def slow_rebuild():
+        calls.append(1)
+        release.wait(5)
+        rebuild()
+
+    index.rebuild = slow_rebuild
+    index.built_at -= REBUILD_INTERVAL + 1
+    task = Task.query.filter_by(status='open').first()
+    task.title = 'Zebra stripes'
+    db.session.commit()
+
+    started = time.perf_counter()
+    for _ in range(5):
+        index.refresh()
+        assert index.suggest('wordpress') == before
+    assert time.perf_counter() - started < 1
+    release.set()
+    for _ in range(50):
+        if not index.rebuilding:
+            break
+        time.sleep(0.05)
+    assert len(calls) == 1
+    assert index.suggest('zebra') == [('title', 'Zebra stripes')]
+
+
+def test_limit_from_the_query_string_is_clamped(app, client):
+    for i in range(30):
+        db.session.add(Task(title=f'Zebra {i}', description='x', budget_azn=10, category='Delivery',
+                            mode='offline', difficulty='beginner', status='open'))
+    db.session.commit()
+    autocomplete.index.rebuild()
+
+    def count(limit):
+        return len(client.get(f'/autocomplete?q=zebra&limit={limit}').get_json()['suggestions'])
+
+    assert count(5) == 5
+    assert count(1000) == MAX_SUGGESTIONS
+    assert count(0) == count(-5000) == 1
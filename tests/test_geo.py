@@ -0,0 +1,103 @@
+import random
+
+import pytest
+from sqlalchemy import select
+
+from conftest import login
+from models import db, Task, User, open_now
+import geo
+import views
+
+ORIGIN = (40.40, 49.80)
+
+
+@pytest.fixture
+def located(app, monkeypatch):
+    """Two clusters of located tasks next to the demo tasks, which have no location
+
+    The geo.py thresholds are shrunk so the walk, its fallback and the
+    circle shrinking all happen with a few hundred rows.
+    """
+    monkeypatch.setattr(geo, 'WINDOW', 16)
+    monkeypatch.setattr(geo, 'WALK_BUDGET', 64)
+    monkeypatch.setattr(geo, 'MIN_CANDIDATES', 20)
+    employer = User.query.filter_by(role='employer').first()
+    rng = random.Random(7)
+    for i in range(400):
+        # Most around the origin, a far cluster 300 km east
+        lat, lon = (40.4, 49.9) if i % 5 else (40.7, 53.4)
+        db.session.add(Task(
+            title=f'Located {i}', description='Geo test', budget_azn=20, category='Delivery',
+            mode='offline', difficulty='beginner', status='open', employer_id=employer.id,
+            latitude=lat + rng.uniform(-0.3, 0.3), longitude=lon + rng.uniform(-0.3, 0.3),
+        ))
+    db.session.commit()
+    return Task.query.filter(Task.status == 'open').all()
+
+
+def brute_force(tasks, radius_km, sort, count):
+    ranked = []
+    for task in tasks:
+        if task.latitude is None:
+            if not radius_km:
+                ranked.append((float('inf'), -task.id, task.id))
+            continue
+        distance = geo.distance_km(*ORIGIN, task.latitude, task.longitude)
+        if not radius_km or distance <= radius_km:
+            ranked.append((distance if sort == 'distance' else 0, task.id if sort == 'distance' else -task.id,
+                           task.id))
+    return [task_id for _, _, task_id in sorted(ranked)][:count]
+
+
+@pytest.mark.parametrize('radius_km, sort', [
+    (None, 'distance'), (5, 'distance'), (30, 'distance'), (5, 'newest'), (30, 'newest'), (500, 'newest'),
+])
+@pytest.mark.parametrize('count', [25, 200, 1000])
+def test_nearby_ids_match_brute_force(located, radius_km, sort, count):
+    conditions = [Task.status == 'open', open_now()]
+    ids = views.nearby_ids(conditions, *ORIGIN, radius_km, sort, count)
+    assert ids == brute_force(located, radius_km, sort, count)
+
+
+def test_pages_follow_on(located, client):
+    per_page = client.application.config['TASKS_PER_PAGE']
+    expected = brute_force(located, None, 'distance', 3 * per_page)
+    shown = []
+    for page in (1, 2, 3):
+        html = client.get(f'/?lat={ORIGIN[0]}&lon={ORIGIN[1]}&sort=distance&page={page}').get_data(as_text=True)
+        shown += [task_id for task_id in expected if f'/task/{task_id}"' in html]
+    assert shown == expected
+
+
+@pytest.mark.parametrize('query', [
+    'lat=95&lon=49&radius_km=5', 'lat=40&lon=200&radius_km=5', 'lat=nan&lon=49&radius_km=5',
+    'lat=40&lon=inf&sort=distance', 'lat=40&lon=49&radius_km=nan', 'lat=40&lon=49&radius_km=-5',
+    'lat=40&lon=49&radius_km=0&sort=distance',
+])
+def test_listing_ignores_bad_coordinates(client, query):
+    assert client.get(f'/?{query}').status_code == 200
+
+
+def test_bad_coordinates_are_not_saved(app, client):
+    employer = User.query.filter_by(role='employer').first()
+    login(client, employer)
+
+    for latitude, longitude in (('95', '49'), ('nan', '49'), ('40', '-181'), ('40', '')):
+        client.post('/profile/edit', data={'name': employer.name, 'latitude': latitude, 'longitude': longitude})
+        db.session.expire_all()
+        assert db.session.get(User, employer.id).latitude is None
+
+        client.post('/task/new', data={'title': 'Bad location', 'description': 'x', 'budget': '10',
+                                       'category': 'Delivery', 'latitude': latitude, 'longitude': longitude})
+        assert Task.query.filter_by(title='Bad location').count() == 0
+
+    client.post('/profile/edit', data={'name': employer.name, 'latitude': '40.4', 'longitude': '49.8'})
+    db.session.expire_all()
+    assert db.session.get(User, employer.id).latitude == 40.4
+
+
+def test_empty_cell_list_matches_nothing(app):
+    assert db.session.execute(
+        select(Task.id).where(geo.prefix_filter(Task.id, Task.geohash, []))
+    ).all() == []
+    assert db.session.execute(geo.rows_in_cells(select(Task.id), Task.geohash, [], 10)).all() == []
@@ -0,0 +1,41 @@
+from sqlalchemy import event
+
+from models import db, Job
+import jobs
+
+
+def statements(app, fn):
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement.split(None, 1)[0].upper())
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    return result, seen
+
+
+def test_idle_poll_does_not_write(app):
+    jobs.enqueue('later', delay=3600)
+    db.session.commit()
+
+    claimed, seen = statements(app, lambda: jobs.claim_jobs(10, 300))
+    assert claimed == []
+    assert seen == ['SELECT']
+
+
+def test_due_jobs_are_claimed_once(app):
+    due = [jobs.enqueue('now') for _ in range(3)]
+    jobs.enqueue('later', delay=3600)
+    db.session.commit()
+
+    claimed = jobs.claim_jobs(10, 300)
+    assert [job.id for job in claimed] == [job.id for job in due]
+    assert {job.status for job in claimed} == {'running'}
+    assert {job.attempts for job in claimed} == {1}
+    assert jobs.claim_jobs(10, 300) == []
+    assert Job.query.filter_by(status='running').count() == 3
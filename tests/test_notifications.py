@@ -0,0 +1,43 @@
+from models import db, Digest, Job, User
+import jobs
+import notifications
+
+
+class FailingSink(notifications.LogSink):
+    def send(self, digest):
+        raise OSError('connection refused')
+
+
+class RecordingSink(notifications.LogSink):
+    sent = []
+
+    def send(self, digest):
+        RecordingSink.sent.append(digest)
+
+
+def test_digest_whose_job_failed_is_queued_again(app):
+    employer = User.query.filter_by(role='employer').first()
+    worker = User.query.filter_by(role='worker').first()
+    notifications.record(employer.id, 'message', actor_id=worker.id, actor=worker.name, excerpt='Hello')
+    db.session.commit()
+    app.config.update(NOTIFY_SINK=FailingSink, JOB_MAX_ATTEMPTS=1)
+
+    assert notifications.build_digests() == (1, 1)
+    jobs.run_pending(app)
+    assert Job.query.filter_by(kind='deliver_digests').one().status == 'failed'
+    digest = Digest.query.one()
+    assert digest.status == 'pending'
+
+    # Not yet due for redelivery
+    assert notifications.requeue_stale_digests(after=3600) == 0
+
+    app.config.update(NOTIFY_SINK=RecordingSink, NOTIFY_REDELIVER_AFTER=0, NOTIFY_INTERVAL=0)
+    RecordingSink.sent.clear()
+    jobs.enqueue('build_digests')
+    db.session.commit()
+    jobs.run_pending(app)
+    jobs.run_pending(app)
+
+    db.session.expire_all()
+    assert Digest.query.one().status == 'sent'
+    assert [digest['id'] for digest in RecordingSink.sent] == [digest.id]
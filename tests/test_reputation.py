@@ -0,0 +1,71 @@
+from sqlalchemy import event
+
+from conftest import login
+from models import db, Bid, Reputation, Task, User
+import reputation
+
+
+def stored(user_id):
+    db.session.expire_all()
+    row = db.session.get(Reputation, user_id)
+    return {name: getattr(row, name) for name in reputation.compute(user_id) if name != 'updated_at'}
+
+
+def expected(user_id):
+    values = reputation.compute(user_id)
+    del values['updated_at']
+    return values
+
+
+def test_counters_follow_completions_and_reviews(app, client):
+    employer = User.query.filter_by(role='employer').first()
+    worker = User.query.filter_by(role='worker').first()
+    # The employer already has a summary, the worker gets one on the first change
+    reputation.get(employer.id)
+    employer_client, worker_client = client, app.test_client()
+    login(employer_client, employer)
+    login(worker_client, worker)
+
+    for task, rating in zip(Task.query.filter_by(status='open').limit(3).all(), (5, 4, 5)):
+        worker_client.post(f'/task/{task.id}/bid', data={'amount': '30', 'proposal': 'Hi'})
+        bid = Bid.query.filter_by(task_id=task.id, worker_id=worker.id).one()
+        employer_client.post(f'/task/{task.id}/accept_bid/{bid.id}')
+        # The requests share the test's session; let them see each other's updates
+        db.session.expire_all()
+        employer_client.post(f'/task/{task.id}/complete')
+        db.session.expire_all()
+        employer_client.post(f'/task/{task.id}/review', data={'rating': str(rating), 'comment': 'Good'})
+        worker_client.post(f'/task/{task.id}/review', data={'rating': '3', 'comment': 'Fine'})
+
+    for user in (employer, worker):
+        assert stored(user.id) == expected(user.id)
+    assert stored(worker.id)['completed_count'] == 3
+    assert stored(worker.id)['stars_5'] == 2
+
+
+def test_bid_rows_load_ratings_in_one_query(app, client):
+    employer = User.query.filter_by(role='employer').first()
+    task = Task.query.filter_by(status='open', employer_id=employer.id).first()
+    for i in range(5):
+        bidder = User(name=f'Bidder {i}', email=f'bidder{i}@example.com', password_hash='-', role='worker')
+        db.session.add(bidder)
+        db.session.flush()
+        db.session.add(Bid(task_id=task.id, worker_id=bidder.id, amount=20 + i, status='pending'))
+        db.session.add(Reputation(user_id=bidder.id, review_count=2, rating_sum=7, stars_3=1, stars_4=1))
+    db.session.commit()
+    login(client, employer)
+
+    statements = []
+
+    def before_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_execute)
+    try:
+        html = client.get(f'/task/{task.id}').get_data(as_text=True)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_execute)
+
+    assert html.count('⭐ 3.5 (2)') == 5
+    assert sum('FROM reputation' in s for s in statements) == 1
+    assert not any('FROM review' in s for s in statements)
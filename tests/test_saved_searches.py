@@ -0,0 +1,89 @@
+from sqlalchemy import delete, event
+
+from models import db, SavedSearch, SavedSearchChange, User
+from saved_searches import SearchIndex, record
+
+
+def matched_ids(index):
+    return sorted(search_id for search_id, _ in index.match('Delivery', 'offline', 'beginner', 20, 'parcel'))
+
+
+def save(worker, **fields):
+    search = SavedSearch(user_id=worker.id, keyword='parcel', **fields)
+    db.session.add(search)
+    db.session.flush()
+    record(search.id)
+    return search
+
+
+def unsave(search):
+    db.session.delete(search)
+    record(search.id)
+
+
+def count_selects(body):
+    statements = []
+
+    def before_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_execute)
+    try:
+        body()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_execute)
+    return statements
+
+
+def test_refresh_replays_the_change_feed(app):
+    worker = User.query.filter_by(role='worker').first()
+    first, second, third = (save(worker) for _ in range(3))
+    unsave(second)
+    db.session.commit()
+
+    index = SearchIndex()
+    index.refresh()
+    assert matched_ids(index) == [first.id, third.id]
+
+    # One delete and one insert below the highest indexed id
+    unsave(first)
+    save(worker, id=second.id)
+    db.session.commit()
+    index.refresh()
+    assert matched_ids(index) == [second.id, third.id]
+
+    index.remove(third.id)
+    assert matched_ids(index) == [second.id]
+    assert index.match('Delivery', 'offline', 'beginner', 20, 'nothing here') == []
+
+
+def test_refresh_without_changes_reads_only_the_feed_head(app):
+    worker = User.query.filter_by(role='worker').first()
+    search = save(worker)
+    db.session.commit()
+    index = SearchIndex()
+    index.refresh()
+
+    statements = count_selects(index.refresh)
+    assert len(statements) == 1 and 'saved_search_change' in statements[0]
+    assert matched_ids(index) == [search.id]
+
+
+def test_refresh_reloads_after_pruned_changes(app):
+    worker = User.query.filter_by(role='worker').first()
+    first = save(worker)
+    db.session.commit()
+    index = SearchIndex()
+    index.refresh()
+
+    unsave(first)
+    second = save(worker)
+    db.session.commit()
+    # The process slept through both changes and the first was pruned
+    oldest = db.session.query(db.func.min(SavedSearchChange.id)).filter(SavedSearchChange.id > index.version)
+    db.session.execute(delete(SavedSearchChange).where(SavedSearchChange.id == oldest.scalar_subquery()))
+    db.session.commit()
+
+    index.refresh()
+    assert matched_ids(index) == [second.id]
@@ -0,0 +1,74 @@
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import create_app
+from config import Config
+from models import db, Bid, Notification, Task, TaskChange, User
+from seed import seed_demo_data
+from conftest import ROOT, login
+import expiry
+
+
+@pytest.fixture
+def bare_app(tmp_path):
+    """An app with every optional subsystem but the job queue left out"""
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'TEMPLATE_CACHE_DIR': '',
+        'JOB_WORKERS': 0,
+        'SUBSYSTEMS': ('jobs',),
+    })
+    with app.app_context():
+        db.create_all()
+        seed_demo_data()
+        yield app
+        db.session.remove()
+
+
+def test_routes_work_without_optional_subsystems(bare_app):
+    employer = User.query.filter_by(role='employer').first()
+    worker = User.query.filter_by(role='worker').first()
+    task = Task.query.filter_by(status='open').first()
+    worker_client, employer_client = bare_app.test_client(), bare_app.test_client()
+    login(worker_client, worker)
+    login(employer_client, employer)
+
+    assert worker_client.get('/?category=Delivery').status_code == 200
+    assert worker_client.post(f'/task/{task.id}/bid', data={'amount': '40', 'proposal': 'Hi'}).status_code == 302
+    bid = Bid.query.filter_by(task_id=task.id, worker_id=worker.id).one()
+    assert employer_client.post(f'/task/{task.id}/accept_bid/{bid.id}').status_code == 302
+    assert employer_client.post(f'/task/{task.id}/complete').status_code == 302
+    assert employer_client.post(f'/messages/{worker.id}', data={'content': 'Thanks'}).status_code == 302
+    assert employer_client.get('/dashboard').status_code == 200
+
+    db.session.expire_all()
+    assert db.session.get(Task, task.id).status == 'completed'
+    assert Notification.query.count() == 0
+    assert TaskChange.query.count() == 0
+
+
+def test_expiry_sweep_skips_the_change_feed_without_snapshots(bare_app):
+    task = Task.query.filter_by(status='open').first()
+    task.expires_at = datetime.utcnow() - timedelta(hours=1)
+    db.session.commit()
+
+    assert expiry.sweep_expired(pause=0)['tasks'] == 1
+    assert TaskChange.query.count() == 0
+
+
+def test_disabled_subsystems_are_never_imported(tmp_path):
+    """Importing app and building a trimmed app loads no optional module, nor Pillow"""
+    optional = [name for name in Config.SUBSYSTEMS if name != 'jobs'] + ['PIL']
+    code = (
+        "import sys\n"
+        "from app import create_app\n"
+        f"create_app({{'SQLALCHEMY_DATABASE_URI': 'sqlite:///{tmp_path / 'test.db'}', "
+        "'TEMPLATE_CACHE_DIR': '', 'JOB_WORKERS': 0, 'SUBSYSTEMS': ('jobs',)})\n"
+        f"print(sorted(name for name in {optional!r} if name in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == '[]'
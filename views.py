@@ -0,0 +1,1006 @@
+from flask import current_app, render_template, request, redirect, url_for, session, flash, jsonify, stream_with_context
+from sqlalchemy import insert, update, select, exists, case, func, literal, union
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager, joinedload, load_only, undefer
+from werkzeug.security import generate_password_hash, check_password_hash
+from datetime import datetime, timedelta
+
+from models import db, User, Task, Bid, Review, Message, SavedSearch, SearchMatch, TASK_CARD_COLUMNS, open_now
+from models import ArchivedTask, ArchivedBid, ArchivedMessage
+import autocomplete
+import exports
+import geo
+import inbox
+import market
+import reputation
+import saved_searches
+
+# The optional subsystems in Config.SUBSYSTEMS (avatars, expiry, jobs,
+# notifications, replicas, responses, task_snapshot) are imported by the
+# routes and hooks that use them, so leaving one out of SUBSYSTEMS keeps it
+# from being loaded at all.
+
+_routes = []
+
+
+def route(rule, read_only=False, **options):
+    """Like app.route, but collected here and registered by create_app()
+
+    read_only views may be served from a read replica when the replicas
+    subsystem is enabled.
+    """
+    def decorator(view_func):
+        _routes.append((rule, view_func, read_only, options))
+        return view_func
+    return decorator
+
+
+def init_app(app):
+    mark_read_only = None
+    if 'replicas' in app.config['SUBSYSTEMS']:
+        from replicas import read_only as mark_read_only
+    for rule, view_func, read_only, options in _routes:
+        if read_only and mark_read_only:
+            view_func = mark_read_only(view_func)
+        app.add_url_rule(rule, view_func=view_func, **options)
+
+
+def enabled(subsystem):
+    """True when the optional subsystem is listed in SUBSYSTEMS"""
+    return subsystem in current_app.config['SUBSYSTEMS']
+
+
+def render_page(template_name, **context):
+    """Render through responses.render_page(), which streams, when that subsystem is enabled"""
+    if not enabled('responses'):
+        return render_template(template_name, **context)
+    import responses
+    return responses.render_page(template_name, **context)
+
+
+def notify(recipient_id, kind, **fields):
+    """Queue a notification in the caller's transaction, if notifications are enabled"""
+    if enabled('notifications'):
+        import notifications
+        notifications.record(recipient_id, kind, **fields)
+
+
+def record_task_change(task_id):
+    """Add a task to the open-task snapshot's change feed, if the snapshot is enabled"""
+    if enabled('task_snapshot'):
+        import task_snapshot
+        task_snapshot.record(task_id)
+
+
+def current_user():
+    if 'user_id' in session:
+        return User.query.get(session['user_id'])
+    return None
+
+
+def ai_learning_path(task: Task):
+    """AI-powered learning path generator based on task requirements."""
+    skill = (task.required_skill or task.category or '').lower()
+    difficulty = task.difficulty.lower()
+    category = (task.category or '').lower()
+
+    learning_paths = {
+        'social media': {
+            'title': 'Social Media Marketing Mastery',
+            'description': 'Learn how to create engaging social media content, understand platform algorithms, and grow your audience.',
+            'resources': [
+                {'type': 'Video Course', 'title': 'Social Media Marketing Basics', 'url': 'https://www.youtube.com/results?search_query=social+media+marketing+basics', 'duration': '2 hours'},
+                {'type': 'Tool Tutorial', 'title': 'Canva for Social Media Design', 'url': 'https://www.youtube.com/results?search_query=canva+social+media+design', 'duration': '1 hour'},
+                {'type': 'Article', 'title': 'Best Practices for Instagram Posts', 'url': 'https://www.google.com/search?q=instagram+post+best+practices', 'duration': '30 min'}
+            ],
+            'tips': [
+                'Use high-quality images (at least 1080x1080px for Instagram)',
+                'Write engaging captions with relevant hashtags',
+                'Post consistently to maintain audience engagement',
+                'Analyze your posts to see what works best'
+            ],
+            'estimated_time': '3-4 hours'
+        },
+        'design': {
+            'title': 'Graphic Design Fundamentals',
+            'description': 'Master the basics of graphic design, learn to use design tools, and create professional visuals.',
+            'resources': [
+                {'type': 'Video Course', 'title': 'Canva for Beginners', 'url': 'https://www.youtube.com/results?search_query=canva+for+beginners', 'duration': '1.5 hours'},
+                {'type': 'Video Course', 'title': 'Design Principles & Color Theory', 'url': 'https://www.youtube.com/results?search_query=design+principles+color+theory', 'duration': '1 hour'},
+                {'type': 'Tool Tutorial', 'title': 'Creating Professional Posters', 'url': 'https://www.youtube.com/results?search_query=how+to+create+posters', 'duration': '45 min'}
+            ],
+            'tips': [
+                'Keep designs simple and focused',
+                'Use contrasting colors for readability',
+                'Maintain consistent fonts and styles',
+                'Leave white space for better visual balance'
+            ],
+            'estimated_time': '3-4 hours'
+        },
+        'translation': {
+            'title': 'Professional Translation Skills',
+            'description': 'Learn translation techniques, understand context, and deliver accurate translations.',
+            'resources': [
+                {'type': 'Video Course', 'title': 'Translation Best Practices', 'url': 'https://www.youtube.com/results?search_query=translation+best+practices', 'duration': '1.5 hours'},
+                {'type': 'Article', 'title': 'Common Translation Mistakes to Avoid', 'url': 'https://www.google.com/search?q=translation+mistakes+avoid', 'duration': '30 min'},
+                {'type': 'Tool Tutorial', 'title': 'Using Translation Tools Effectively', 'url': 'https://www.youtube.com/results?search_query=translation+tools+tutorial', 'duration': '1 hour'}
+            ],
+            'tips': [
+                'Always translate meaning, not just words',
+                'Consider cultural context and idioms',
+                'Proofread your translations carefully',
+                'Maintain the original tone and style'
+            ],
+            'estimated_time': '3 hours'
+        },
+        'data entry': {
+            'title': 'Data Entry & Excel Mastery',
+            'description': 'Learn efficient data entry techniques and master Excel/Google Sheets for professional work.',
+            'resources': [
+                {'type': 'Video Course', 'title': 'Excel Basics for Beginners', 'url': 'https://www.youtube.com/results?search_query=excel+for+beginners', 'duration': '2 hours'},
+                {'type': 'Video Course', 'title': 'Google Sheets Tutorial', 'url': 'https://www.youtube.com/results?search_query=google+sheets+tutorial', 'duration': '1.5 hours'},
+                {'type': 'Article', 'title': 'Data Entry Speed Tips', 'url': 'https://www.google.com/search?q=data+entry+speed+tips', 'duration': '20 min'}
+            ],
+            'tips': [
+                'Use keyboard shortcuts to work faster',
+                'Double-check data for accuracy',
+                'Organize data in clear columns and rows',
+                'Use formulas to automate calculations'
+            ],
+            'estimated_time': '3-4 hours'
+        },
+        'writing': {
+            'title': 'Professional Writing Skills',
+            'description': 'Improve your writing skills, learn to write engaging content, and master different writing styles.',
+            'resources': [
+                {'type': 'Video Course', 'title': 'Content Writing Fundamentals', 'url': 'https://www.youtube.com/results?search_query=content+writing+fundamentals', 'duration': '2 hours'},
+                {'type': 'Article', 'title': 'Grammar and Style Guide', 'url': 'https://www.google.com/search?q=grammar+style+guide', 'duration': '45 min'},
+                {'type': 'Tool Tutorial', 'title': 'Writing Tools and Resources', 'url': 'https://www.youtube.com/results?search_query=writing+tools', 'duration': '1 hour'}
+            ],
+            'tips': [
+                'Write clear and concise sentences',
+                'Proofread your work before submitting',
+                'Use active voice when possible',
+                'Structure your content with headings'
+            ],
+            'estimated_time': '3-4 hours'
+        },
+        'programming': {
+            'title': 'Programming Basics',
+            'description': 'Learn programming fundamentals and start building your coding skills.',
+            'resources': [
+                {'type': 'Video Course', 'title': 'Programming for Beginners', 'url': 'https://www.youtube.com/results?search_query=programming+for+beginners', 'duration': '3 hours'},
+                {'type': 'Article', 'title': 'Programming Best Practices', 'url': 'https://www.google.com/search?q=programming+best+practices', 'duration': '30 min'}
+            ],
+            'tips': [
+                'Start with simple projects',
+                'Practice coding daily',
+                'Read and understand error messages',
+                'Use version control (Git)'
+            ],
+            'estimated_time': '4-5 hours'
+        }
+    }
+    
+    for key, path in learning_paths.items():
+        if key in skill or key in category:
+            return path
+    
+    return {
+        'title': 'Digital Skills Development',
+        'description': 'Build essential digital skills to succeed in the modern workplace.',
+        'resources': [
+            {'type': 'Video Course', 'title': 'Digital Skills for Beginners', 'url': 'https://www.youtube.com/results?search_query=digital+skills+for+beginners', 'duration': '2 hours'},
+            {'type': 'Article', 'title': 'Freelancing Tips and Tricks', 'url': 'https://www.google.com/search?q=freelancing+tips', 'duration': '30 min'}
+        ],
+        'tips': [
+            'Start with the basics and build gradually',
+            'Practice regularly to improve your skills',
+            'Seek feedback from experienced professionals',
+            'Stay updated with industry trends'
+        ],
+        'estimated_time': '2-3 hours'
+    }
+
+
+def nearby_ids(conditions, lat, lon, radius_km, sort, count):
+    """Ids of the first count tasks matching conditions, for a radius filter or distance sort
+
+    Only (id, latitude, longitude) rows are read, and only as many as the
+    page needs (see geo.nearest and geo.newest_within).
+    """
+    located = select(Task.id, Task.latitude, Task.longitude).where(*conditions)
+
+    def rows_in(cells, box, limit):
+        query = located.where(*geo.box_filter(Task.latitude, Task.longitude, box))
+        return db.session.execute(geo.rows_in_cells(query, Task.geohash, cells, limit)).all()
+
+    def rows_between(box, low_id, high_id):
+        query = located.where(Task.id > low_id, Task.id <= high_id,
+                              *geo.box_filter(Task.latitude, Task.longitude, box))
+        return db.session.execute(query.order_by(Task.id.desc())).all()
+
+    if sort != 'distance':
+        top_id = db.session.execute(select(func.max(Task.id))).scalar()
+        return geo.newest_within(rows_in, rows_between, lat, lon, radius_km, count, top_id)
+    ids = [task_id for _, task_id in geo.nearest(rows_in, lat, lon, count, radius_km)]
+    if not radius_km and len(ids) < count:
+        # Tasks without a location are listed after every located one
+        ids += db.session.execute(
+            select(Task.id).where(*conditions, Task.geohash.is_(None))
+            .order_by(Task.id.desc()).limit(count - len(ids))
+        ).scalars().all()
+    return ids
+
+
+@route('/', read_only=True)
+def index():
+    search = request.args.get('search', '').strip()
+    filter_mode = request.args.get('mode', 'all')
+    category = request.args.get('category', 'all')
+    min_budget = request.args.get('min_budget', type=float)
+    max_budget = request.args.get('max_budget', type=float)
+    difficulty = request.args.get('difficulty', 'all')
+    near_lat = request.args.get('lat', type=float)
+    near_lon = request.args.get('lon', type=float)
+    radius_km = request.args.get('radius_km', type=float)
+    sort = request.args.get('sort', 'newest')
+    user = current_user()
+
+    if near_lat is not None and near_lon is not None and not geo.valid_point(near_lat, near_lon):
+        flash('Location ignored: latitude must be within ±90 and longitude within ±180.', 'error')
+        near_lat = near_lon = None
+    if radius_km is not None and not geo.valid_radius(radius_km):
+        flash('Radius ignored: it must be a distance above 0 km.', 'error')
+        radius_km = None
+    if (near_lat is None or near_lon is None) and user and geo.valid_point(user.latitude, user.longitude):
+        near_lat, near_lon = user.latitude, user.longitude
+    has_origin = near_lat is not None and near_lon is not None
+
+    per_page = current_app.config['TASKS_PER_PAGE']
+    page = max(request.args.get('page', 1, type=int), 1)
+    offset = (page - 1) * per_page
+    # A radius or distance sort is paged by geo.py rather than by LIMIT/OFFSET
+    by_distance = has_origin and (radius_km or sort == 'distance')
+
+    card_options = (load_only(*TASK_CARD_COLUMNS), undefer(Task.bid_count))
+    filters = {
+        'mode': filter_mode if filter_mode in ('online', 'offline') else None,
+        'category': category if category != 'all' and category else None,
+        'difficulty': difficulty if difficulty != 'all' and difficulty else None,
+        'min_budget': min_budget, 'max_budget': max_budget,
+    }
+    # Selective filters and deep pages come from the in-memory snapshot; text search
+    # and distances need SQL, and so does anything SQL can answer with a short scan.
+    ids = None
+    if enabled('task_snapshot') and any(filters.values()) and not search and not by_distance:
+        import task_snapshot
+        ids = task_snapshot.page_ids(offset, per_page + 1, **filters)
+    if ids is not None:
+        tasks = task_snapshot.load_tasks(ids, *card_options)
+    else:
+        conditions = [Task.status == 'open', open_now()]
+
+        if search:
+            conditions.append(
+                (Task.title.contains(search)) |
+                (Task.description.contains(search)) |
+                (Task.category.contains(search))
+            )
+
+        if filter_mode == 'online':
+            conditions.append(Task.mode == 'online')
+        elif filter_mode == 'offline':
+            conditions.append(Task.mode == 'offline')
+
+        if category != 'all' and category:
+            conditions.append(Task.category == category)
+
+        if min_budget:
+            conditions.append(Task.budget_azn >= min_budget)
+        if max_budget:
+            conditions.append(Task.budget_azn <= max_budget)
+
+        if difficulty != 'all' and difficulty:
+            conditions.append(Task.difficulty == difficulty)
+
+        if by_distance:
+            ids = nearby_ids(conditions, near_lat, near_lon, radius_km, sort, offset + per_page + 1)[offset:]
+            by_id = {t.id: t for t in Task.query.filter(Task.id.in_(ids)).options(*card_options)}
+            tasks = [by_id[task_id] for task_id in ids if task_id in by_id]
+        else:
+            tasks = (Task.query.filter(*conditions).options(*card_options).order_by(Task.id.desc())
+                     .limit(per_page + 1).offset(offset).all())
+
+    if has_origin:
+        for t in tasks:
+            t.distance_km = (geo.distance_km(near_lat, near_lon, t.latitude, t.longitude)
+                             if t.latitude is not None and t.longitude is not None else None)
+    has_next = len(tasks) > per_page
+    tasks = tasks[:per_page]
+    page_args = {key: value for key, value in request.args.items() if key != 'page'}
+
+    all_categories = [
+        'IT & Programming', 'Graphic & Design', 'Writing & Translation',
+        'Marketing & SMM', 'Education & Tutoring', 'Virtual Assistant', 'Data / AI Tasks',
+        'Delivery', 'Home & Repair Services', 'Event & Photography',
+        'Construction & Labor', 'Agriculture', 'Transportation'
+    ]
+    
+    return render_page('index.html', tasks=tasks, user=user, filter_mode=filter_mode,
+                         search=search, category=category, categories=all_categories, 
+                         min_budget=min_budget, max_budget=max_budget, difficulty=difficulty,
+                         near_lat=near_lat, near_lon=near_lon, radius_km=radius_km, sort=sort,
+                         page=page, has_next=has_next, page_args=page_args)
+
+
+@route('/register', methods=['GET', 'POST'])
+def register():
+    if request.method == 'POST':
+        name = request.form['name']
+        email = request.form['email'].lower()
+        password = request.form['password']
+        role = request.form['role']
+        skills = request.form.get('skills', '')
+
+        if User.query.filter_by(email=email).first():
+            flash('Email already registered, please log in.', 'error')
+            return redirect(url_for('login'))
+
+        user = User(
+            name=name,
+            email=email,
+            password_hash=generate_password_hash(password),
+            role=role,
+            skills=skills
+        )
+        db.session.add(user)
+        db.session.commit()
+
+        flash('Account created! Please log in.', 'success')
+        return redirect(url_for('login'))
+
+    return render_template('register.html')
+
+
+@route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        email = request.form['email'].lower()
+        password = request.form['password']
+
+        user = User.query.filter_by(email=email).first()
+        if user and check_password_hash(user.password_hash, password):
+            session['user_id'] = user.id
+            flash('Logged in successfully.', 'success')
+            return redirect(url_for('index'))
+        else:
+            flash('Wrong email or password.', 'error')
+    return render_template('login.html')
+
+
+@route('/logout')
+def logout():
+    session.clear()
+    flash('Logged out.', 'success')
+    return redirect(url_for('index'))
+
+
+@route('/task/new', methods=['GET', 'POST'])
+def new_task():
+    user = current_user()
+    if not user or user.role != 'employer':
+        flash('Only employers can post tasks.', 'error')
+        return redirect(url_for('login'))
+
+    if request.method == 'POST':
+        title = request.form['title']
+        description = request.form['description']
+        budget = float(request.form['budget'])
+        category = request.form.get('category', '').strip()
+        mode = request.form.get('mode', 'online')
+        required_skill = request.form.get('required_skill', '')
+        difficulty = request.form.get('difficulty', 'beginner')
+        latitude = request.form.get('latitude', type=float)
+        longitude = request.form.get('longitude', type=float)
+
+        if not category:
+            flash('Please select a category.', 'error')
+            return render_template('new_task.html', user=user)
+
+        if (latitude is not None or longitude is not None) and not geo.valid_point(latitude, longitude):
+            flash('Location must have a latitude within ±90 and a longitude within ±180.', 'error')
+            return render_template('new_task.html', user=user)
+
+        online_categories = [
+            'IT & Programming', 'Graphic & Design', 'Writing & Translation',
+            'Marketing & SMM', 'Education & Tutoring', 'Virtual Assistant', 'Data / AI Tasks'
+        ]
+        offline_categories = [
+            'Delivery', 'Home & Repair Services', 'Event & Photography',
+            'Construction & Labor', 'Agriculture', 'Transportation'
+        ]
+        
+        if category in online_categories:
+            mode = 'online'
+        elif category in offline_categories:
+            mode = 'offline'
+
+        task = Task(
+            title=title,
+            description=description,
+            budget_azn=budget,
+            category=category,
+            mode=mode,
+            required_skill=required_skill,
+            difficulty=difficulty,
+            employer_id=user.id
+        )
+        expires_in_days = request.form.get('expires_in_days', type=int)
+        if expires_in_days and expires_in_days > 0:
+            task.expires_at = datetime.utcnow() + timedelta(days=expires_in_days)
+        if mode == 'offline' and latitude is not None and longitude is not None:
+            task.latitude = latitude
+            task.longitude = longitude
+        db.session.add(task)
+        db.session.flush()
+        import jobs
+        jobs.enqueue('match_saved_searches', task_id=task.id)
+        record_task_change(task.id)
+        db.session.commit()
+        autocomplete.index.add_task(task)
+        flash('Task created!', 'success')
+        return redirect(url_for('index'))
+
+    return render_template('new_task.html', user=user)
+
+
+@route('/autocomplete')
+def autocomplete_search():
+    prefix = request.args.get('q', '')[:100]
+    suggestions = autocomplete.suggest(prefix, limit=request.args.get('limit', 8, type=int))
+    return jsonify(suggestions=[{'kind': kind, 'text': text} for kind, text in suggestions])
+
+
+@route('/market/price')
+def price_suggestion():
+    category = request.args.get('category', '').strip()
+    difficulty = request.args.get('difficulty', '').strip()
+    return jsonify(suggestion=market.suggest(category, difficulty) if category else None)
+
+
+@route('/task/<int:task_id>', read_only=True)
+def task_detail(task_id):
+    task = Task.query.get(task_id)
+    user = current_user()
+
+    if task is None:
+        # Completed tasks may have been moved out by archive.py
+        task = ArchivedTask.query.get_or_404(task_id)
+        bids = ArchivedBid.query.filter_by(task_id=task_id).order_by(ArchivedBid.amount.asc()).all()
+        return render_template('task_detail.html', task=task, user=user, bids=bids, user_bid=None,
+                               reputations=bidder_reputations(task, user, bids))
+
+    bids = Bid.query.options(undefer(Bid.proposal), joinedload(Bid.worker)).filter_by(task_id=task_id).order_by(Bid.amount.asc()).all()
+    
+    user_bid = None
+    if user and user.role == 'worker':
+        user_bid = Bid.query.filter_by(task_id=task_id, worker_id=user.id).first()
+    
+    return render_template('task_detail.html', task=task, user=user, bids=bids, user_bid=user_bid,
+                           reputations=bidder_reputations(task, user, bids))
+
+
+def bidder_reputations(task, user, bids):
+    """Rating summaries for the bid rows, which only the task owner sees"""
+    if not user or user.id != task.employer_id:
+        return {}
+    return reputation.summaries(bid.worker_id for bid in bids)
+
+
+@route('/task/<int:task_id>/bid', methods=['POST'])
+def place_bid(task_id):
+    user = current_user()
+    if not user or user.role != 'worker':
+        flash('You must be logged in as a worker to place bids.', 'error')
+        return redirect(url_for('login'))
+
+    task = Task.query.get_or_404(task_id)
+
+    amount = float(request.form.get('amount', 0))
+    proposal = request.form.get('proposal', '')
+
+    if amount <= 0:
+        flash('Bid amount must be greater than 0.', 'error')
+        return redirect(url_for('task_detail', task_id=task_id))
+
+    # Single INSERT ... SELECT: only inserts while the task is still open, and
+    # the unique (task_id, worker_id) index rejects duplicates.
+    open_task = select(
+        literal(task_id), literal(user.id), literal(amount), literal(proposal),
+        literal('pending'), literal(datetime.utcnow())
+    ).where(Task.id == task_id, Task.status == 'open', open_now())
+    try:
+        result = db.session.execute(
+            insert(Bid).from_select(
+                ['task_id', 'worker_id', 'amount', 'proposal', 'status', 'created_at'], open_task
+            )
+        )
+        if result.rowcount == 1:
+            # The task card shows the bid count
+            db.session.execute(
+                update(Task).where(Task.id == task_id).values(version=Task.version + 1)
+                .execution_options(synchronize_session=False)
+            )
+            notify(task.employer_id, 'bid', actor_id=user.id, task_id=task_id,
+                   actor=user.name, task=task.title, amount=amount)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        flash('You have already placed a bid on this task.', 'error')
+        return redirect(url_for('task_detail', task_id=task_id))
+
+    if result.rowcount == 0:
+        flash('Task is no longer accepting bids.', 'error')
+        return redirect(url_for('task_detail', task_id=task_id))
+
+    flash('Your bid has been placed successfully!', 'success')
+    return redirect(url_for('task_detail', task_id=task_id))
+
+
+@route('/task/<int:task_id>/accept_bid/<int:bid_id>', methods=['POST'])
+def accept_bid(task_id, bid_id):
+    user = current_user()
+    task = Task.query.get_or_404(task_id)
+    
+    if not user or user.id != task.employer_id:
+        flash('Only the task owner can accept bids.', 'error')
+        return redirect(url_for('task_detail', task_id=task_id))
+
+    bid = Bid.query.get_or_404(bid_id)
+    if bid.task_id != task_id:
+        flash('Invalid bid.', 'error')
+        return redirect(url_for('task_detail', task_id=task_id))
+
+    # Compare-and-set: only the first acceptance of a still-open task wins.
+    pending_bid = exists().where(Bid.id == bid_id, Bid.task_id == task_id, Bid.status == 'pending')
+    result = db.session.execute(
+        update(Task)
+        .where(Task.id == task_id, Task.status == 'open', pending_bid)
+        .values(status='assigned', worker_id=bid.worker_id, accepted_bid_id=bid_id, version=Task.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.session.rollback()
+        flash('This task is no longer open for accepting bids.', 'error')
+        return redirect(url_for('task_detail', task_id=task_id))
+
+    db.session.execute(
+        update(Bid)
+        .where(Bid.task_id == task_id, Bid.status == 'pending')
+        .values(status=case((Bid.id == bid_id, 'accepted'), else_='rejected'))
+        .execution_options(synchronize_session=False)
+    )
+    bid_count = db.session.query(func.count(Bid.id)).filter(Bid.task_id == task_id).scalar()
+    market.record_acceptance(task.category, task.difficulty, bid.amount, bid_count)
+    record_task_change(task_id)
+    notify(bid.worker_id, 'accepted', actor_id=user.id, task_id=task_id,
+           actor=user.name, task=task.title, amount=bid.amount)
+    db.session.commit()
+    flash(f'Bid accepted! {bid.worker.name} has been assigned to this task.', 'success')
+    return redirect(url_for('task_detail', task_id=task_id))
+
+
+@route('/task/<int:task_id>/complete', methods=['POST'])
+def complete_task(task_id):
+    user = current_user()
+    task = Task.query.get_or_404(task_id)
+    
+    if not user or user.id != task.employer_id:
+        flash('Only the task owner can mark tasks as complete.', 'error')
+        return redirect(url_for('task_detail', task_id=task_id))
+
+    result = db.session.execute(
+        update(Task)
+        .where(Task.id == task_id, Task.status == 'assigned')
+        .values(status='completed', completed_at=datetime.utcnow(), version=Task.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.session.rollback()
+        flash('Task must be assigned before completion.', 'error')
+        return redirect(url_for('task_detail', task_id=task_id))
+
+    reputation.record_completion(task.employer_id, task.worker_id)
+    record_task_change(task_id)
+    notify(task.worker_id, 'completed', actor_id=user.id, task_id=task_id,
+           actor=user.name, task=task.title)
+    db.session.commit()
+    flash('Task marked as completed! You can now leave a review.', 'success')
+    return redirect(url_for('task_detail', task_id=task_id))
+
+
+@route('/learn/<int:task_id>')
+def learn(task_id):
+    task = Task.query.get_or_404(task_id)
+    learning_path = ai_learning_path(task)
+    user = current_user()
+    return render_template('learn.html', task=task, learning_path=learning_path, user=user)
+
+
+@route('/courses', read_only=True)
+def courses():
+    user = current_user()
+    
+    from catalog import COURSES as all_courses
+    
+    category_filter = request.args.get('category', 'all')
+    level_filter = request.args.get('level', 'all')
+    
+    filtered_courses = all_courses
+    if category_filter != 'all':
+        filtered_courses = [c for c in filtered_courses if c['category'].lower() == category_filter.lower()]
+    if level_filter != 'all':
+        filtered_courses = [c for c in filtered_courses if c['level'].lower() == level_filter.lower()]
+    
+    categories = sorted(set(c['category'] for c in all_courses))
+    
+    return render_template('courses.html', courses=filtered_courses, user=user, 
+                         category_filter=category_filter, level_filter=level_filter, categories=categories)
+
+
+@route('/profile/<int:user_id>', read_only=True)
+def profile(user_id):
+    profile_user = User.query.get_or_404(user_id)
+    user = current_user()
+    
+    owner = 'employer_id' if profile_user.role == 'employer' else 'worker_id'
+    tasks = Task.query.options(load_only(*TASK_CARD_COLUMNS)).filter_by(**{owner: user_id}).order_by(Task.created_at.desc()).limit(10).all()
+    if len(tasks) < 10:
+        archived = ArchivedTask.query.filter_by(**{owner: user_id}).order_by(ArchivedTask.created_at.desc()).limit(10 - len(tasks)).all()
+        tasks = sorted(tasks + archived, key=lambda t: t.created_at or datetime.min, reverse=True)
+    
+    summary = reputation.get(user_id)
+    per_page = current_app.config['REVIEWS_PER_PAGE']
+    page = max(request.args.get('page', 1, type=int), 1)
+    reviews = (
+        Review.query.options(joinedload(Review.reviewer).load_only(User.id, User.name, User.avatar))
+        .filter_by(reviewee_id=user_id)
+        .order_by(Review.created_at.desc(), Review.id.desc())
+        .limit(per_page).offset((page - 1) * per_page).all()
+    )
+    has_next = page * per_page < summary.review_count
+    
+    return render_template('profile.html', profile_user=profile_user, user=user, tasks=tasks, reviews=reviews,
+                           reputation=summary, page=page, has_next=has_next)
+
+
+@route('/profile/edit', methods=['GET', 'POST'])
+def edit_profile():
+    user = current_user()
+    if not user:
+        flash('Please log in to edit your profile.', 'error')
+        return redirect(url_for('login'))
+
+    if request.method == 'POST':
+        latitude = request.form.get('latitude', type=float)
+        longitude = request.form.get('longitude', type=float)
+        if (latitude is not None or longitude is not None) and not geo.valid_point(latitude, longitude):
+            flash('Location must have a latitude within ±90 and a longitude within ±180.', 'error')
+            return redirect(url_for('edit_profile'))
+
+        user.name = request.form.get('name', user.name)
+        user.bio = request.form.get('bio', '')
+        user.location = request.form.get('location', '')
+        user.skills = request.form.get('skills', '')
+        user.latitude = latitude
+        user.longitude = longitude
+        user.version = User.version + 1
+        upload = request.files.get('avatar')
+        if upload and upload.filename and enabled('avatars'):
+            import avatars
+            try:
+                user.avatar = avatars.save_avatar(
+                    upload.stream, current_app.config['AVATAR_DIR'], current_app.config['AVATAR_MAX_BYTES']
+                )
+            except avatars.AvatarError as e:
+                db.session.rollback()
+                flash(str(e), 'error')
+                return redirect(url_for('edit_profile'))
+        db.session.commit()
+        autocomplete.index.add_skills(user.skills)
+        flash('Profile updated successfully!', 'success')
+        return redirect(url_for('profile', user_id=user.id))
+
+    return render_template('edit_profile.html', user=user)
+
+
+@route('/task/<int:task_id>/review', methods=['GET', 'POST'])
+def add_review(task_id):
+    user = current_user()
+    if not user:
+        flash('Please log in to leave a review.', 'error')
+        return redirect(url_for('login'))
+
+    task = Task.query.get_or_404(task_id)
+    
+    if task.status != 'completed':
+        flash('Task must be completed before leaving a review.', 'error')
+        return redirect(url_for('task_detail', task_id=task_id))
+
+    if user.id == task.employer_id:
+        reviewee_id = task.worker_id
+    elif user.id == task.worker_id:
+        reviewee_id = task.employer_id
+    else:
+        flash('You can only review tasks you are involved in.', 'error')
+        return redirect(url_for('task_detail', task_id=task_id))
+
+    existing_review = Review.query.filter_by(
+        task_id=task_id,
+        reviewer_id=user.id
+    ).first()
+    
+    if existing_review:
+        flash('You have already reviewed this task.', 'error')
+        return redirect(url_for('task_detail', task_id=task_id))
+
+    if request.method == 'POST':
+        rating = int(request.form.get('rating', 5))
+        comment = request.form.get('comment', '')
+
+        if rating < 1 or rating > 5:
+            flash('Rating must be between 1 and 5.', 'error')
+            return redirect(url_for('add_review', task_id=task_id))
+
+        review = Review(
+            task_id=task_id,
+            reviewer_id=user.id,
+            reviewee_id=reviewee_id,
+            rating=rating,
+            comment=comment
+        )
+        db.session.add(review)
+        # Bid rows show the reviewee's rating
+        db.session.execute(
+            update(User).where(User.id == reviewee_id).values(version=User.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.flush()
+        reputation.record_review(reviewee_id, rating)
+        db.session.commit()
+        flash('Review submitted successfully!', 'success')
+        return redirect(url_for('task_detail', task_id=task_id))
+
+    reviewee = User.query.get(reviewee_id)
+    return render_template('add_review.html', task=task, user=user, reviewee=reviewee)
+
+
+@route('/messages')
+def messages():
+    user = current_user()
+    if not user:
+        flash('Please log in to view messages.', 'error')
+        return redirect(url_for('login'))
+
+    conversation_partners = set()
+    for model in (Message, ArchivedMessage):
+        partners = union(
+            select(model.receiver_id).where(model.sender_id == user.id),
+            select(model.sender_id).where(model.receiver_id == user.id),
+        )
+        conversation_partners.update(row[0] for row in db.session.execute(partners))
+    
+    unread = dict(db.session.execute(inbox.unread_counts(user.id)).all())
+    conversations = []
+    for partner_id in conversation_partners:
+        partner = User.query.get(partner_id)
+        last_message = Message.query.filter(
+            ((Message.sender_id == user.id) & (Message.receiver_id == partner_id)) |
+            ((Message.sender_id == partner_id) & (Message.receiver_id == user.id))
+        ).order_by(Message.created_at.desc()).first()
+        if last_message is None:
+            last_message = ArchivedMessage.query.filter(
+                ((ArchivedMessage.sender_id == user.id) & (ArchivedMessage.receiver_id == partner_id)) |
+                ((ArchivedMessage.sender_id == partner_id) & (ArchivedMessage.receiver_id == user.id))
+            ).order_by(ArchivedMessage.created_at.desc()).first()
+        
+        conversations.append({
+            'partner': partner,
+            'last_message': last_message,
+            'unread_count': unread.get(partner_id, 0)
+        })
+    
+    conversations.sort(key=lambda x: x['last_message'].created_at if x['last_message'] else datetime.min, reverse=True)
+    
+    return render_page('messages.html', user=user, conversations=conversations)
+
+
+@route('/messages/unread')
+def unread_messages():
+    """Unread message counts as JSON; asgi.py serves this path natively async"""
+    if 'user_id' not in session:
+        return jsonify(error='login required'), 401
+    return jsonify(inbox.unread_json(db.session.execute(inbox.unread_counts(session['user_id']))))
+
+
+@route('/messages/<int:partner_id>/poll')
+def poll_messages(partner_id):
+    """New messages in a conversation since ?after=<id>, marking received ones read
+
+    Answers at once; under asgi.py the same path waits up to ?wait= seconds
+    for a message to arrive (long polling).
+    """
+    if 'user_id' not in session:
+        return jsonify(error='login required'), 401
+    user_id = session['user_id']
+    rows = db.session.execute(
+        inbox.messages_after(user_id, partner_id, request.args.get('after', 0, type=int))
+    ).all()
+    if rows:
+        db.session.execute(inbox.mark_read(user_id, partner_id, rows[-1].id))
+        db.session.commit()
+    return jsonify(messages=[inbox.message_json(row) for row in rows])
+
+
+@route('/messages/<int:partner_id>', methods=['GET', 'POST'])
+def conversation(partner_id):
+    user = current_user()
+    if not user:
+        flash('Please log in to view messages.', 'error')
+        return redirect(url_for('login'))
+
+    partner = User.query.get_or_404(partner_id)
+    
+    if request.method == 'POST':
+        content = request.form.get('content', '').strip()
+        task_id = request.form.get('task_id', type=int)
+        
+        if content:
+            message = Message(
+                sender_id=user.id,
+                receiver_id=partner_id,
+                task_id=task_id if task_id else None,
+                content=content
+            )
+            db.session.add(message)
+            notify(partner_id, 'message', actor_id=user.id, task_id=task_id or None,
+                   actor=user.name, excerpt=content[:140])
+            db.session.commit()
+            return redirect(url_for('conversation', partner_id=partner_id))
+
+    Message.query.filter_by(
+        sender_id=partner_id,
+        receiver_id=user.id,
+        is_read=False
+    ).update({'is_read': True})
+    db.session.commit()
+
+    messages = Message.query.filter(
+        ((Message.sender_id == user.id) & (Message.receiver_id == partner_id)) |
+        ((Message.sender_id == partner_id) & (Message.receiver_id == user.id))
+    ).order_by(Message.created_at.asc()).all()
+
+    pair = (
+        ((ArchivedMessage.sender_id == user.id) & (ArchivedMessage.receiver_id == partner_id)) |
+        ((ArchivedMessage.sender_id == partner_id) & (ArchivedMessage.receiver_id == user.id))
+    )
+    show_history = request.args.get('history') == '1'
+    if show_history:
+        messages = ArchivedMessage.query.filter(pair).order_by(ArchivedMessage.created_at.asc()).all() + messages
+        has_history = False
+    else:
+        has_history = db.session.query(exists().where(pair)).scalar()
+
+    last_message_id = max((m.id for m in messages if isinstance(m, Message)), default=0)
+    return render_page('conversation.html', user=user, partner=partner, messages=messages, has_history=has_history,
+                       last_message_id=last_message_id)
+
+
+@route('/dashboard')
+def dashboard():
+    user = current_user()
+    if not user:
+        flash('Please log in to view your dashboard.', 'error')
+        return redirect(url_for('login'))
+
+    if user.role == 'employer':
+        posted_tasks = Task.query.options(load_only(*TASK_CARD_COLUMNS), undefer(Task.bid_count)).filter_by(employer_id=user.id).order_by(Task.created_at.desc()).all()
+        return render_page('dashboard_employer.html', user=user, tasks=posted_tasks)
+    else:
+        my_bids = Bid.query.options(joinedload(Bid.task).load_only(Task.id, Task.title)).filter_by(worker_id=user.id).order_by(Bid.created_at.desc()).all()
+        assigned_tasks = Task.query.options(load_only(*TASK_CARD_COLUMNS)).filter_by(worker_id=user.id, status='assigned').all()
+        completed_tasks = Task.query.options(load_only(*TASK_CARD_COLUMNS)).filter_by(worker_id=user.id, status='completed').all()
+        return render_page('dashboard_worker.html', user=user, bids=my_bids, 
+                             assigned_tasks=assigned_tasks, completed_tasks=completed_tasks)
+
+
+@route('/export/<any(tasks, bids, reviews):kind>.<any(csv, json):fmt>')
+def export(kind, fmt):
+    user = current_user()
+    if not user:
+        flash('Please log in to export your data.', 'error')
+        return redirect(url_for('login'))
+
+    body = exports.iter_export(kind, fmt, user)
+    filename = f'microjob-{kind}.{fmt}'
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/json'
+    if request.args.get('gzip') == '1':
+        body = exports.gzip_stream(body)
+        filename += '.gz'
+        mimetype = 'application/gzip'
+
+    response = current_app.response_class(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+
+@route('/searches', methods=['POST'])
+def save_search():
+    user = current_user()
+    if not user or user.role != 'worker':
+        flash('Log in as a worker to save searches.', 'error')
+        return redirect(url_for('login'))
+
+    def choice(name):
+        value = request.form.get(name, 'all').strip()
+        return None if value in ('', 'all') else value
+
+    search = SavedSearch(
+        user_id=user.id,
+        keyword=request.form.get('search', '').strip() or None,
+        category=choice('category'),
+        mode=choice('mode'),
+        difficulty=choice('difficulty'),
+        min_budget=request.form.get('min_budget', type=float),
+        max_budget=request.form.get('max_budget', type=float)
+    )
+    db.session.add(search)
+    db.session.flush()
+    saved_searches.record(search.id)
+    db.session.commit()
+    flash('Search saved! New matching jobs will appear in your matches.', 'success')
+    return redirect(url_for('matches'))
+
+
+@route('/searches/<int:search_id>/delete', methods=['POST'])
+def delete_search(search_id):
+    user = current_user()
+    search = SavedSearch.query.get_or_404(search_id)
+    if not user or search.user_id != user.id:
+        flash('You can only delete your own searches.', 'error')
+        return redirect(url_for('matches'))
+
+    SearchMatch.query.filter_by(saved_search_id=search_id).delete()
+    db.session.delete(search)
+    saved_searches.record(search_id)
+    db.session.commit()
+    # Other processes drop it on their next refresh
+    saved_searches.index.remove(search_id)
+    flash('Saved search deleted.', 'success')
+    return redirect(url_for('matches'))
+
+
+@route('/matches')
+def matches():
+    user = current_user()
+    if not user:
+        flash('Please log in to view your matches.', 'error')
+        return redirect(url_for('login'))
+
+    searches = SavedSearch.query.filter_by(user_id=user.id).order_by(SavedSearch.created_at.desc()).all()
+    # Inner join: matches whose task has since been archived are skipped
+    new_matches = (
+        SearchMatch.query
+        .join(SearchMatch.task)
+        .options(contains_eager(SearchMatch.task).load_only(*TASK_CARD_COLUMNS))
+        .filter(SearchMatch.user_id == user.id)
+        .order_by(SearchMatch.is_seen, SearchMatch.created_at.desc())
+        .limit(50)
+        .all()
+    )
+    unseen_ids = [m.id for m in new_matches if not m.is_seen]
+    if unseen_ids:
+        SearchMatch.query.filter(SearchMatch.id.in_(unseen_ids)).update({'is_seen': True}, synchronize_session=False)
+        db.session.commit()
+    return render_template('matches.html', user=user, searches=searches, matches=new_matches)